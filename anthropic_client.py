@@ -0,0 +1,141 @@
+"""
+Shared HTTP client for the Anthropic Messages API.
+One pooled, keep-alive requests.Session reused by every student session, with
+per-request deadlines and a configurable base URL for local stand-in servers.
+"""
+
+import json
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_BASE_URL = "https://api.anthropic.com"
+ANTHROPIC_VERSION = "2023-06-01"
+USAGE_FIELDS = ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")
+
+
+class AnthropicClient:
+    """Connection-pooled client for the Messages and Message Batches endpoints"""
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, pool_size: int = 20,
+                 connect_timeout: float = 5.0, read_timeout: float = 30.0):
+        self.base_url = base_url.rstrip("/")
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.session = requests.Session()
+        # Up to pool_size sockets are kept alive; extra concurrent requests get a one-off connection rather
+        # than blocking for a free socket, which requests would wait for with no timeout
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=False, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _headers(self, api_key: str) -> Dict[str, str]:
+        return {
+            "x-api-key": api_key,
+            "Content-Type": "application/json",
+            "anthropic-version": ANTHROPIC_VERSION
+        }
+
+    def _timeout(self, deadline: Optional[float]):
+        """Connect/read timeouts clipped to the time left before an absolute deadline"""
+        if deadline is None:
+            return (self.connect_timeout, self.read_timeout)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise requests.exceptions.Timeout("Deadline exceeded before the request was sent")
+        return (min(self.connect_timeout, remaining), min(self.read_timeout, remaining))
+
+    def create_message(self, api_key: str, payload: Dict, deadline: Optional[float] = None) -> requests.Response:
+        """Send one Messages API request; deadline is a time.monotonic() value"""
+        return self.session.post(
+            f"{self.base_url}/v1/messages",
+            headers=self._headers(api_key),
+            json=payload,
+            timeout=self._timeout(deadline)
+        )
+
+    def open_stream(self, api_key: str, payload: Dict, deadline: Optional[float] = None) -> requests.Response:
+        """Start a streaming Messages API request; read it with iter_sse_events"""
+        return self.session.post(
+            f"{self.base_url}/v1/messages",
+            headers=self._headers(api_key),
+            json=dict(payload, stream=True),
+            timeout=self._timeout(deadline),
+            stream=True
+        )
+
+    def create_batch(self, api_key: str, requests_: List[Dict]) -> requests.Response:
+        """Submit a Message Batches job of {"custom_id", "params"} requests"""
+        return self.session.post(
+            f"{self.base_url}/v1/messages/batches",
+            headers=self._headers(api_key),
+            json={"requests": requests_},
+            timeout=(self.connect_timeout, self.read_timeout)
+        )
+
+    def get_batch(self, api_key: str, batch_id: str) -> requests.Response:
+        """Current status of a Message Batches job"""
+        return self.session.get(
+            f"{self.base_url}/v1/messages/batches/{batch_id}",
+            headers=self._headers(api_key),
+            timeout=(self.connect_timeout, self.read_timeout)
+        )
+
+    def iter_batch_results(self, api_key: str, results_url: str) -> Iterator[Dict]:
+        """Yield the JSONL result records of an ended batch"""
+        response = self.session.get(
+            results_url, headers=self._headers(api_key),
+            timeout=(self.connect_timeout, self.read_timeout), stream=True
+        )
+        response.raise_for_status()
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                if line:
+                    yield json.loads(line)
+        finally:
+            response.close()
+
+    def close(self) -> None:
+        """Close pooled connections"""
+        self.session.close()
+
+
+def iter_sse_events(response: requests.Response, deadline: Optional[float] = None) -> Iterator[Tuple[str, Dict]]:
+    """Yield (event, data) pairs from a server-sent events response"""
+    event, data_lines = "message", []
+    try:
+        for line in response.iter_lines(decode_unicode=True):
+            if deadline is not None and time.monotonic() > deadline:
+                raise requests.exceptions.Timeout("Deadline exceeded while streaming")
+            if not line:
+                if data_lines:
+                    yield event, json.loads("\n".join(data_lines))
+                event, data_lines = "message", []
+            elif line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                data_lines.append(line[len("data:"):].strip())
+        if data_lines:
+            yield event, json.loads("\n".join(data_lines))
+    finally:
+        response.close()
+
+
+class UsageTotals:
+    """Running totals of the usage blocks returned by the Messages API"""
+
+    def __init__(self):
+        self._totals = dict.fromkeys(USAGE_FIELDS, 0)
+        self._lock = threading.Lock()
+
+    def record(self, usage: Dict) -> None:
+        with self._lock:
+            for field in USAGE_FIELDS:
+                self._totals[field] += usage.get(field) or 0
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._totals)
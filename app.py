@@ -5,11 +5,34 @@ Students get dynamic philosopher conversations with secure backend
 """
 
 import streamlit as st
+import hmac
+import os
 import time
 import json
-import requests
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterator, Optional, Tuple
+
+from anthropic_client import AnthropicClient, UsageTotals
+from circuit_breaker import CLOSED, CircuitBreaker
+from content_store import ContentStore
+from conversation import ConversationMemory, Turn
+from essay_similarity import EssayIndex
+from metrics import MetricsRegistry
+from progress_log import QUESTION_TYPE_CODES, ProgressLog
+from progress_store import ProgressStore
+from quiz_engine import QuizGradebook, build_gradebooks
+from philosopher_service import MAX_RESPONSE_TOKENS, PhilosopherService, exception_error_reply
+from prompts import build_user_message
+from request_scheduler import FairScheduler
+from response_cache import ResponseCache
+from semantic_cache import SimilarityIndex
+from side_server import (SideServer, StaticAssets, create_app as create_side_app, make_export_token,
+                         start_side_server)
+from singleflight import SingleFlight
+from token_budget import TokenBudget, TokenLedger, estimate_tokens, truncate_to_tokens
+from word_cloud import WordCloudBoard
 
 # 🔐 SECURE API KEY HANDLING
 # Your API key is stored in Streamlit secrets - students never see it
@@ -22,6 +45,128 @@ except KeyError:
 if not ANTHROPIC_API_KEY:
     ANTHROPIC_API_KEY = st.sidebar.text_input("🔑 Anthropic API Key (for testing)", type="password")
 
+def get_setting(name: str, default=None):
+    """Read an optional setting from Streamlit secrets, falling back to the environment"""
+    try:
+        return st.secrets[name]
+    except (KeyError, FileNotFoundError):
+        return os.environ.get(name, default)
+
+@st.cache_resource
+def get_content_store() -> ContentStore:
+    """Course content shared by every session, reloaded only when a file changes"""
+    return ContentStore()
+
+@st.cache_resource
+def get_progress_store() -> ProgressStore:
+    """Durable WAL-mode SQLite store for every student's work"""
+    return ProgressStore(get_setting("PROGRESS_DB_PATH", "phl101_progress.db"))
+
+@st.cache_resource(max_entries=2)
+def build_quiz_gradebooks(quiz_version: str) -> Dict[str, QuizGradebook]:
+    """Class-wide gradebooks for one version of the quizzes, bulk-graded from every stored submission"""
+    gradebooks = build_gradebooks(get_content_store().get("quizzes.json"))
+    store = get_progress_store()
+    for quiz_id, gradebook in gradebooks.items():
+        first_attempts = store.load_quiz_submissions(quiz_id, quiz_version)
+        gradebook.submit_packed([row for _, row in first_attempts], [student for student, _ in first_attempts])
+    return gradebooks
+
+def get_quiz_gradebooks() -> Dict[str, QuizGradebook]:
+    """Gradebooks for the current quizzes file; editing a quiz starts fresh statistics"""
+    return build_quiz_gradebooks(get_content_store().digest("quizzes.json"))
+
+@st.cache_resource
+def get_word_clouds() -> WordCloudBoard:
+    """Class-wide word clouds for discussion prompts, seeded from saved responses"""
+    board = WordCloudBoard(top_k=int(get_setting("WORD_CLOUD_SIZE", 40)))
+    store = get_progress_store()
+    for slide in get_content_store().get("slides.json"):
+        if slide.get("word_cloud"):
+            response_key = f"response_{slide['id']}"
+            for student_id, text in store.load_prompt_responses(response_key):
+                board.contribute(response_key, student_id, text)
+    return board
+
+@st.cache_resource
+def get_essay_index() -> EssayIndex:
+    """MinHash/LSH index of every essay and philosopher response, seeded from the store"""
+    index = EssayIndex(threshold=float(get_setting("ESSAY_SIMILARITY_THRESHOLD", 0.5)))
+    store = get_progress_store()
+    for philosopher, response in store.load_distinct_responses():
+        index.add_response(philosopher, response)
+    for student_id, philosopher, text in store.load_all_essays():
+        index.add_essay(student_id, philosopher, text)
+    return index
+
+@st.cache_resource
+def get_static_assets() -> StaticAssets:
+    """Browser-cacheable content files (the lecture deck), encoded once per content version"""
+    return StaticAssets(get_content_store())
+
+@st.cache_resource
+def get_side_server() -> Optional[SideServer]:
+    """HTTP server beside Streamlit for streaming downloads; None when disabled or the port is taken"""
+    port = int(get_setting("SIDE_SERVER_PORT", 8502))
+    if not port:
+        return None
+    app = create_side_app(get_progress_store, get_setting("INSTRUCTOR_PASSWORD"), lambda: get_metrics().render(),
+                          get_static_assets())
+    return start_side_server(app, get_setting("SIDE_SERVER_HOST", "127.0.0.1"), port)
+
+def side_server_url() -> Optional[str]:
+    """Browser-facing base URL of the side server, or None unless SIDE_SERVER_URL says how browsers reach it"""
+    # A guessed localhost URL only works from the server itself, and http is blocked inside https pages
+    url = get_setting("SIDE_SERVER_URL")
+    if not url or get_side_server() is None:
+        return None
+    return str(url).rstrip("/")
+
+@st.cache_resource
+def get_philosopher_service() -> PhilosopherService:
+    """Caches, budgets, scheduler, breaker and API client behind every philosopher answer, shared by all sessions"""
+    return PhilosopherService(get_content_store(), get_setting)
+
+def get_api_client() -> AnthropicClient:
+    """Pooled keep-alive HTTP client shared by every student session"""
+    return get_philosopher_service().client
+
+def get_request_scheduler() -> FairScheduler:
+    """Process-wide fair queue and RPM/TPM limiter in front of the Messages API"""
+    return get_philosopher_service().scheduler
+
+def get_usage_totals() -> UsageTotals:
+    """Token usage reported by the API, including prompt-cache reads and writes"""
+    return get_philosopher_service().usage_totals
+
+def get_token_ledger() -> TokenLedger:
+    """Token usage by student, philosopher and question type over the current budget window"""
+    return get_philosopher_service().ledger
+
+def get_token_budget() -> TokenBudget:
+    """Per-student and class-wide token caps that shorten answers as they fill"""
+    return get_philosopher_service().budget
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """Process-wide breaker that switches every session to offline answers when the API degrades"""
+    return get_philosopher_service().breaker
+
+def get_metrics() -> MetricsRegistry:
+    """Process-wide request metrics, served as /metrics on the side server"""
+    return get_philosopher_service().metrics
+
+def get_singleflight() -> SingleFlight:
+    """Coalesces identical philosopher questions that are in flight at the same time"""
+    return get_philosopher_service().singleflight
+
+def get_response_cache() -> ResponseCache:
+    """Process-wide philosopher response cache shared by every student session"""
+    return get_philosopher_service().response_cache
+
+def get_similarity_index() -> SimilarityIndex:
+    """Process-wide paraphrase index, one bucket per (philosopher, question_type)"""
+    return get_philosopher_service().similarity_index
+
 # Configure page
 st.set_page_config(
     page_title="PHL 101 - What is Religion? What is Philosophy?",
@@ -42,678 +187,280 @@ if 'student_responses' not in st.session_state:
 if 'quiz_attempts' not in st.session_state:
     st.session_state.quiz_attempts = {}
 if 'assignment1_progress' not in st.session_state:
-    st.session_state.assignment1_progress = {
-        'questions_asked': {'Durkheim': [], 'Tylor': [], 'Tillich': []},
-        'responses_received': {'Durkheim': [], 'Tylor': [], 'Tillich': []},
-        'notes': {'Durkheim': '', 'Tylor': '', 'Tillich': ''},
-        'essays': {'Durkheim': '', 'Tylor': '', 'Tillich': ''},
-        'completed_philosophers': set()
-    }
+    st.session_state.assignment1_progress = ProgressLog()
+
+# Widgets holding a student's own work, cleared when another student identifies in the same session
+STUDENT_WIDGET_PREFIXES = ("question_", "follow_up_", "notes_", "essay_", "response_", "q_")
+
+# Course content is read from content/*.json once per process and reloaded only when a file changes
+_content = get_content_store()
 
 # Enhanced slide data
-SLIDES = [
-    {
-        "id": "welcome",
-        "title": "Welcome & Introductions",
-        "content": """
-        # 📚 What is Religion? What is Philosophy?
-        
-        ## PHL 101 — Comparative Religions I
-        **Professor Xavier Honablue, M.Ed.**
-        
-        **Background:** Mathematics • Computer Science • Philosophy • Education
-        
-        > "We're going to explore the great traditions of the world — Judaism, Christianity, Islam, but also Eastern, African, and Indigenous traditions. Our job is not to judge, but to think critically, compare, and engage."
-        """,
-        "presenter_notes": "Welcome students warmly. Share your background briefly. Set collaborative tone for the semester. Emphasize respect and scholarly inquiry."
-    },
-    {
-        "id": "word_origins",
-        "title": "Word Origins: Philosophy",
-        "content": """
-        # 📖 Word Origins: Philosophy
-        
-        ## Breaking it Down:
-        * **Philo (Greek: φίλος / *phílos*)** → love, affection, friendship
-        * **Sophia (Greek: σοφία / *sophía*)** → wisdom, skill, deep knowledge
-        
-        ### So literally: 👉 **Philosophy = "the love of wisdom"**
-        
-        ## 🧠 What It Means in Practice
-        Philosophy isn't just abstract ideas — it's the *active pursuit* of wisdom:
-        * Asking **fundamental questions** (What is real? What is good? What can we know?)
-        * Using **reason, logic, and argument** rather than tradition or revelation alone
-        * Seeking **clarity** about life's biggest puzzles
-        
-        ## 🏛 Historical Context
-        * Term first widely used by **ancient Greek thinkers** (Pythagoras, Socrates, Plato, Aristotle)
-        * At first, *philosophy* included all areas of knowledge — what we now call science, ethics, politics, and metaphysics
-        * Over time, philosophy became the discipline of **critical thinking** and **foundations of thought**
-        """,
-        "presenter_notes": "Ask students: If philosophy is 'love of wisdom,' what counts as wisdom today? Does wisdom mean knowing facts, living well, or something else?",
-        "interactive": True,
-        "discussion_prompt": "If philosophy is 'love of wisdom,' what counts as *wisdom* today? Does 'wisdom' mean knowing facts, living well, or something else?"
-    },
-    {
-        "id": "objectives",
-        "title": "Course Objectives",
-        "content": """
-        # 🎯 Our Journey Together
-        
-        ## What We'll Explore:
-        * **World Religions:** Christianity, Islam, Judaism, Hinduism, Buddhism, Taoism
-        * **Indigenous Traditions:** Native American, African, Australian Aboriginal
-        * **Philosophical Approaches:** Western and Eastern philosophical traditions
-        * **Critical Thinking:** Comparing beliefs, practices, and worldviews
-        * **Personal Reflection:** Understanding your own beliefs and assumptions
-        
-        ## 🌍 Our Approach
-        We approach each tradition with respect, curiosity, and scholarly rigor. We seek to understand rather than judge, to compare rather than compete, and to engage thoughtfully with humanity's greatest questions.
-        """,
-        "presenter_notes": "Emphasize comparative approach and respect for all traditions. Set expectations for academic rigor combined with personal reflection."
-    },
-    {
-        "id": "icebreaker",
-        "title": "Icebreaker Activity",
-        "content": """
-        # 🤔 The Big Questions
-        
-        ## Pair Discussion (10 minutes)
-        
-        ### Discuss with a partner:
-        1. **What do you think religion is?**
-           - Consider: rituals, beliefs, communities, sacred texts, personal experiences
-        
-        2. **What do you think philosophy is?**
-           - Think about: questioning, reasoning, logic, ethics, exploring fundamental concepts
-        
-        3. **Where do the two overlap?**
-           - Consider: ultimate questions about reality, meaning, morality, existence
-        
-        ### Share your thoughts, then we'll create our class word cloud!
-        """,
-        "presenter_notes": "Give students 10 minutes. Walk around and listen to conversations. Take notes for discussion.",
-        "timer_minutes": 10,
-        "activity_type": "discussion"
-    },
-    {
-        "id": "philosophy_meets_religion",
-        "title": "Philosophy Meets Religion",
-        "content": """
-        # 🧠 Philosophy Meets Religion
-        
-        ## 📚 Philosophy
-        **From Greek: "Philosophia" = Love of Wisdom**
-        * Asking fundamental questions
-        * Using reason and logic
-        * Challenging assumptions
-        * Seeking understanding through inquiry
-        * *Key figures: Socrates, Plato, Aristotle, Kant, Nietzsche*
-        
-        ## 🕊️ Religion
-        **From Latin: "Religare" = To Bind Together**
-        * Lived traditions and practices
-        * Sacred stories and myths
-        * Rituals and ceremonies
-        * Community and belonging
-        * *Key figures: Moses, Jesus, Muhammad, Buddha*
-        
-        ## 🤝 Both Ask the Same Core Questions:
-        * What is ultimate reality?
-        * Why are we here?
-        * How should we live?
-        * What happens after death?
-        * What is the meaning of life?
-        """,
-        "presenter_notes": "Explain etymology and overlapping concerns. Make sure students understand both definitions."
-    },
-    {
-        "id": "examples",
-        "title": "Stories of Truth-Seeking",
-        "content": """
-        # 💡 A Tale of Two Searches
-        
-        ## 🏛️ Philosophy: Plato's Cave
-        **The Story:** Prisoners chained in a cave mistake shadows on the wall for reality until one escapes and discovers the true world of sunlight.
-        
-        **The Message:** We must question what we think we know. True knowledge comes through reason, not just accepting what we see.
-        
-        **The Search:** Truth through questioning and rational inquiry.
-        
-        ---
-        
-        ## ⛰️ Religion: Moses and the Exodus
-        **The Story:** Moses leads the Israelites out of slavery in Egypt, receives the Ten Commandments, and guides them to the Promised Land.
-        
-        **The Message:** God liberates the oppressed and provides moral guidance for how to live.
-        
-        **The Search:** Freedom and meaning through divine revelation and community.
-        
-        ## 🎯 Both Stories Share:
-        **A journey from darkness to light, from bondage to freedom, from ignorance to truth.**
-        They represent humanity's eternal quest to understand reality and find meaning.
-        """,
-        "presenter_notes": "Compare narrative arcs. Show how both philosophy and religion address human needs for understanding and meaning."
-    },
-    {
-        "id": "sorting_activity",
-        "title": "Group Activity: Sorting Questions",
-        "content": """
-        # 🎲 Activity: Sorting the Big Questions
-        
-        ## Small Groups (15 minutes)
-        
-        ### Your Mission:
-        Sort these questions into three categories: **Philosophy**, **Religion**, or **Both**
-        
-        ### The Questions:
-        * Does God exist?
-        * What happens after we die?
-        * Why is there suffering?
-        * What is justice?
-        * Do humans have free will?
-        * What is the meaning of life?
-        * How should we treat others?
-        * What is consciousness?
-        * Is there absolute truth?
-        * What is love?
-        
-        ### Prediction:
-        Most questions will end up in the **"Both"** category! This shows how philosophy and religion are deeply interconnected.
-        """,
-        "presenter_notes": "Give groups time to discuss. Encourage debate. The goal is for them to see most questions belong to 'both' categories.",
-        "timer_minutes": 15,
-        "activity_type": "group_work"
-    },
-    {
-        "id": "defining_religion",
-        "title": "Defining Religion",
-        "content": """
-        # 🔬 How Scholars Define Religion
-        
-        ## Three Famous Definitions:
-        
-        ### 👥 Émile Durkheim (1858-1917)
-        **"Religion is the social glue that binds communities together."**
-        
-        *Focus:* Religion creates solidarity, shared identity, and moral order in society. Think of how religious holidays bring families together, or how shared beliefs unite communities.
-        
-        ### 👻 Edward Tylor (1832-1917)
-        **"Religion is belief in spiritual beings."**
-        
-        *Focus:* At its core, religion involves belief in gods, spirits, souls, or supernatural forces. From ancestor worship to monotheism, spiritual beings are central.
-        
-        ### 💖 Paul Tillich (1886-1965)
-        **"Religion is ultimate concern."**
-        
-        *Focus:* Religion addresses what matters most to us - our deepest values, fears, and hopes. It's about what we're willing to sacrifice everything for.
-        
-        ## 🤔 Discussion Question:
-        Which definition resonates most with you? Why? Can you think of examples that fit one definition but not the others?
-        """,
-        "presenter_notes": "Ask students which resonates most. This is where students start to see the complexity of defining religion."
-    },
-    {
-        "id": "debate",
-        "title": "Interactive Debate",
-        "content": """
-        # 💬 Let's Debate!
-        
-        ## Team Up and Defend Your Definition:
-        
-        ### 🤝 Team Durkheim - "Religion = Social Glue"
-        * Explains why religion is found in every society
-        * Shows religion's practical social function
-        * Helps understand religious conflicts
-        * *Examples: Christmas bringing families together, Islamic community prayers*
-        
-        ### 👻 Team Tylor - "Religion = Spiritual Beings"
-        * Clear, specific definition
-        * Distinguishes religion from philosophy
-        * Explains prayer, worship, and ritual
-        * *Examples: Hindu gods, Christian Trinity, ancestor spirits*
-        
-        ### 💖 Team Tillich - "Religion = Ultimate Concern"
-        * Includes secular "religions" (nationalism, sports)
-        * Focuses on personal meaning
-        * Explains religious passion and devotion
-        * *Examples: Environmental activism as religion, patriotism*
-        
-        ## 🎯 Challenge Question:
-        **Is Buddhism a religion?** How would each definition handle this case?
-        
-        *(Buddhism often lacks belief in gods but has communities, practices, and ultimate concerns about suffering and enlightenment.)*
-        """,
-        "presenter_notes": "Moderate debate. Let students get passionate - that means they're engaged! Pose the Buddhism challenge."
-    },
-    {
-        "id": "wrap_up",
-        "title": "Wrap-Up & Next Steps",
-        "content": """
-        # 🎯 Exit Ticket & Next Steps
-        
-        ## 📝 Before You Leave:
-        Write on a card: **One question about life/religion you hope this class will answer.**
-        
-        *We'll revisit these at the end of the semester to see how our journey has evolved your thinking!*
-        
-        ## 🏠 Homework (Fun & Low-Stakes):
-        * **Watch:** Choose one video from our Resources page
-        * **Write:** One paragraph answering: "How do you personally define religion?"
-        * **Reflect:** Think about a religious or philosophical question that intrigues you
-        
-        ## 🌟 Looking Ahead - Day 2 Preview:
-        Next class we'll explore:
-        * **Premise:** Basic building blocks of arguments
-        * **Contradiction:** Incompatible claims that cannot both be true
-        * **Logic:** Deductive vs. inductive reasoning
-        * **Fallacies:** Common mistakes in reasoning (straw man, ad hominem, false cause)
-        * **Absurdity:** Reductio ad absurdum - showing positions lead to absurd conclusions
-        
-        Get ready to develop your philosophical toolkit!
-        """,
-        "presenter_notes": "Collect exit tickets - valuable data for shaping the course. Preview Day 2 on argument structure."
-    }
-]
+SLIDES = _content.get("slides.json")
+get_side_server()
 
 # Assignment 1 Philosopher Profiles for LLM
-PHILOSOPHER_PROFILES = {
-    "Durkheim": {
-        "name": "Émile Durkheim",
-        "years": "1858-1917",
-        "background": "I am a French sociologist who founded the academic discipline of sociology. I studied how societies hold together and function, with particular interest in the role of religion in creating social solidarity.",
-        "key_ideas": [
-            "Religion is the social glue that binds communities together",
-            "Sacred rituals create 'collective effervescence' - shared emotional experiences that unite people",
-            "Religious beliefs reflect society's deepest values and moral order",
-            "Modern societies shift from mechanical solidarity (similarity) to organic solidarity (interdependence)"
-        ],
-        "on_premise": "A premise must be grounded in empirical observation of social facts. I believe in studying society scientifically, so any premise about religion should be based on observable social phenomena, not personal beliefs.",
-        "on_contradiction": "Contradictions in religious thought often reflect tensions within society itself. When religious ideas contradict each other, look for the underlying social conflicts they represent.",
-        "on_logic": "Logic in sociology must be inductive - we observe patterns in social behavior and draw conclusions. Deductive reasoning from abstract principles misses the lived reality of how people actually behave in groups.",
-        "on_fallacy": "The greatest fallacy is methodological individualism - trying to explain social phenomena by looking only at individuals. Society is more than the sum of its parts.",
-        "on_absurdity": "What appears absurd in religious practice often serves vital social functions. Seemingly irrational rituals create the very social bonds that hold communities together.",
-        "personality": "methodical, scientific, focused on empirical observation, believes strongly in the power of sociology to understand human behavior"
-    },
-    "Tylor": {
-        "name": "Edward Burnett Tylor",
-        "years": "1832-1917",
-        "background": "I am an English anthropologist, often called the father of cultural anthropology. I developed evolutionary theories of culture and religion, studying how beliefs develop from primitive to advanced forms.",
-        "key_ideas": [
-            "Religion is belief in spiritual beings - this is the minimum definition",
-            "Culture is 'that complex whole which includes knowledge, belief, art, morals, law, custom'",
-            "Religious beliefs evolved from animism (spirits in objects) to polytheism to monotheism",
-            "All cultures can be arranged on an evolutionary scale from savage to civilized"
-        ],
-        "on_premise": "A sound premise about religion must identify the essential element present in all religious systems. I argue this is belief in spiritual beings - gods, souls, spirits, or supernatural forces.",
-        "on_contradiction": "Contradictions arise when we confuse the essential core of religion with its cultural variations. The belief in spiritual beings is universal; how societies express this varies widely.",
-        "on_logic": "Logic requires clear definitions and careful comparison across cultures. We must distinguish between the universal elements of human thought and their particular cultural expressions.",
-        "on_fallacy": "A common fallacy is cultural relativism taken too far - assuming all beliefs are equally valid. Some represent more advanced reasoning about the spiritual realm than others.",
-        "on_absurdity": "What seems absurd in so-called 'primitive' religions often represents early attempts at scientific thinking - trying to explain natural phenomena through spiritual causation.",
-        "personality": "confident in evolutionary progress, believes in objective scientific study of culture, somewhat paternalistic toward 'primitive' peoples but genuinely curious about human diversity"
-    },
-    "Tillich": {
-        "name": "Paul Tillich",
-        "years": "1886-1965",
-        "background": "I am a German-American theologian and philosopher. I lived through both World Wars and experienced exile from Nazi Germany. I sought to bridge theology and modern philosophy, making religious thought relevant to contemporary life.",
-        "key_ideas": [
-            "Religion is ultimate concern - what matters most deeply to a person",
-            "God is not a being but Being-itself, the ground of all existence",
-            "Faith is not belief despite evidence, but ultimate concern about ultimate reality",
-            "Secular movements can be religious if they involve ultimate commitment (nationalism, communism, etc.)"
-        ],
-        "on_premise": "A premise is religious if it deals with ultimate questions - not preliminary concerns like science or politics, but the final questions of existence, meaning, and value.",
-        "on_contradiction": "Contradictions often arise when we confuse the finite with the infinite, or when ultimate concerns compete. True religion transcends these apparent contradictions.",
-        "on_logic": "Religious logic is not the same as scientific logic. Religious truth is existential - it grasps us with ultimate concern rather than being grasped by our rational faculties.",
-        "on_fallacy": "The greatest fallacy is literalism - treating religious symbols as if they were scientific descriptions. Religious language is symbolic, pointing beyond itself to ultimate reality.",
-        "on_absurdity": "What seems absurd to scientific reason may reveal profound existential truth. The 'absurd' often points to the limits of finite reason when confronting the infinite.",
-        "personality": "deeply philosophical, concerned with meaning and existence, bridges academic and pastoral concerns, speaks to modern anxiety and alienation"
-    }
-}
+PHILOSOPHER_PROFILES = _content.get("philosophers.json")
 
 # Quiz questions with detailed explanations
-QUIZ_DATA = {
-    "definitions_quiz": {
-        "title": "Understanding Definitions of Religion",
-        "questions": [
-            {
-                "question": "According to Durkheim, religion primarily functions as:",
-                "options": [
-                    "A belief system about supernatural beings",
-                    "Social glue that binds communities together", 
-                    "Individual's ultimate concern",
-                    "A search for absolute truth"
-                ],
-                "correct": 1,
-                "explanation": "Durkheim emphasized religion's social function - shared rituals create solidarity and moral order in society. Think of how religious holidays bring families together or how shared beliefs unite communities."
-            },
-            {
-                "question": "Tylor's definition focuses on:",
-                "options": [
-                    "Community rituals and practices",
-                    "Personal meaning and values",
-                    "Belief in spiritual beings",
-                    "Social solidarity"
-                ],
-                "correct": 2,
-                "explanation": "Tylor defined religion as 'belief in spiritual beings' - gods, spirits, souls, or supernatural forces. This definition emphasizes the metaphysical aspect of religion."
-            },
-            {
-                "question": "Which definition would BEST explain why some people treat sports teams like a religion?",
-                "options": [
-                    "Durkheim's social glue",
-                    "Tylor's spiritual beings", 
-                    "Tillich's ultimate concern",
-                    "None of these definitions"
-                ],
-                "correct": 2,
-                "explanation": "Tillich's 'ultimate concern' definition would best explain this - sports can become what matters most to someone, what they're willing to sacrifice time, money, and energy for, even without supernatural beliefs."
-            },
-            {
-                "question": "Buddhism presents a challenge to which definition of religion?",
-                "options": [
-                    "Only Durkheim's definition",
-                    "Only Tylor's definition",
-                    "Only Tillich's definition", 
-                    "All three definitions work well for Buddhism"
-                ],
-                "correct": 1,
-                "explanation": "Buddhism challenges Tylor's definition because many Buddhist traditions don't center on belief in gods or supernatural beings, but focus on practices for ending suffering and achieving enlightenment."
-            }
-        ]
-    },
-    "philosophy_basics": {
-        "title": "Philosophy Fundamentals",
-        "questions": [
-            {
-                "question": "The word 'philosophy' literally means:",
-                "options": [
-                    "Deep thinking",
-                    "Love of wisdom",
-                    "Search for truth", 
-                    "Rational inquiry"
-                ],
-                "correct": 1,
-                "explanation": "From Greek: 'philo' (love) + 'sophia' (wisdom) = love of wisdom. This emphasizes philosophy as an active pursuit and desire for understanding, not just abstract thinking."
-            },
-            {
-                "question": "Both Plato's Cave and the Exodus story represent:",
-                "options": [
-                    "The importance of community",
-                    "Belief in supernatural beings",
-                    "A journey from ignorance to truth/freedom",
-                    "The need for moral laws"
-                ],
-                "correct": 2,
-                "explanation": "Both stories follow the same basic pattern: people start in bondage/ignorance, undergo a difficult journey, and emerge into light/truth/freedom. This represents humanity's quest for understanding and meaning."
-            }
-        ]
-    }
-}
+QUIZ_DATA = _content.get("quizzes.json")
 
 # Assignment 1: Five Required Question Types
-ARGUMENT_STRUCTURE_CONCEPTS = {
-    "premise": {
-        "definition": "The basic building blocks of arguments - the foundational claims or assumptions from which conclusions are drawn",
-        "example": "Premise 1: All humans are mortal. Premise 2: Socrates is human. Conclusion: Therefore, Socrates is mortal."
-    },
-    "contradiction": {
-        "definition": "Two or more claims that cannot all be true at the same time; they are logically incompatible",
-        "example": "It cannot be both true that 'God knows everything that will happen' AND 'humans have free will to choose differently.'"
-    },
-    "logic": {
-        "definition": "The study of valid reasoning; includes deductive logic (general to specific) and inductive logic (specific to general patterns)",
-        "example": "Deductive: All religions involve ritual (general) → Buddhism involves ritual (specific). Inductive: This church, that mosque, and this temple all bring people together → Religion brings people together (pattern)."
-    },
-    "fallacy": {
-        "definition": "Common errors in reasoning that make arguments invalid or weak, such as straw man, ad hominem, or false cause",
-        "example": "Ad hominem fallacy: 'You can't trust Durkheim's theory about religion because he wasn't religious himself.'"
-    },
-    "absurdity": {
-        "definition": "Reductio ad absurdum - a logical technique that shows a position must be false because it leads to absurd or contradictory conclusions",
-        "example": "If Tylor's definition is right and religion requires belief in spiritual beings, then Buddhism isn't a religion - but that seems absurd since Buddhism is clearly religious."
-    }
-}
+ARGUMENT_STRUCTURE_CONCEPTS = _content.get("concepts.json")
 
 # Enhanced resources with corrected URLs
-RESOURCES = {
-    "videos": [
-        {
-            "title": "What is Philosophy? - Crash Course Philosophy #1",
-            "url": "https://www.youtube.com/watch?v=1A_CAkYt3GY",
-            "description": "Hank Green introduces philosophy with humor and clarity",
-            "duration": "8 minutes"
-        },
-        {
-            "title": "What is Religion? - TED-Ed",
-            "url": "https://www.youtube.com/watch?v=kZY2eeozdo8",
-            "description": "Animated exploration of different definitions of religion",
-            "duration": "5 minutes"
-        },
-        {
-            "title": "The Cave: An Adaptation of Plato's Allegory",
-            "url": "https://www.youtube.com/watch?v=1RWOpQXTltA",
-            "description": "Beautiful animated version of Plato's famous allegory",
-            "duration": "7 minutes"
-        },
-        {
-            "title": "Introduction to Philosophy of Religion",
-            "url": "https://www.youtube.com/watch?v=QVPKiNjZLXM",
-            "description": "Academic introduction to major questions in philosophy of religion",
-            "duration": "12 minutes"
-        }
-    ],
-    "articles": [
-        {
-            "title": "Stanford Encyclopedia: Philosophy of Religion",
-            "url": "https://plato.stanford.edu/entries/philosophy-religion/",
-            "description": "Comprehensive academic overview"
-        },
-        {
-            "title": "Internet Encyclopedia: Defining Religion",
-            "url": "https://iep.utm.edu/religion/",
-            "description": "Accessible discussion of different approaches to defining religion"
-        }
-    ]
-}
+RESOURCES = _content.get("resources.json")
 
-def get_philosopher_response(philosopher_name: str, question: str, question_type: str, anthropic_api_key: str = None) -> str:
-    """Generate a response from the specified philosopher using Claude API"""
-    
-    # Use the server's API key (hidden from students)
-    api_key = ANTHROPIC_API_KEY
-    
-    # If no API key available, return helpful message
-    if not api_key:
-        return """🚫 **Server Configuration Issue**
-        
-The instructor needs to set up the Anthropic API key on the server. 
-Students don't need to worry about this - just let your instructor know!
+def get_prompt_version() -> str:
+    """Digest of the content files the prompts are built from; keys every cached answer"""
+    return get_philosopher_service().prompt_version()
 
-*This message only appears when the server isn't properly configured.*"""
-    
-    # Build the system prompt
+# Load prepared answers now so the first questions in class are served locally
+get_philosopher_service().prepared_answers()
+
+CONTEXT_TOKEN_BUCKETS = (50, 100, 200, 400, 600, 800, 1000, 1200, 1600, 2000, 3000)
+
+def conversation_messages(progress_data: ProgressLog, philosopher_name: str, question: str,
+                          question_type: str) -> Optional[List[Dict]]:
+    """The student's thread with this philosopher as bounded Messages API history, or None for a first question"""
+    exchanges = progress_data.thread(philosopher_name)
+    if not exchanges:
+        return None
     profile = PHILOSOPHER_PROFILES[philosopher_name]
-    concept = ARGUMENT_STRUCTURE_CONCEPTS.get(question_type, {})
+    turns = []
+    for exchange in exchanges:
+        exchange_type = QUESTION_TYPE_CODES.label(exchange.question_type)
+        turns.append(Turn(build_user_message(profile, exchange_type, exchange.question), exchange_type,
+                          exchange.question, exchange.response))
     
-    system_prompt = f"""You are {profile['name']} ({profile['years']}), responding to a philosophy student's question.
+    memories = st.session_state.setdefault('conversation_memory', {})
+    memory = memories.get(philosopher_name)
+    if memory is None:
+        memory = memories[philosopher_name] = ConversationMemory(
+            recent_turns=int(get_setting("CONVERSATION_RECENT_TURNS", 3)),
+            summary_tokens=int(get_setting("CONVERSATION_SUMMARY_TOKENS", 250))
+        )
+    messages = memory.messages(turns, build_user_message(profile, question_type, question),
+                               int(get_setting("CONVERSATION_MAX_INPUT_TOKENS", 1200)))
+    get_metrics().histogram("philosopher_context_tokens", "Estimated input tokens of conversation history sent",
+                            buckets=CONTEXT_TOKEN_BUCKETS) \
+        .observe(sum(estimate_tokens(message["content"]) for message in messages))
+    return messages
+
+def get_session_id() -> str:
+    """Stable identifier for this browser session, used for fair queueing"""
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    return st.session_state.session_id
+
+def get_requester_id() -> str:
+    """Who a request is queued and budgeted under: the student ID once entered, else the browser session"""
+    return get_student_id() or get_session_id()
 
-Background: {profile['background']}
+def prepare_question(question: str) -> str:
+    """Trim a question to MAX_QUESTION_TOKENS, telling the student when it was cut"""
+    question, truncated = truncate_to_tokens(question.strip(), int(get_setting("MAX_QUESTION_TOKENS", 300)))
+    if truncated:
+        st.caption("✂️ Your question was very long, so only the first part was sent.")
+    return question
 
-Your key ideas:
-{chr(10).join(f"- {idea}" for idea in profile['key_ideas'])}
+def get_philosopher_reply(philosopher_name: str, question: str, question_type: str,
+                          session_id: str = "shared", on_queue=None, messages: Optional[List[Dict]] = None) -> Dict:
+    """Answer a student question with the server's API key (hidden from students)"""
+    return get_philosopher_service().get_reply(philosopher_name, question, question_type, ANTHROPIC_API_KEY,
+                                               session_id, on_queue, messages)
+
+def stream_philosopher_reply(philosopher_name: str, question: str, question_type: str, reply: Dict,
+                             session_id: str = "shared", on_queue=None,
+                             messages: Optional[List[Dict]] = None) -> Iterator[str]:
+    """Yield the answer as it is generated; fills ``reply`` with the final text and source"""
+    return get_philosopher_service().stream_reply(philosopher_name, question, question_type, reply,
+                                                  ANTHROPIC_API_KEY, session_id, on_queue, messages)
+
+def get_philosopher_response(philosopher_name: str, question: str, question_type: str, anthropic_api_key: str = None) -> str:
+    """Generate a response from the specified philosopher using Claude API"""
+    return get_philosopher_reply(philosopher_name, question, question_type)['text']
 
-Your personality: {profile['personality']}
+def show_reply_source(reply: Dict) -> None:
+    """Caption answers that were served from the shared cache"""
+    if reply.get('coalesced'):
+        st.caption("⚡ Shared answer - classmates asked this exact question at the same moment.")
+    elif reply['source'] == 'cache':
+        st.caption("⚡ Instant answer - another student asked this exact question earlier.")
+    elif reply['source'] == 'prepared':
+        st.caption("⚡ Instant answer - prepared before class.")
+    elif reply.get('budget_exhausted'):
+        st.caption("💸 You've used up your question allowance for now, so this answer was put together from the "
+                   "philosopher's own notes.")
+    elif reply.get('max_tokens', MAX_RESPONSE_TOKENS) < MAX_RESPONSE_TOKENS:
+        st.caption("✂️ A shorter answer than usual - you're close to your question allowance.")
+    elif reply['source'] == 'offline':
+        st.caption("📴 The AI service is having trouble right now, so this answer was put together from the "
+                   "philosopher's own notes. Ask again in a minute for a full response.")
+    elif reply['source'] == 'similar':
+        st.caption(
+            f"⚡ Instant answer - matched a similar earlier question "
+            f"({reply['similarity']:.0%} match): *{reply['matched_question']}*"
+        )
+    elif reply.get('threaded'):
+        st.caption("🧵 Answered with your conversation so far in mind.")
 
-The student is asking about '{question_type}' which is defined as: {concept.get('definition', 'a concept in argument structure')}
+def get_student_id() -> Optional[str]:
+    """The identity this session's work is saved under, once the student has entered its PIN"""
+    student_id = st.session_state.get('student_id', '').strip()
+    if not student_id or st.session_state.get('verified_identity') != (student_id, st.session_state.get('student_pin', '')):
+        return None
+    return student_id
 
-Your specific view on {question_type}: {profile.get(f'on_{question_type}', 'This concept requires careful consideration')}
+def verify_student() -> Optional[str]:
+    """Check the entered PIN against the one saved for the entered name; returns what's wrong, if anything"""
+    student_id = st.session_state.get('student_id', '').strip()
+    pin = st.session_state.get('student_pin', '')
+    if not student_id or st.session_state.get('verified_identity') == (student_id, pin):
+        return None
+    min_length = int(get_setting("STUDENT_PIN_MIN_LENGTH", 4))
+    if len(pin) < min_length:
+        return f"Choose a PIN of at least {min_length} characters to save your work under this name."
+    if not get_progress_store().check_pin(student_id, pin):
+        return "That PIN doesn't match the one this name was saved with."
+    st.session_state.verified_identity = (student_id, pin)
+    return None
 
-Respond in character as {profile['name']}, drawing on your specific view of religion and your approach to {question_type}. Be educational but maintain your historical perspective and personality. Keep your response to 2-3 paragraphs and address their specific question about {question_type}."""
+def is_instructor() -> bool:
+    """Whether this session entered the configured instructor password"""
+    password = get_setting("INSTRUCTOR_PASSWORD")
+    entered = st.session_state.get("instructor_password", "")
+    return bool(password and entered) and hmac.compare_digest(str(entered), str(password))
 
-    user_message = f"Professor {profile['name']}, I'm studying argument structure and have a question about {question_type}: {question}"
+def load_student_work() -> None:
+    """Lazily load a student's saved work into session state whenever the session's identity changes"""
+    student_id = get_student_id()
+    loaded_student = st.session_state.get('loaded_student')
+    if student_id == loaded_student:
+        return
+    if loaded_student is not None:
+        # Someone else is using this browser: the last student's work is neither kept nor saved under the new name
+        reset_session_work()
+        st.session_state.loaded_student = None
+        if student_id is None:
+            return
     
-    # Make API call to Anthropic's Claude
-    headers = {
-        "x-api-key": api_key,
-        "Content-Type": "application/json",
-        "anthropic-version": "2023-06-01"
-    }
+    store = get_progress_store()
+    saved_progress = store.load_assignment1(student_id)
+    if saved_progress.exchanges or any(saved_progress.notes.values()):
+        st.session_state.assignment1_progress = saved_progress
+        st.session_state.conversation_memory = {}
+    elif loaded_student is None:
+        # First time under this identity: keep and save anything done before identifying
+        save_session_work(student_id)
+    st.session_state.quiz_attempts.update(store.load_quiz_attempts(student_id))
+    saved_responses = store.load_discussion_responses(student_id)
+    clouds = get_word_clouds()
+    cloud_keys = {f"response_{slide['id']}" for slide in SLIDES if slide.get("word_cloud")}
+    for response_key, text in st.session_state.student_responses.items():
+        if response_key not in cloud_keys:
+            continue
+        # Move anything typed before identifying from the session to the student
+        clouds.contribute(response_key, get_session_id(), "")
+        clouds.contribute(response_key, student_id, saved_responses.get(response_key, text))
+    st.session_state.student_responses.update(saved_responses)
+    st.session_state.loaded_student = student_id
+
+def reset_session_work() -> None:
+    """Empty this session's work, including what its widgets still hold"""
+    st.session_state.assignment1_progress = ProgressLog()
+    st.session_state.quiz_attempts = {}
+    st.session_state.student_responses = {}
+    st.session_state.conversation_memory = {}
+    for key in list(st.session_state):
+        if str(key).startswith(STUDENT_WIDGET_PREFIXES):
+            del st.session_state[key]
+
+def save_session_work(student_id: str) -> None:
+    """Write work done before the student identified to the store"""
+    store = get_progress_store()
+    progress_data = st.session_state.assignment1_progress
+    for philosopher, exchange in progress_data:
+        entry = exchange.to_dict()
+        store.record_exchange(student_id, philosopher, entry['type'], entry['question'],
+                              entry['response'], entry['source'], exchange.timestamp)
+    for philosopher, text in progress_data.notes.items():
+        if text:
+            store.save_notes(student_id, philosopher, text)
+    for philosopher in progress_data.completed_philosophers():
+        store.save_essay(student_id, philosopher, progress_data.essays[philosopher])
+    for quiz_id, attempts in st.session_state.quiz_attempts.items():
+        store.save_quiz_attempts(student_id, quiz_id, attempts)
+    for response_key, text in st.session_state.student_responses.items():
+        store.save_discussion_response(student_id, response_key, text)
+
+def record_exchange(progress_data: ProgressLog, philosopher: str, question_type: str, question: str, reply: Dict) -> None:
+    """Save one question and its answer to the student's Assignment 1 progress"""
+    exchange = progress_data.append(philosopher, question_type, question, reply['text'], reply['source'])
+    get_metrics().counter("philosopher_replies_total", "Answers shown to students by where they came from") \
+        .inc(source='coalesced' if reply.get('coalesced') else reply['source'])
+    if reply['source'] != 'error':
+        get_essay_index().add_response(philosopher, reply['text'])
     
-    data = {
-        "model": "claude-3-haiku-20240307",
-        "max_tokens": 400,
-        "system": system_prompt,
-        "messages": [
-            {"role": "user", "content": user_message}
-        ]
+    student_id = get_student_id()
+    if student_id:
+        get_progress_store().record_exchange(student_id, philosopher, question_type, question,
+                                             reply['text'], reply['source'], exchange.timestamp)
+
+@st.cache_resource
+def get_fanout_executor() -> ThreadPoolExecutor:
+    """Bounded worker pool shared by every session for "ask all three" requests"""
+    return ThreadPoolExecutor(
+        max_workers=int(get_setting("FANOUT_WORKERS", 6)),
+        thread_name_prefix="philosopher-fanout"
+    )
+
+def ask_all_philosophers(progress_data: ProgressLog, question: str, question_type: str) -> Dict[str, Dict]:
+    """Ask every philosopher the same question concurrently and show answers as they arrive"""
+    columns = st.columns(len(PHILOSOPHER_PROFILES))
+    placeholders = {}
+    for column, (name, profile) in zip(columns, PHILOSOPHER_PROFILES.items()):
+        with column:
+            st.markdown(f"### 🎭 {profile['name']}")
+            placeholders[name] = st.empty()
+            placeholders[name].info(f"💭 {profile['name']} is thinking...")
+    
+    executor = get_fanout_executor()
+    session_id = get_requester_id()
+    futures = {
+        executor.submit(get_philosopher_reply, name, question, question_type, session_id): name
+        for name in PHILOSOPHER_PROFILES
     }
     
-    try:
-        response = requests.post(
-            "https://api.anthropic.com/v1/messages",
-            headers=headers,
-            json=data,
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            response_data = response.json()
-            return response_data["content"][0]["text"]
-        elif response.status_code == 401:
-            return "🔑 **API Key Issue** - Please contact your instructor to fix the server configuration."
-        elif response.status_code == 429:
-            return "⏰ **Rate Limited** - Too many students are using the system. Please wait a moment and try again."
-        else:
-            return f"🚫 **Server Error** - Status {response.status_code}. Please try again or contact your instructor."
-            
-    except requests.exceptions.Timeout:
-        return "⏰ **Timeout** - Claude is taking too long to respond. Please try again."
-    except requests.exceptions.RequestException as e:
-        return f"🌐 **Connection Error** - Please check your internet connection and try again."
-    except Exception as e:
-        return f"❌ **Unexpected Error** - Something went wrong. Please try again or contact your instructor."
+    # Widgets are only touched from the script thread, as each answer completes
+    replies = {}
+    for future in as_completed(futures):
+        name = futures[future]
+        try:
+            reply = future.result()
+        except Exception as e:
+            reply = exception_error_reply(e)
+        with placeholders[name].container():
+            st.markdown(reply['text'])
+            show_reply_source(reply)
+        record_exchange(progress_data, name, question_type, question, reply)
+        replies[name] = reply
+    return replies
 
 def display_professor_lecture():
     """Display the complete beautiful HTML presentation"""
     st.markdown("# 🎓 Professor Lecture - Interactive Presentation")
     st.markdown("*Click the presentation below to begin the interactive lecture*")
     
-    # Complete HTML presentation - condensed for space
-    html_content = """<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <title>What is Religion? What is Philosophy?</title>
-    <style>
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-        body {
-            font-family: 'Segoe UI', sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: #333;
-            overflow: hidden;
-        }
-        .slide {
-            width: 100vw; height: 100vh; display: none; padding: 60px;
-            background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
-            position: relative; overflow-y: auto;
-        }
-        .slide.active { display: flex; flex-direction: column; justify-content: center; align-items: center; }
-        h1 { font-size: 3em; color: #2c3e50; text-align: center; margin-bottom: 30px; }
-        h2 { font-size: 2.5em; color: #34495e; text-align: center; margin-bottom: 40px; }
-        .content-card {
-            background: rgba(255, 255, 255, 0.95); padding: 30px; border-radius: 15px;
-            box-shadow: 0 8px 25px rgba(0,0,0,0.1); margin: 20px 0;
-        }
-        .navigation {
-            position: fixed; bottom: 30px; left: 50%; transform: translateX(-50%);
-            display: flex; gap: 15px; z-index: 1000;
-        }
-        .nav-btn {
-            background: rgba(102, 126, 234, 0.9); color: white; border: none;
-            padding: 12px 24px; border-radius: 25px; cursor: pointer; font-weight: bold;
-        }
-        .nav-btn:hover { background: rgba(102, 126, 234, 1); }
-        .nav-btn:disabled { background: rgba(149, 165, 166, 0.5); cursor: not-allowed; }
-    </style>
-</head>
-<body>
-    <div class="slide active">
-        <h1>📚 What is Religion?<br>What is Philosophy?</h1>
-        <div class="content-card">
-            <h2>PHL 101 — Comparative Religions I</h2>
-            <p><strong>Professor Xavier Honablue, M.Ed.</strong></p>
-            <p>Background: Mathematics • Computer Science • Philosophy • Education</p>
-        </div>
-    </div>
-    
-    <div class="slide">
-        <h2>🎯 Our Journey Together</h2>
-        <div class="content-card">
-            <h3>What We'll Explore:</h3>
-            <ul>
-                <li><strong>World Religions:</strong> Christianity, Islam, Judaism, Hinduism, Buddhism, Taoism</li>
-                <li><strong>Indigenous Traditions:</strong> Native American, African, Australian Aboriginal</li>
-                <li><strong>Philosophical Approaches:</strong> Western and Eastern traditions</li>
-                <li><strong>Critical Thinking:</strong> Comparing beliefs, practices, worldviews</li>
-            </ul>
-        </div>
-    </div>
-
-    <div class="slide">
-        <h2>🔬 How Scholars Define Religion</h2>
-        <div class="content-card">
-            <h3>👥 Émile Durkheim (1858-1917)</h3>
-            <p><strong>"Religion is the social glue that binds communities together."</strong></p>
-        </div>
-        <div class="content-card">
-            <h3>👻 Edward Tylor (1832-1917)</h3>
-            <p><strong>"Religion is belief in spiritual beings."</strong></p>
-        </div>
-        <div class="content-card">
-            <h3>💖 Paul Tillich (1886-1965)</h3>
-            <p><strong>"Religion is ultimate concern."</strong></p>
-        </div>
-    </div>
-
-    <div class="navigation">
-        <button class="nav-btn" onclick="previousSlide()" id="prevBtn">← Previous</button>
-        <button class="nav-btn" onclick="nextSlide()" id="nextBtn">Next →</button>
-    </div>
-
-    <script>
-        let currentSlide = 0;
-        const slides = document.querySelectorAll('.slide');
-        const totalSlides = slides.length;
-
-        function showSlide(n) {
-            slides[currentSlide].classList.remove('active');
-            currentSlide = (n + totalSlides) % totalSlides;
-            slides[currentSlide].classList.add('active');
-            
-            document.getElementById('prevBtn').disabled = currentSlide === 0;
-            document.getElementById('nextBtn').disabled = currentSlide === totalSlides - 1;
-        }
-
-        function nextSlide() {
-            if (currentSlide < totalSlides - 1) showSlide(currentSlide + 1);
-        }
-
-        function previousSlide() {
-            if (currentSlide > 0) showSlide(currentSlide - 1);
-        }
-
-        // Keyboard navigation
-        document.addEventListener('keydown', function(e) {
-            if (e.key === 'ArrowRight' || e.key === ' ') nextSlide();
-            else if (e.key === 'ArrowLeft') previousSlide();
-        });
-
-        showSlide(0);
-    </script>
-</body>
-</html>"""
+    # Lecture deck lives in content/professor_lecture.html; when browsers can reach the side server they
+    # fetch and cache it from there, so reruns only resend its URL
+    base_url = side_server_url()
+    if base_url is not None:
+        version = get_static_assets().version("professor_lecture.html")
+        st.components.v1.iframe(f"{base_url}/content/professor_lecture.html?v={version}", height=600, scrolling=True)
+        return
     
+    html_content = get_content_store().get("professor_lecture.html")
     st.components.v1.html(html_content, height=600, scrolling=True)
 
 def display_assignment1():
@@ -755,27 +502,9 @@ def display_assignment1():
     st.markdown("## 📊 Your Progress")
     
     progress_data = st.session_state.assignment1_progress
-    
-    # Progress visualization
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        durkheim_questions = len(progress_data['questions_asked']['Durkheim'])
-        st.metric("Durkheim Questions", f"{durkheim_questions}/5")
-        if durkheim_questions >= 5:
-            st.success("✅ Complete")
-    
-    with col2:
-        tylor_questions = len(progress_data['questions_asked']['Tylor'])
-        st.metric("Tylor Questions", f"{tylor_questions}/5")
-        if tylor_questions >= 5:
-            st.success("✅ Complete")
-    
-    with col3:
-        tillich_questions = len(progress_data['questions_asked']['Tillich'])
-        st.metric("Tillich Questions", f"{tillich_questions}/5")
-        if tillich_questions >= 5:
-            st.success("✅ Complete")
+    # Filled in by the question and essay panels, which redraw them when they rerun on their own
+    question_counts = (st.columns(3), st.columns(2))
+    essay_count = question_counts[1][1]
     
     # Philosopher selection
     st.markdown("## 💬 Choose Your Conversation Partner")
@@ -809,41 +538,156 @@ def display_assignment1():
     st.info(f"**{question_type.title()}:** {concept['definition']}")
     st.markdown(f"**Example:** {concept['example']}")
     
-    # Question input
-    user_question = st.text_area(
-        f"Ask {profile['name']} about {question_type}:",
-        placeholder=f"Example: How do you think about {question_type} when studying religion?",
-        key=f"question_{philosopher}_{question_type}"
-    )
+    assignment1_question_panel(progress_data, philosopher, question_type, question_counts)
+    assignment1_notes_panel(progress_data, philosopher)
+    assignment1_essay_panel(progress_data, philosopher, essay_count)
+    assignment1_overall_panel(progress_data)
+
+def assignment1_milestones(progress_data: ProgressLog, philosopher: str) -> Tuple[bool, bool]:
+    """What other panels show: whether this philosopher's essay is unlocked, and whether the assignment is done"""
+    return (progress_data.count(philosopher) >= 5,
+            progress_data.total_questions() >= 15 and progress_data.completed_count() >= 3)
+
+def refresh_progress(replies: Dict[str, Dict], message: str) -> None:
+    """Rerun the whole page once a milestone changes what the essay and overall panels show"""
+    # The answers are shown again after the rerun so the student doesn't lose them
+    st.session_state.assignment1_replay = {'replies': replies, 'message': message}
+    st.rerun()
+
+def display_question_counts(progress_data: ProgressLog, areas) -> None:
+    """Per-philosopher and total question counts, drawn into the progress area at the top of the page"""
+    philosopher_columns, total_columns = areas
+    for column, name in zip(philosopher_columns, PHILOSOPHER_PROFILES):
+        with column:
+            asked = progress_data.count(name)
+            st.metric(f"{name} Questions", f"{asked}/5")
+            if asked >= 5:
+                st.success("✅ Complete")
+    with total_columns[0]:
+        st.metric("Total Questions Asked", f"{progress_data.total_questions()}/15")
+
+@st.fragment
+def assignment1_question_panel(progress_data: ProgressLog, philosopher: str, question_type: str,
+                               question_counts) -> None:
+    """Question input and philosopher answers; reruns on its own and redraws the question counts"""
+    profile = PHILOSOPHER_PROFILES[philosopher]
+    milestones = assignment1_milestones(progress_data, philosopher)
     
-    # Ask question button
-    if st.button(f"Ask {profile['name']}", key=f"ask_{philosopher}_{question_type}"):
-        if user_question.strip():
-            # Generate response using REAL LLM
-            with st.spinner(f"💭 {profile['name']} is thinking..."):
-                response = get_philosopher_response(philosopher, user_question, question_type)
-            
-            # Display response
-            st.markdown(f"### 🎭 {profile['name']} responds:")
-            st.markdown(response)
-            
-            # Save to progress
-            progress_data['questions_asked'][philosopher].append({
-                'type': question_type,
-                'question': user_question,
-                'timestamp': datetime.now().isoformat()
-            })
-            
-            progress_data['responses_received'][philosopher].append({
-                'type': question_type,
-                'question': user_question,
-                'response': response,
-                'timestamp': datetime.now().isoformat()
-            })
-            
-            st.success("Question and response saved to your progress!")
+    replay = st.session_state.pop('assignment1_replay', None)
+    if replay is not None:
+        replies = replay['replies']
+        if len(replies) > 1:
+            # Side by side, the way ask_all_philosophers first drew them
+            for column, (name, other) in zip(st.columns(len(PHILOSOPHER_PROFILES)), PHILOSOPHER_PROFILES.items()):
+                with column:
+                    st.markdown(f"### 🎭 {other['name']}")
+                    if name in replies:
+                        st.markdown(replies[name]['text'])
+                        show_reply_source(replies[name])
         else:
-            st.warning("Please enter a question first!")
+            for name, reply in replies.items():
+                st.markdown(f"### 🎭 {PHILOSOPHER_PROFILES[name]['name']} responds:")
+                st.markdown(reply['text'])
+                show_reply_source(reply)
+        st.success(replay['message'])
+    
+    ask_all = st.toggle(
+        "👥 Ask all three philosophers at once",
+        key="ask_all_philosophers",
+        help="Send the same question to Durkheim, Tylor and Tillich together and compare their answers side by side."
+    )
+    
+    if ask_all:
+        # Question input
+        user_question = st.text_area(
+            f"Ask all three philosophers about {question_type}:",
+            placeholder=f"Example: How do you think about {question_type} when studying religion?",
+            key=f"question_all_{question_type}"
+        )
+        
+        if st.button("Ask all three philosophers", key=f"ask_all_{question_type}"):
+            if user_question.strip():
+                user_question = prepare_question(user_question)
+                replies = ask_all_philosophers(progress_data, user_question, question_type)
+                message = "All three questions and responses saved to your progress!"
+                if assignment1_milestones(progress_data, philosopher) != milestones:
+                    refresh_progress(replies, message)
+                st.success(message)
+            else:
+                st.warning("Please enter a question first!")
+    else:
+        # Question input
+        user_question = st.text_area(
+            f"Ask {profile['name']} about {question_type}:",
+            placeholder=f"Example: How do you think about {question_type} when studying religion?",
+            key=f"question_{philosopher}_{question_type}"
+        )
+        
+        stream_responses = st.checkbox(
+            "⚡ Show the answer as it's being written",
+            value=True,
+            key="stream_responses"
+        )
+        # Opt-in per question: follow-ups skip the shared caches, so only send history when it's asked for.
+        # Keying on the question count resets the box after every question.
+        continue_conversation = bool(progress_data.thread(philosopher)) and st.checkbox(
+            f"🧵 This is a follow-up to my earlier questions to {profile['name']}",
+            value=str(get_setting("CONVERSATION_MEMORY", "off")).lower() in ("1", "on", "true"),
+            key=f"follow_up_{philosopher}_{progress_data.count(philosopher)}",
+            help="The answer takes your conversation so far into account. Leave it unticked for a new question."
+        )
+        
+        # Ask question button
+        if st.button(f"Ask {profile['name']}", key=f"ask_{philosopher}_{question_type}"):
+            if user_question.strip():
+                user_question = prepare_question(user_question)
+                # Generate response using REAL LLM
+                queue_status = st.empty()
+                
+                def show_queue_position(position: int) -> None:
+                    queue_status.info(f"🚦 Lots of students are asking right now - you're **#{position}** in line.")
+                
+                messages = None
+                if continue_conversation:
+                    messages = conversation_messages(progress_data, philosopher, user_question, question_type)
+                
+                if stream_responses:
+                    st.markdown(f"### 🎭 {profile['name']} responds:")
+                    reply = {}
+                    st.write_stream(stream_philosopher_reply(
+                        philosopher, user_question, question_type, reply,
+                        session_id=get_requester_id(), on_queue=show_queue_position, messages=messages
+                    ))
+                else:
+                    with st.spinner(f"💭 {profile['name']} is thinking..."):
+                        reply = get_philosopher_reply(
+                            philosopher, user_question, question_type,
+                            session_id=get_requester_id(), on_queue=show_queue_position, messages=messages
+                        )
+                    
+                    # Display response
+                    st.markdown(f"### 🎭 {profile['name']} responds:")
+                    st.markdown(reply['text'])
+                queue_status.empty()
+                if messages is not None and reply['source'] == 'api':
+                    reply['threaded'] = True
+                
+                # Save to progress
+                record_exchange(progress_data, philosopher, question_type, user_question, reply)
+                message = (f"Question and response saved to your progress! "
+                           f"{profile['name']}: {progress_data.count(philosopher)}/5 questions asked")
+                if assignment1_milestones(progress_data, philosopher) != milestones:
+                    refresh_progress({philosopher: reply}, message)
+                st.success(message)
+            else:
+                st.warning("Please enter a question first!")
+    
+    display_question_counts(progress_data, question_counts)
+
+@st.fragment
+def assignment1_notes_panel(progress_data: ProgressLog, philosopher: str) -> None:
+    """Notes editor for the selected philosopher; reruns on its own"""
+    profile = PHILOSOPHER_PROFILES[philosopher]
     
     # Notes section
     st.markdown(f"## 📝 Your Notes on {profile['name']}")
@@ -851,25 +695,35 @@ def display_assignment1():
     notes_key = f"notes_{philosopher}"
     current_notes = st.text_area(
         f"Take notes on {profile['name']}'s responses:",
-        value=progress_data['notes'][philosopher],
+        value=progress_data.notes.get(philosopher, ''),
         height=150,
         key=notes_key,
         placeholder="What insights did you gain? How does their perspective on argument structure relate to their view of religion?"
     )
     
     if st.button(f"Save Notes for {profile['name']}", key=f"save_notes_{philosopher}"):
-        progress_data['notes'][philosopher] = current_notes
+        progress_data.notes[philosopher] = current_notes
+        if get_student_id():
+            get_progress_store().save_notes(get_student_id(), philosopher, current_notes)
         st.success("Notes saved!")
+
+@st.fragment
+def assignment1_essay_panel(progress_data: ProgressLog, philosopher: str, essay_count) -> None:
+    """Essay editor with live word count; reruns on its own and redraws the essay count"""
+    profile = PHILOSOPHER_PROFILES[philosopher]
     
     # Essay section
-    if len(progress_data['questions_asked'][philosopher]) >= 5:
+    if progress_data.count(philosopher) >= 5:
         st.markdown(f"## ✍️ Essay about {profile['name']}")
+        if st.session_state.pop('essay_submitted', None) == philosopher:
+            st.balloons()
+            st.success(f"Essay submitted successfully for {profile['name']}!")
         st.success(f"You've asked {profile['name']} all 5 required questions! Now write your essay.")
         
         essay_key = f"essay_{philosopher}"
         current_essay = st.text_area(
             f"Write 150-200 words about what you learned from {profile['name']} regarding argument structure:",
-            value=progress_data['essays'][philosopher],
+            value=progress_data.essays.get(philosopher, ''),
             height=200,
             key=essay_key,
             placeholder=f"Based on your conversations with {profile['name']}, what did you learn about how they approach premises, contradictions, logic, fallacies, and absurdity? How does their perspective on argument structure connect to their definition of religion?"
@@ -887,44 +741,39 @@ def display_assignment1():
         
         if st.button(f"Submit Essay for {profile['name']}", key=f"submit_essay_{philosopher}"):
             if 150 <= word_count <= 200:
-                progress_data['essays'][philosopher] = current_essay
-                progress_data['completed_philosophers'].add(philosopher)
+                milestones = assignment1_milestones(progress_data, philosopher)
+                progress_data.essays[philosopher] = current_essay
+                progress_data.mark_completed(philosopher)
+                if get_student_id():
+                    get_progress_store().save_essay(get_student_id(), philosopher, current_essay)
+                get_essay_index().add_essay(get_student_id() or get_session_id(), philosopher, current_essay)
+                if assignment1_milestones(progress_data, philosopher) != milestones:
+                    # The last essay completes the assignment, which the overall panel shows
+                    st.session_state.essay_submitted = philosopher
+                    st.rerun()
                 st.balloons()
                 st.success(f"Essay submitted successfully for {profile['name']}!")
             else:
                 st.error("Essay must be between 150-200 words.")
     
-    # Overall progress
-    st.markdown("## 🎯 Overall Assignment Progress")
-    
-    total_questions = sum(len(questions) for questions in progress_data['questions_asked'].values())
-    total_essays = len(progress_data['completed_philosophers'])
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        st.metric("Total Questions Asked", f"{total_questions}/15")
-    with col2:
-        st.metric("Essays Completed", f"{total_essays}/3")
-    
+    with essay_count:
+        st.metric("Essays Completed", f"{progress_data.completed_count()}/3")
+
+@st.fragment
+def assignment1_overall_panel(progress_data: ProgressLog) -> None:
+    """Completion banner and export; the totals are shown with the progress counts"""
     # Check completion
-    if total_questions >= 15 and total_essays >= 3:
+    if progress_data.total_questions() >= 15 and progress_data.completed_count() >= 3:
+        st.markdown("## 🎯 Overall Assignment Progress")
         st.balloons()
         st.success("🎉 **Assignment 1 Complete!** You've successfully completed all conversations and essays.")
         
         # Export option
         if st.button("📄 Export Assignment 1 Results"):
-            export_data = {
-                'assignment': 'Assignment 1: Philosopher Conversations',
-                'completion_date': datetime.now().isoformat(),
-                'questions_and_responses': progress_data['responses_received'],
-                'notes': progress_data['notes'],
-                'essays': progress_data['essays'],
-                'statistics': {
-                    'total_questions': total_questions,
-                    'total_essays': total_essays,
-                    'completed_philosophers': list(progress_data['completed_philosophers'])
-                }
-            }
+            if get_student_id():
+                export_data = get_progress_store().export_assignment1(get_student_id())
+            else:
+                export_data = progress_data.to_export(list(PHILOSOPHER_PROFILES))
             
             json_str = json.dumps(export_data, indent=2)
             st.download_button(
@@ -933,6 +782,66 @@ def display_assignment1():
                 file_name=f"assignment1_results_{datetime.now().strftime('%Y%m%d')}.json",
                 mime="application/json"
             )
+    
+    if is_instructor():
+        display_essay_similarity()
+        display_token_usage()
+        display_class_export()
+
+def display_essay_similarity() -> None:
+    """Instructor list of essays that closely match another essay or a philosopher response"""
+    index = get_essay_index()
+    pairs = index.flagged()
+    stats = index.stats()
+    with st.expander(f"🔍 Essay similarity ({len(pairs)} flagged)"):
+        st.caption(f"{stats['essays']} essays and {stats['responses']} philosopher responses indexed; "
+                   f"pairs with estimated overlap of at least {index.threshold:.0%} are listed.")
+        if not pairs:
+            st.info("No similar essays so far.")
+        for pair in pairs:
+            labels = []
+            for doc in (pair.first, pair.second):
+                if doc.kind == 'essay':
+                    labels.append(f"**{doc.owner}**'s essay on {doc.philosopher}")
+                else:
+                    labels.append(f"a {doc.philosopher} response")
+            st.markdown(f"**{pair.similarity:.0%}** — {labels[0]} ↔ {labels[1]}")
+            st.caption(f"“{pair.first.excerpt}…” ↔ “{pair.second.excerpt}…”")
+
+def display_token_usage() -> None:
+    """Instructor breakdown of API token usage in the current budget window"""
+    ledger, budget = get_token_ledger(), get_token_budget()
+    stats = ledger.stats()
+    with st.expander(f"💰 Token usage ({stats['input_tokens'] + stats['output_tokens']:,} tokens)"):
+        caps = []
+        if budget.student_tokens:
+            caps.append(f"{budget.student_tokens:,} per student")
+        if budget.class_tokens:
+            caps.append(f"{budget.class_tokens:,} for the class")
+        st.caption(f"{stats['requests']} API answers for {stats['students']} students this window; "
+                   f"budget: {', '.join(caps) or 'uncapped'}. Answers shorten as a cap nears.")
+        for dimension, label in (("student", "By student"), ("philosopher", "By philosopher"),
+                                 ("question_type", "By question type")):
+            rows = ledger.table(dimension)
+            if rows:
+                st.markdown(f"**{label}**")
+                st.dataframe(rows, hide_index=True)
+
+def display_class_export() -> None:
+    """Instructor links to the streaming whole-class export"""
+    with st.expander("📦 Whole-class export"):
+        base_url = side_server_url()
+        if base_url is None:
+            st.warning("The export server isn't reachable from browsers. Set `SIDE_SERVER_URL` to its public "
+                       "address (and check `SIDE_SERVER_PORT`).")
+            return
+        token = make_export_token(str(get_setting("INSTRUCTOR_PASSWORD")))
+        st.markdown(
+            f"[⬇️ All students (NDJSON)]({base_url}/export/assignment1.ndjson?token={token}) · "
+            f"[⬇️ All students (zip of JSON files)]({base_url}/export/assignment1.zip?token={token})"
+        )
+        st.caption("Links are valid for one hour. Each NDJSON record has a `cursor`; add `&after=<cursor>` "
+                   "to resume an interrupted export after that student. The zip's manifest.json holds the last cursor.")
 
 def display_slide(slide_data: dict) -> None:
     """Display a slide with enhanced formatting"""
@@ -956,29 +865,70 @@ def display_slide(slide_data: dict) -> None:
                     placeholder="What do you think? Type your response here..."
                 )
                 if response:
+                    if st.session_state.student_responses.get(response_key) != response:
+                        if get_student_id():
+                            get_progress_store().save_discussion_response(get_student_id(), response_key, response)
+                        if slide_data.get("word_cloud"):
+                            get_word_clouds().contribute(response_key, get_student_id() or get_session_id(), response)
                     st.session_state.student_responses[response_key] = response
                     st.success("Response saved!")
+                
+                if slide_data.get("word_cloud"):
+                    # Only the presenter's view polls; a hundred students polling is a hundred reruns per tick
+                    if is_instructor():
+                        refresh = float(get_setting("WORD_CLOUD_REFRESH_SECONDS", 3))
+                        st.fragment(display_word_cloud, run_every=refresh)(response_key)
+                    else:
+                        display_word_cloud(response_key)
     
     with col2:
-        # Timer display
+        # Timer display - the browser counts down; the server only wakes up again at expiry
         if st.session_state.timer_active and st.session_state.timer_end:
             remaining = st.session_state.timer_end - time.time()
             if remaining > 0:
-                mins, secs = divmod(int(remaining), 60)
-                st.markdown(f"""
-                <div style="background: linear-gradient(45deg, #ff6b6b, #ee5a24); 
-                           color: white; padding: 15px; border-radius: 10px; text-align: center;">
-                    <h3>⏰ Timer</h3>
-                    <h2>{mins:02d}:{secs:02d}</h2>
-                </div>
-                """, unsafe_allow_html=True)
-                time.sleep(1)
-                st.rerun()
+                display_countdown(remaining)
+                st.fragment(check_timer_expiry, run_every=remaining + 0.5)()
             else:
                 st.balloons()
                 st.success("⏰ Time's up!")
                 st.session_state.timer_active = False
 
+def display_word_cloud(response_key: str) -> None:
+    """Live class word cloud; the HTML is only rebuilt when the top words change"""
+    cloud = get_word_clouds().cloud(response_key)
+    stats = cloud.stats()
+    st.markdown("### ☁️ Class Word Cloud")
+    if stats['contributors']:
+        st.markdown(cloud.html(), unsafe_allow_html=True)
+        st.caption(f"{stats['contributors']} contributors · {stats['terms']} distinct words")
+    else:
+        st.caption("Words from everyone's responses will appear here.")
+
+def display_countdown(remaining: float) -> None:
+    """Render a countdown that ticks in the browser without server reruns"""
+    st.components.v1.html(f"""
+    <div id="timer" style="background: linear-gradient(45deg, #ff6b6b, #ee5a24); font-family: 'Source Sans Pro', sans-serif;
+               color: white; padding: 15px; border-radius: 10px; text-align: center;">
+        <h3 style="margin: 0 0 8px 0;">⏰ Timer</h3>
+        <h2 id="clock" style="margin: 0;">--:--</h2>
+    </div>
+    <script>
+        const end = Date.now() + {remaining * 1000:.0f};
+        const clock = document.getElementById("clock");
+        function tick() {{
+            const left = Math.max(0, Math.round((end - Date.now()) / 1000));
+            clock.textContent = String(Math.floor(left / 60)).padStart(2, "0") + ":" + String(left % 60).padStart(2, "0");
+            if (left > 0) setTimeout(tick, 250);
+        }}
+        tick();
+    </script>
+    """, height=130)
+
+def check_timer_expiry() -> None:
+    """Fragment body scheduled for the moment the timer runs out"""
+    if st.session_state.timer_active and st.session_state.timer_end and time.time() >= st.session_state.timer_end:
+        st.rerun()
+
 def start_timer(minutes: int) -> None:
     """Start activity timer"""
     st.session_state.timer_active = True
@@ -1014,9 +964,18 @@ def display_quiz(quiz_id: str) -> None:
         
         if submitted and len(answers) == len(quiz["questions"]):
             st.session_state.quiz_attempts[quiz_id] += 1
+            if get_student_id():
+                get_progress_store().save_quiz_attempts(get_student_id(), quiz_id, st.session_state.quiz_attempts[quiz_id])
             
-            # Grade quiz
-            correct_count = 0
+            # Grade quiz against the class-wide answer key; item analysis counts each student's first attempt
+            gradebook = get_quiz_gradebooks()[quiz_id]
+            submission = [answers[i] for i in range(len(quiz["questions"]))]
+            student = get_student_id() or get_session_id()
+            results = gradebook.submit(submission, student=student)
+            get_progress_store().save_quiz_submission(
+                student, quiz_id, get_content_store().digest("quizzes.json"), gradebook.pack(submission)
+            )
+            correct_count = int(results.sum())
             total_questions = len(quiz["questions"])
             
             st.markdown("---")
@@ -1024,9 +983,7 @@ def display_quiz(quiz_id: str) -> None:
             
             for i, q in enumerate(quiz["questions"]):
                 if i in answers:
-                    is_correct = answers[i] == q["correct"]
-                    if is_correct:
-                        correct_count += 1
+                    if results[i]:
                         st.success(f"✅ Question {i+1}: Correct!")
                     else:
                         st.error(f"❌ Question {i+1}: Incorrect")
@@ -1046,6 +1003,35 @@ def display_quiz(quiz_id: str) -> None:
                 st.success(f"Good job! Score: {correct_count}/{total_questions} ({score_pct:.0f}%)")
             else:
                 st.warning(f"Keep studying! Score: {correct_count}/{total_questions} ({score_pct:.0f}%)")
+    
+    if is_instructor():
+        display_item_analysis(quiz_id)
+
+def display_item_analysis(quiz_id: str) -> None:
+    """Instructor view of class-wide results for one quiz"""
+    quiz = QUIZ_DATA[quiz_id]
+    gradebook = get_quiz_gradebooks()[quiz_id]
+    stats = gradebook.stats()
+    with st.expander(f"📈 Item analysis ({stats['submissions']} students, first attempts)"):
+        if not stats['submissions']:
+            st.info("No submissions yet.")
+            return
+        st.metric("Average score", f"{stats['mean_score']:.2f}/{stats['items']}")
+        rows = []
+        for item in gradebook.item_analysis():
+            q = quiz["questions"][item['question']]
+            rows.append({
+                'Question': f"{item['question'] + 1}. {q['question']}",
+                '% correct': f"{item['difficulty'] * 100:.0f}%",
+                'Discrimination': "—" if item['discrimination'] is None else f"{item['discrimination']:.2f}",
+                'Choices': " | ".join(
+                    f"{'✅ ' if option == item['correct'] else ''}{q['options'][option][:30]}: {count}"
+                    for option, count in enumerate(item['choices'])
+                )
+            })
+        st.dataframe(rows, hide_index=True)
+        st.caption("Discrimination is the correlation between getting a question right and the rest of the score; "
+                   "values below 0.2 suggest a question that doesn't separate stronger and weaker students.")
 
 def display_resources() -> None:
     """Display enhanced resources page"""
@@ -1074,6 +1060,26 @@ def sidebar_navigation() -> str:
     st.sidebar.markdown("# 📚 PHL 101 Day 1")
     st.sidebar.markdown("**Complete Interactive Philosophy App**")
     
+    # Student identity for saving work across sessions
+    st.sidebar.text_input(
+        "🎓 Your name or student ID",
+        key="student_id",
+        help="Your questions, notes, essays and quiz attempts are saved under this name."
+    )
+    st.sidebar.text_input(
+        "🔑 PIN",
+        type="password",
+        key="student_pin",
+        help="Choose a PIN the first time you use a name, and enter the same PIN to get your work back later."
+    )
+    problem = verify_student()
+    if problem:
+        st.sidebar.warning(problem)
+    elif not get_student_id():
+        st.sidebar.caption("Enter your name and a PIN to save your work if you reconnect.")
+    if get_setting("INSTRUCTOR_PASSWORD"):
+        st.sidebar.text_input("🧑‍🏫 Instructor password", type="password", key="instructor_password")
+    
     # Mode selection
     mode = st.sidebar.radio(
         "Choose Mode:",
@@ -1125,12 +1131,49 @@ def sidebar_navigation() -> str:
     # System status in sidebar
     st.sidebar.markdown("---")
     st.sidebar.markdown("## 🔧 System Status")
-    if ANTHROPIC_API_KEY:
+    if ANTHROPIC_API_KEY and get_circuit_breaker().state() != CLOSED:
+        st.sidebar.warning("📴 Claude API Degraded")
+        st.sidebar.caption("Philosophers are answering from their notes until the service recovers")
+    elif ANTHROPIC_API_KEY:
         st.sidebar.success("✅ Claude API Active")
         st.sidebar.caption("Dynamic philosopher conversations enabled")
     else:
         st.sidebar.error("❌ Claude API Setup Needed")
         st.sidebar.caption("Contact instructor to enable AI features")
+    
+    cache_stats = get_response_cache().stats()
+    st.sidebar.caption(
+        f"💾 Response cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+        f"({cache_stats['size']} stored)"
+    )
+    queue_stats = get_request_scheduler().stats()
+    st.sidebar.caption(
+        f"🚦 API queue: {queue_stats['waiting']} waiting, {queue_stats['granted']} sent, "
+        f"{queue_stats['rate_limited']} rate limits"
+    )
+    usage = get_usage_totals().snapshot()
+    st.sidebar.caption(
+        f"🧠 Prompt cache: {usage['cache_read_input_tokens']:,} tokens read / "
+        f"{usage['cache_creation_input_tokens']:,} written "
+        f"({usage['input_tokens']:,} uncached in, {usage['output_tokens']:,} out)"
+    )
+    budget_stats = get_token_ledger().stats()
+    st.sidebar.caption(
+        f"💰 Token budget window: {budget_stats['input_tokens']:,} in / {budget_stats['output_tokens']:,} out "
+        f"across {budget_stats['students']} students"
+    )
+    flight_stats = get_singleflight().stats()
+    st.sidebar.caption(
+        f"🤝 Coalesced requests: {flight_stats['coalesced']} joined {flight_stats['leaders']} upstream calls"
+    )
+    p50, p95, p99 = (get_philosopher_service().request_latency().quantile(q, outcome="200") for q in (0.5, 0.95, 0.99))
+    if p50 is not None:
+        st.sidebar.caption(f"⏱️ API latency: p50 {p50:.1f}s · p95 {p95:.1f}s · p99 {p99:.1f}s")
+    similar_stats = get_similarity_index().stats()
+    st.sidebar.caption(
+        f"🔎 Paraphrase matches: {similar_stats['hits']} hits / {similar_stats['misses']} misses "
+        f"({similar_stats['size']} indexed)"
+    )
             
     return mode.split()[1].lower()  # Return just the key part
 
@@ -1163,6 +1206,7 @@ def main():
     
     # Determine current mode from sidebar
     current_mode = sidebar_navigation()
+    load_student_work()
     
     if current_mode == "presentation":
         # Main presentation mode with all slides
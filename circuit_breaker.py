@@ -0,0 +1,124 @@
+"""
+Circuit breaker for the Messages API.
+Tracks the outcomes and latencies of recent upstream requests. When too many
+fail or crawl it opens, and callers answer locally at once instead of each
+waiting out a full timeout. After a cool-down a few probe requests are let
+through (half-open); success closes the circuit again, failure re-opens it.
+Only a probe's own result moves a half-open circuit, and results of requests
+let through before the last state change are ignored.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, NamedTuple, Optional, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class Admission(NamedTuple):
+    """A request the breaker let through; hand it back to ``record``"""
+    generation: int
+    probe: bool
+
+
+class CircuitBreaker:
+    """Rolling-window failure/slow-call breaker with half-open probing"""
+
+    def __init__(self, window_seconds: float = 60.0, min_requests: int = 5, failure_ratio: float = 0.5,
+                 slow_call_seconds: float = 15.0, slow_ratio: float = 0.8, consecutive_failures: int = 3,
+                 open_seconds: float = 30.0, half_open_probes: int = 1):
+        self.window_seconds = window_seconds
+        self.min_requests = min_requests
+        self.failure_ratio = failure_ratio
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_ratio = slow_ratio
+        self.consecutive_failures = consecutive_failures
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._streak = 0
+        # Bumped on every state change, so late results from an earlier state are ignored
+        self._generation = 0
+        # (monotonic time, failed, slow) for recent requests
+        self._outcomes: Deque[Tuple[float, bool, bool]] = deque()
+        self._lock = threading.Lock()
+        self._stats = {'opened': 0, 'short_circuited': 0, 'probes': 0}
+
+    def _trim(self, now: float) -> None:
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            self._outcomes.popleft()
+
+    def _enter(self, state: str) -> None:
+        self._state = state
+        self._generation += 1
+        self._probes_in_flight = 0
+
+    def _open(self, now: float) -> None:
+        self._enter(OPEN)
+        self._opened_at = now
+        self._stats['opened'] += 1
+
+    def allow(self) -> Optional[Admission]:
+        """Let a request go upstream now, or None to answer locally"""
+        with self._lock:
+            now = time.monotonic()
+            if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+                self._enter(HALF_OPEN)
+            if self._state == CLOSED:
+                return Admission(self._generation, probe=False)
+            if self._state == HALF_OPEN and self._probes_in_flight < self.half_open_probes:
+                self._probes_in_flight += 1
+                self._stats['probes'] += 1
+                return Admission(self._generation, probe=True)
+            self._stats['short_circuited'] += 1
+            return None
+
+    def record(self, admission: Admission, failed: Optional[bool], latency: float) -> None:
+        """Report a finished request; ``failed=None`` is neutral (e.g. it never left the local queue)"""
+        with self._lock:
+            now = time.monotonic()
+            if admission.generation != self._generation:
+                return
+            if admission.probe:
+                self._probes_in_flight -= 1
+                if failed is None:
+                    return
+                if failed or latency >= self.slow_call_seconds:
+                    self._open(now)
+                else:
+                    self._enter(CLOSED)
+                    self._outcomes.clear()
+                    self._streak = 0
+                return
+            if failed is None:
+                return
+
+            slow = latency >= self.slow_call_seconds
+            self._outcomes.append((now, failed, slow))
+            self._streak = self._streak + 1 if failed else 0
+            self._trim(now)
+            if self._streak >= self.consecutive_failures:
+                self._open(now)
+                return
+            total = len(self._outcomes)
+            if total >= self.min_requests:
+                failures = sum(1 for _, was_failed, _ in self._outcomes if was_failed)
+                slow_calls = sum(1 for _, _, was_slow in self._outcomes if was_slow)
+                if failures / total >= self.failure_ratio or slow_calls / total >= self.slow_ratio:
+                    self._open(now)
+
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, window=len(self._outcomes))
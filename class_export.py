@@ -0,0 +1,101 @@
+"""
+Whole-class Assignment 1 export.
+Students are paged out of the progress store in ID order and each one's
+export document is built only when it is about to be written, so memory
+stays flat however large the class is. Every record carries its student ID
+as a cursor; passing the last cursor seen resumes the export after it.
+
+Run:  python class_export.py --format ndjson --after "last-student" > section.ndjson
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+import zipfile
+from typing import Dict, Iterator, List, Optional
+
+from progress_store import PHILOSOPHERS, ProgressStore
+
+PAGE_SIZE = 200
+
+
+def iter_student_exports(store: ProgressStore, after: str = "", page_size: int = PAGE_SIZE) -> Iterator[Dict]:
+    """Each student's Assignment 1 export document, lazily and in student ID order"""
+    cursor = after
+    while True:
+        page = store.student_ids_after(cursor, page_size)
+        for student_id in page:
+            document = store.load_assignment1(student_id).to_export(PHILOSOPHERS)
+            yield dict(document, student=student_id, cursor=student_id)
+        if len(page) < page_size:
+            return
+        cursor = page[-1]
+
+
+def iter_ndjson(store: ProgressStore, after: str = "") -> Iterator[bytes]:
+    """One JSON line per student"""
+    for document in iter_student_exports(store, after):
+        yield (json.dumps(document, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def archive_name(student_id: str) -> str:
+    """Filesystem-safe, collision-free file name for a student's export"""
+    safe = re.sub(r"[^A-Za-z0-9_.-]+", "_", student_id).strip("._")[:60] or "student"
+    return f"{safe}-{hashlib.sha1(student_id.encode('utf-8')).hexdigest()[:8]}.json"
+
+
+class _ChunkSink:
+    """Write-only, non-seekable file object that hands written bytes back in chunks"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_zip(store: ProgressStore, after: str = "") -> Iterator[bytes]:
+    """A zip archive of per-student JSON files, emitted as it is built"""
+    sink = _ChunkSink()
+    last_cursor: Optional[str] = None
+    count = 0
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for document in iter_student_exports(store, after):
+            archive.writestr(archive_name(document['student']), json.dumps(document, indent=2, ensure_ascii=False))
+            last_cursor = document['cursor']
+            count += 1
+            yield sink.drain()
+        manifest = {'students': count, 'resumed_after': after or None, 'cursor': last_cursor}
+        archive.writestr("manifest.json", json.dumps(manifest, indent=2))
+    yield sink.drain()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export every student's Assignment 1 work")
+    parser.add_argument("--db", default="phl101_progress.db", help="progress database path")
+    parser.add_argument("--format", choices=("ndjson", "zip"), default="ndjson")
+    parser.add_argument("--after", default="", help="resume after this student ID (a previous record's cursor)")
+    parser.add_argument("--output", help="file to write (default: stdout)")
+    args = parser.parse_args()
+
+    store = ProgressStore(args.db)
+    chunks = iter_zip(store, args.after) if args.format == "zip" else iter_ndjson(store, args.after)
+    with (open(args.output, "wb") if args.output else sys.stdout.buffer) as output:
+        for chunk in chunks:
+            output.write(chunk)
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
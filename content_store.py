@@ -0,0 +1,68 @@
+"""
+Course content loaded from the content/ directory.
+Files are parsed once into immutable, process-shared structures and only
+re-read when their modification time changes and their hash differs, so
+instructors can edit content without restarting the server.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Tuple
+
+CONTENT_DIR = Path(__file__).resolve().parent / "content"
+
+
+def freeze(value: Any) -> Any:
+    """Recursively turn dicts into read-only mappings and lists into tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class ContentStore:
+    """mtime/hash-checked cache of parsed content files"""
+
+    def __init__(self, directory: Path = CONTENT_DIR):
+        self.directory = Path(directory)
+        # name -> (mtime_ns, size, sha256, parsed value)
+        self._entries: Dict[str, Tuple[int, int, str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, name: str) -> Tuple[int, int, str, Any]:
+        path = self.directory / name
+        stat = os.stat(path)
+        entry = self._entries.get(name)
+        if entry is not None and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+            return entry
+
+        with self._lock:
+            raw = path.read_bytes()
+            digest = hashlib.sha256(raw).hexdigest()
+            if entry is not None and entry[2] == digest:
+                # Touched but unchanged: keep the already-parsed object
+                value = entry[3]
+            elif name.endswith(".json"):
+                value = freeze(json.loads(raw.decode("utf-8")))
+            else:
+                value = raw.decode("utf-8")
+            entry = (stat.st_mtime_ns, stat.st_size, digest, value)
+            self._entries[name] = entry
+            return entry
+
+    def get(self, name: str) -> Any:
+        """Parsed, read-only content of a file (JSON) or its text (anything else)"""
+        return self._load(name)[3]
+
+    def digest(self, name: str) -> str:
+        """sha256 of a file's current content"""
+        return self._load(name)[2]
+
+    def version(self, names: Iterable[str]) -> str:
+        """Combined digest of several files, for keying derived caches"""
+        return hashlib.sha256("".join(self.digest(name) for name in names).encode("ascii")).hexdigest()[:16]
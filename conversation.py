@@ -0,0 +1,90 @@
+"""
+Bounded context for multi-turn philosopher conversations.
+The most recent turns of a (student, philosopher) thread are replayed
+verbatim; older turns are folded into a short rolling summary as they age
+out, once each. The assembled history is trimmed to a fixed input-token
+budget, so request size stays flat however long the conversation gets.
+"""
+
+import re
+from collections import deque
+from typing import Deque, Dict, List, NamedTuple, Sequence
+
+from token_budget import estimate_tokens
+
+SUMMARY_HEADER = "For context, earlier in our conversation:\n"
+
+
+class Turn(NamedTuple):
+    """One earlier question and answer, as sent to and received from the API"""
+    user_message: str
+    question_type: str
+    question: str
+    answer: str
+
+
+def first_sentence(text: str, limit: int = 200) -> str:
+    text = re.sub(r"[*_#>]+", "", text).strip()
+    match = re.match(r"(.+?[.!?])(\s|$)", text, re.S)
+    sentence = (match.group(1) if match else text).replace("\n", " ")
+    return sentence if len(sentence) <= limit else sentence[:limit].rsplit(" ", 1)[0] + "…"
+
+
+def summarize_turn(turn: Turn) -> str:
+    """One summary line: what was asked and the gist of the answer"""
+    return f"- Asked about {turn.question_type}: \"{turn.question.strip()}\" You said: {first_sentence(turn.answer)}"
+
+
+class ConversationMemory:
+    """Rolling summary plus recent-turn window for one thread"""
+    __slots__ = ("recent_turns", "summary_tokens", "summarized", "_lines")
+
+    def __init__(self, recent_turns: int = 3, summary_tokens: int = 250):
+        self.recent_turns = recent_turns
+        self.summary_tokens = summary_tokens
+        self.summarized = 0
+        self._lines: Deque[str] = deque()
+
+    def _fold(self, turns: Sequence[Turn]) -> None:
+        """Summarize turns that have left the recent window, newest summary lines kept within budget"""
+        if len(turns) < self.summarized:
+            # The thread was replaced (e.g. saved work reloaded); start over
+            self.summarized = 0
+            self._lines.clear()
+        cutoff = max(0, len(turns) - self.recent_turns)
+        for turn in turns[self.summarized:cutoff]:
+            self._lines.append(summarize_turn(turn))
+        self.summarized = max(self.summarized, cutoff)
+        while self._lines and sum(estimate_tokens(line) for line in self._lines) > self.summary_tokens:
+            self._lines.popleft()
+
+    def messages(self, turns: Sequence[Turn], user_message: str, max_input_tokens: int) -> List[Dict]:
+        """Messages API history plus the new question, within ``max_input_tokens``"""
+        self._fold(turns)
+        budget = max_input_tokens - estimate_tokens(user_message)
+
+        recent: List[Turn] = []
+        for turn in reversed(turns[self.summarized:]):
+            cost = estimate_tokens(turn.user_message) + estimate_tokens(turn.answer)
+            if cost > budget:
+                break
+            recent.insert(0, turn)
+            budget -= cost
+
+        # Turns that didn't fit verbatim are still represented by the summary
+        lines = list(self._lines) + [summarize_turn(turn) for turn in turns[self.summarized:len(turns) - len(recent)]]
+        while lines and estimate_tokens(SUMMARY_HEADER + "\n".join(lines) + "\n\n") > budget:
+            lines.pop(0)
+
+        messages: List[Dict] = []
+        for turn in recent:
+            messages.append({"role": "user", "content": turn.user_message})
+            messages.append({"role": "assistant", "content": turn.answer})
+        if lines:
+            preamble = SUMMARY_HEADER + "\n".join(lines) + "\n\n"
+            if messages:
+                messages[0] = dict(messages[0], content=preamble + messages[0]["content"])
+            else:
+                user_message = preamble + user_message
+        messages.append({"role": "user", "content": user_message})
+        return messages
@@ -0,0 +1,158 @@
+"""
+Near-duplicate detection for submitted essays.
+Each document is reduced to word shingles and a fixed-size MinHash
+signature, and the signature's bands are hashed into LSH buckets. A new
+essay is compared only against the documents it shares a bucket with, so
+flagging costs roughly the same however many essays the class has written.
+Philosopher responses are indexed too, so essays that copy an answer are
+caught as well as essays that copy each other.
+"""
+
+import hashlib
+import re
+import threading
+import zlib
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def shingles(text: str, size: int = 5) -> Set[int]:
+    """crc32 hashes of overlapping ``size``-word windows"""
+    words = re.findall(r"[a-z0-9']+", text.lower())
+    if len(words) < size:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))} if words else set()
+    return {zlib.crc32(" ".join(words[i:i + size]).encode("utf-8")) for i in range(len(words) - size + 1)}
+
+
+class Document(NamedTuple):
+    """An indexed essay or philosopher response"""
+    doc_id: str
+    kind: str          # 'essay' or 'response'
+    owner: str         # student ID for essays, philosopher for responses
+    philosopher: str
+    excerpt: str
+
+
+class SimilarPair(NamedTuple):
+    first: Document
+    second: Document
+    similarity: float  # estimated Jaccard similarity of the two shingle sets
+
+
+class EssayIndex:
+    """Incremental MinHash/LSH index with a running list of flagged pairs"""
+
+    def __init__(self, num_perm: int = 128, bands: int = 32, threshold: float = 0.5, shingle_size: int = 5):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+
+        generator = np.random.default_rng(1)
+        self._a = generator.integers(1, int(MERSENNE_PRIME), num_perm, dtype=np.uint64)
+        self._b = generator.integers(0, int(MERSENNE_PRIME), num_perm, dtype=np.uint64)
+
+        self._documents: Dict[str, Document] = {}
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._band_keys: Dict[str, List[bytes]] = {}
+        self._buckets: Dict[bytes, Set[str]] = {}
+        self._pairs: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+        self._stats = {'comparisons': 0}
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        hashed = shingles(text, self.shingle_size)
+        if not hashed:
+            return None
+        values = np.fromiter(hashed, dtype=np.uint64, count=len(hashed))
+        # One row per permutation; the minimum over shingles is that permutation's MinHash
+        permuted = (np.outer(self._a, values) + self._b[:, None]) % MERSENNE_PRIME & MAX_HASH
+        return permuted.min(axis=1)
+
+    def _bands_of(self, signature: np.ndarray) -> List[bytes]:
+        return [
+            band.to_bytes(2, "big") + hashlib.blake2b(signature[band * self.rows:(band + 1) * self.rows].tobytes(),
+                                                      digest_size=8).digest()
+            for band in range(self.bands)
+        ]
+
+    def _related(self, first: Document, second: Document) -> bool:
+        """Pairs worth reporting: not two responses, and not one student's own essays"""
+        if first.kind == 'response' and second.kind == 'response':
+            return False
+        return not (first.kind == second.kind == 'essay' and first.owner == second.owner)
+
+    def _remove(self, doc_id: str) -> None:
+        for key in self._band_keys.pop(doc_id, ()):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(doc_id)
+                if not bucket:
+                    del self._buckets[key]
+        self._signatures.pop(doc_id, None)
+        self._documents.pop(doc_id, None)
+        for pair in [pair for pair in self._pairs if doc_id in pair]:
+            del self._pairs[pair]
+
+    def add(self, document: Document, text: str) -> List[SimilarPair]:
+        """Index (or re-index) a document; returns the pairs it forms above the threshold"""
+        signature = self.signature(text)
+        found = []
+        with self._lock:
+            self._remove(document.doc_id)
+            if signature is None:
+                return found
+            keys = self._bands_of(signature)
+            candidates: Set[str] = set()
+            for key in keys:
+                candidates.update(self._buckets.get(key, ()))
+
+            for other_id in candidates:
+                other = self._documents[other_id]
+                if not self._related(document, other):
+                    continue
+                self._stats['comparisons'] += 1
+                similarity = float(np.mean(self._signatures[other_id] == signature))
+                if similarity >= self.threshold:
+                    self._pairs[tuple(sorted((document.doc_id, other_id)))] = similarity
+                    found.append(SimilarPair(document, other, similarity))
+
+            self._documents[document.doc_id] = document
+            self._signatures[document.doc_id] = signature
+            self._band_keys[document.doc_id] = keys
+            for key in keys:
+                self._buckets.setdefault(key, set()).add(document.doc_id)
+        return found
+
+    def add_essay(self, student_id: str, philosopher: str, text: str) -> List[SimilarPair]:
+        excerpt = " ".join(text.split()[:25])
+        return self.add(Document(f"essay:{student_id}:{philosopher}", 'essay', student_id, philosopher, excerpt), text)
+
+    def add_response(self, philosopher: str, text: str) -> List[SimilarPair]:
+        """Index a philosopher response once per distinct text"""
+        doc_id = "response:" + hashlib.sha1(text.encode("utf-8")).hexdigest()
+        with self._lock:
+            if doc_id in self._documents:
+                return []
+        excerpt = " ".join(text.split()[:25])
+        return self.add(Document(doc_id, 'response', philosopher, philosopher, excerpt), text)
+
+    def flagged(self) -> List[SimilarPair]:
+        """Every pair currently above the threshold, most similar first"""
+        with self._lock:
+            pairs = [SimilarPair(self._documents[a], self._documents[b], similarity)
+                     for (a, b), similarity in self._pairs.items()]
+        return sorted(pairs, key=lambda pair: pair.similarity, reverse=True)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            essays = sum(1 for doc in self._documents.values() if doc.kind == 'essay')
+            return dict(self._stats, essays=essays, responses=len(self._documents) - essays,
+                        flagged=len(self._pairs))
@@ -0,0 +1,127 @@
+"""
+Simulated-classroom load test for the philosopher answer path.
+Many simulated students ask questions through the same PhilosopherService the
+app uses: caches, token budgets, single-flight, the fair scheduler with its
+retries and backoff, and the circuit breaker. Reports throughput, where
+answers came from, upstream status counts and latency percentiles.
+
+Run against the mock server:
+    python mock_anthropic.py --error-429 0.05 &
+    python load_test.py --students 200 --questions 5 --base-url http://127.0.0.1:8765
+"""
+
+import argparse
+import random
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from content_store import ContentStore
+from philosopher_service import PhilosopherService, env_setting
+from pregenerate import plan_questions
+
+QUESTION_TYPES = ["premise", "contradiction", "logic", "fallacy", "absurdity"]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an unsorted list"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def reply_outcome(reply: Dict) -> str:
+    """Label for where an answer came from"""
+    if reply.get('coalesced'):
+        return "coalesced"
+    if reply.get('budget_exhausted'):
+        return "budget_exhausted"
+    return reply['source']
+
+
+def simulate_student(student: int, args, service: PhilosopherService, common: List) -> List[Dict]:
+    """One student asking their questions with think time in between"""
+    session_id = f"student-{student}"
+    philosophers = list(service.content.get("philosophers.json"))
+    results = []
+    for number in range(args.questions):
+        time.sleep(random.uniform(0, args.think_time))
+        if random.random() < args.common_share:
+            philosopher, question_type, question = random.choice(common)
+        else:
+            philosopher = random.choice(philosophers)
+            question_type = QUESTION_TYPES[number % len(QUESTION_TYPES)]
+            question = f"Student {student} asks question {number} about {question_type} in religion?"
+        started = time.monotonic()
+        result = {'ttft': None}
+        if args.stream:
+            reply = {}
+            for _ in service.stream_reply(philosopher, question, question_type, reply, args.api_key, session_id):
+                if result['ttft'] is None:
+                    result['ttft'] = time.monotonic() - started
+        else:
+            reply = service.get_reply(philosopher, question, question_type, args.api_key, session_id)
+        result['latency'] = time.monotonic() - started
+        result['outcome'] = reply_outcome(reply)
+        results.append(result)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Simulate a class of students asking philosopher questions")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8765")
+    parser.add_argument("--api-key", default="mock-key")
+    parser.add_argument("--students", type=int, default=100)
+    parser.add_argument("--questions", type=int, default=5, help="questions per student")
+    parser.add_argument("--think-time", type=float, default=2.0, help="max seconds between a student's questions")
+    parser.add_argument("--common-share", type=float, default=0.5,
+                        help="share of questions drawn from the common questions pregenerate.py prepares")
+    parser.add_argument("--stream", action="store_true", help="stream answers and report time to first token")
+    parser.add_argument("--pool-size", type=int, default=20)
+    parser.add_argument("--rpm", type=float, default=1000, help="scheduler requests-per-minute limit")
+    parser.add_argument("--tpm", type=float, default=1_000_000, help="scheduler tokens-per-minute limit")
+    parser.add_argument("--deadline", type=float, default=30.0)
+    args = parser.parse_args()
+
+    # Anything not given here comes from the environment, with the app's defaults
+    overrides = {
+        "ANTHROPIC_BASE_URL": args.base_url,
+        "ANTHROPIC_POOL_SIZE": args.pool_size,
+        "ANTHROPIC_REQUESTS_PER_MINUTE": args.rpm,
+        "ANTHROPIC_TOKENS_PER_MINUTE": args.tpm,
+        "ANTHROPIC_REQUEST_DEADLINE": args.deadline,
+    }
+
+    def setting(name: str, default=None):
+        return overrides.get(name, env_setting(name, default))
+
+    service = PhilosopherService(ContentStore(), setting)
+    common = plan_questions(service.content.get("philosophers.json"), service.content.get("concepts.json"))
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.students) as executor:
+        batches = executor.map(lambda s: simulate_student(s, args, service, common), range(args.students))
+        results = [result for batch in batches for result in batch]
+    elapsed = time.monotonic() - started
+
+    outcomes = Counter(r['outcome'] for r in results)
+    attempts = service.metrics.counter("philosopher_api_attempts_total", "Upstream Messages API calls by HTTP status")
+    statuses = {dict(labels)['status']: int(count) for labels, count in attempts.values().items()}
+    print(f"Answers: {len(results)} in {elapsed:.1f}s ({len(results) / elapsed:.1f}/s)")
+    print("Sources: " + ", ".join(f"{outcome}={n}" for outcome, n in sorted(outcomes.items())))
+    print("Upstream attempts: " + ", ".join(f"{status}={n}" for status, n in sorted(statuses.items())))
+    print(f"Scheduler: {service.scheduler.stats()}  Circuit: {service.breaker.state()}")
+    api = [r for r in results if r['outcome'] == "api"]
+    for label, values in (("latency", [r['latency'] for r in results]),
+                          ("api latency", [r['latency'] for r in api]),
+                          ("first token", [r['ttft'] for r in api if r['ttft'] is not None])):
+        if values:
+            print(f"{label:>12}: p50={percentile(values, 50):.2f}s  p95={percentile(values, 95):.2f}s  "
+                  f"p99={percentile(values, 99):.2f}s  max={max(values):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+In-process metrics with Prometheus text exposition.
+Counters and fixed-bucket histograms are cheap enough to update on every
+philosopher request; percentiles are estimated from the buckets. Stats that
+already live elsewhere (caches, scheduler, token usage) are pulled in by
+collector callbacks at scrape time rather than being copied on every update.
+"""
+
+import math
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 13.0, 20.0, 30.0, 60.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+Sample = Tuple[str, Dict[str, str], float]                # (name suffix, labels, value)
+Family = Tuple[str, str, str, List[Sample]]               # (name, type, help, samples)
+
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        f'{key}="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for key, value in sorted(labels.items())
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter family keyed by label values; ``name`` should end in _total"""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def values(self) -> Dict[Labels, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def family(self) -> Family:
+        return (self.name, "counter", self.help, [("", dict(key), value) for key, value in self.values().items()])
+
+
+class Histogram:
+    """Fixed-bucket histogram family keyed by label values"""
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # labels -> [per-bucket counts..., sum, count]
+        self._series: Dict[Labels, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _labels(labels)
+        index = next(i for i, bound in enumerate(self.buckets) if value <= bound)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def _merged(self, match: Optional[Dict[str, str]] = None) -> List[float]:
+        wanted = set(_labels(match or {}))
+        merged = [0] * len(self.buckets) + [0.0, 0]
+        with self._lock:
+            for key, series in self._series.items():
+                if wanted <= set(key):
+                    merged = [a + b for a, b in zip(merged, series)]
+        return merged
+
+    def quantile(self, q: float, **labels: str) -> Optional[float]:
+        """Estimate a quantile by linear interpolation inside its bucket (None when empty)"""
+        merged = self._merged(labels)
+        counts, total = merged[:len(self.buckets)], merged[-1]
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, counts):
+            if count and seen + count >= rank:
+                if bound == math.inf:
+                    return lower
+                return lower + (bound - lower) * (rank - seen) / count
+            seen += count
+            lower = bound
+        return lower
+
+    def family(self) -> Family:
+        samples: List[Sample] = []
+        with self._lock:
+            series_items = [(dict(key), list(series)) for key, series in self._series.items()]
+        for labels, series in series_items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                samples.append(("_bucket", dict(labels, le=_format_value(float(bound))), cumulative))
+            samples.append(("_sum", labels, series[-2]))
+            samples.append(("_count", labels, series[-1]))
+        return (self.name, "histogram", self.help, samples)
+
+
+class MetricsRegistry:
+    """Named counters and histograms plus scrape-time collectors"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        with self._lock:
+            return self._metrics.setdefault(name, Counter(name, help_text))
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        with self._lock:
+            return self._metrics.setdefault(name, Histogram(name, help_text, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[Family]]) -> None:
+        """Register a callback returning extra metric families at scrape time"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        families = [metric.family() for metric in list(self._metrics.values())]
+        for collector in self._collectors:
+            families.extend(collector())
+        lines = []
+        for name, metric_type, help_text, samples in families:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for suffix, labels, value in samples:
+                lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def gauges(prefix: str, help_text: str, values: Dict[str, float]) -> List[Family]:
+    """Turn a stats() dict into one gauge family per key"""
+    return [(f"{prefix}_{key}", "gauge", f"{help_text}: {key}", [("", {}, value)]) for key, value in values.items()]
@@ -0,0 +1,257 @@
+"""
+Local stand-in for the Anthropic Messages API, for offline load testing.
+Speaks the same /v1/messages JSON and server-sent-event formats, plus a
+minimal /v1/messages/batches, with configurable latency, token rate and
+401/429/5xx fault injection.
+
+Run:  python mock_anthropic.py --port 8765 --error-429 0.05
+Then point the app at it with ANTHROPIC_BASE_URL=http://127.0.0.1:8765
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
+
+from flask import Flask, Response, jsonify, request
+
+FILLER_WORDS = (
+    "religion society ritual belief spirit concern ultimate solidarity culture reason premise "
+    "logic contradiction fallacy absurdity meaning community sacred symbol faith evidence "
+    "argument conclusion observation tradition existence"
+).split()
+
+
+@dataclass
+class MockConfig:
+    """Behaviour of the stand-in server"""
+    latency_dist: str = "lognormal"     # fixed, uniform, exponential or lognormal
+    latency_ms: float = 800.0           # median (lognormal), mean (exponential) or fixed value
+    latency_spread: float = 0.5         # lognormal sigma, or +/- fraction for uniform
+    tokens_per_second: float = 80.0     # output generation rate
+    output_tokens: int = 250            # answer length, capped by max_tokens
+    error_401: float = 0.0              # probability of each injected failure
+    error_429: float = 0.0
+    error_500: float = 0.0
+    error_529: float = 0.0
+    retry_after: Optional[float] = 2.0  # seconds sent with 429/529, None to omit
+    require_key: bool = False           # reject requests without x-api-key
+
+
+def sample_latency(config: MockConfig) -> float:
+    """Seconds of time-to-first-token for one request"""
+    base = config.latency_ms / 1000.0
+    if config.latency_dist == "fixed":
+        return base
+    if config.latency_dist == "uniform":
+        return random.uniform(base * (1 - config.latency_spread), base * (1 + config.latency_spread))
+    if config.latency_dist == "exponential":
+        return random.expovariate(1.0 / base) if base > 0 else 0.0
+    return random.lognormvariate(0, config.latency_spread) * base
+
+
+def _error(status: int, error_type: str, message: str, retry_after: Optional[float] = None) -> Response:
+    response = jsonify({"type": "error", "error": {"type": error_type, "message": message}})
+    response.status_code = status
+    if retry_after is not None:
+        response.headers["retry-after"] = f"{retry_after:g}"
+    return response
+
+
+def _sse(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _mock_usage(body: Dict, output_tokens: int) -> Dict:
+    system = body.get("system", "")
+    system_text = system if isinstance(system, str) else " ".join(block.get("text", "") for block in system)
+    prompt_text = system_text + " ".join(str(m.get("content", "")) for m in body.get("messages", []))
+    return {
+        "input_tokens": max(1, len(prompt_text) // 4),
+        "output_tokens": output_tokens,
+        "cache_creation_input_tokens": 0,
+        "cache_read_input_tokens": 0
+    }
+
+
+def _mock_message(message_id: str, model: str, words, usage: Dict) -> Dict:
+    return {
+        "id": message_id,
+        "type": "message",
+        "role": "assistant",
+        "model": model,
+        "content": [{"type": "text", "text": " ".join(words)}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": usage
+    }
+
+
+def create_app(config: Optional[MockConfig] = None) -> Flask:
+    """Build the mock Messages API app"""
+    config = config or MockConfig()
+    app = Flask(__name__)
+    stats = Counter()
+    stats_lock = threading.Lock()
+    batches: Dict[str, Dict] = {}
+
+    def count(outcome: str) -> None:
+        with stats_lock:
+            stats[outcome] += 1
+
+    def injected_failure() -> Optional[Response]:
+        roll = random.random()
+        for probability, status, error_type in (
+            (config.error_401, 401, "authentication_error"),
+            (config.error_429, 429, "rate_limit_error"),
+            (config.error_500, 500, "api_error"),
+            (config.error_529, 529, "overloaded_error"),
+        ):
+            if roll < probability:
+                count(str(status))
+                retry_after = config.retry_after if status in (429, 529) else None
+                return _error(status, error_type, f"Injected {status} from mock server", retry_after)
+            roll -= probability
+        return None
+
+    @app.post("/v1/messages")
+    def messages():
+        if config.require_key and not request.headers.get("x-api-key"):
+            count("401")
+            return _error(401, "authentication_error", "x-api-key header is required")
+        failure = injected_failure()
+        if failure is not None:
+            return failure
+
+        body = request.get_json(force=True)
+        model = body.get("model", "mock-model")
+        output_tokens = max(1, min(config.output_tokens, int(body.get("max_tokens", config.output_tokens))))
+        usage = _mock_usage(body, output_tokens)
+        words = [random.choice(FILLER_WORDS) for _ in range(output_tokens)]
+        message_id = f"msg_mock_{uuid.uuid4().hex[:24]}"
+        first_token_delay = sample_latency(config)
+        per_token_delay = 1.0 / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+
+        if body.get("stream"):
+            count("200_stream")
+
+            def generate() -> Iterator[str]:
+                yield _sse("message_start", {"type": "message_start", "message": {
+                    "id": message_id, "type": "message", "role": "assistant", "model": model,
+                    "content": [], "stop_reason": None, "stop_sequence": None,
+                    "usage": dict(usage, output_tokens=1)
+                }})
+                time.sleep(first_token_delay)
+                yield _sse("content_block_start", {"type": "content_block_start", "index": 0,
+                                                   "content_block": {"type": "text", "text": ""}})
+                for i, word in enumerate(words):
+                    yield _sse("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                                       "delta": {"type": "text_delta", "text": word if i == 0 else " " + word}})
+                    time.sleep(per_token_delay)
+                yield _sse("content_block_stop", {"type": "content_block_stop", "index": 0})
+                yield _sse("message_delta", {"type": "message_delta",
+                                             "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                             "usage": {"output_tokens": output_tokens}})
+                yield _sse("message_stop", {"type": "message_stop"})
+
+            return Response(generate(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+        time.sleep(first_token_delay + per_token_delay * output_tokens)
+        count("200")
+        return jsonify(_mock_message(message_id, model, words, usage))
+
+    def batch_status(batch_id: str) -> Dict:
+        batch = batches[batch_id]
+        ended = time.time() >= batch["ready_at"]
+        total = len(batch["requests"])
+        return {
+            "id": batch_id,
+            "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": {"processing": 0 if ended else total, "succeeded": total if ended else 0,
+                               "errored": 0, "canceled": 0, "expired": 0},
+            "results_url": f"{request.host_url}v1/messages/batches/{batch_id}/results" if ended else None
+        }
+
+    @app.post("/v1/messages/batches")
+    def create_batch():
+        failure = injected_failure()
+        if failure is not None:
+            return failure
+        batch_id = f"msgbatch_mock_{uuid.uuid4().hex[:24]}"
+        batches[batch_id] = {"requests": request.get_json(force=True)["requests"],
+                             "ready_at": time.time() + sample_latency(config)}
+        count("batch")
+        return jsonify(batch_status(batch_id))
+
+    @app.get("/v1/messages/batches/<batch_id>")
+    def get_batch(batch_id: str):
+        if batch_id not in batches:
+            return _error(404, "not_found_error", "No such batch")
+        return jsonify(batch_status(batch_id))
+
+    @app.get("/v1/messages/batches/<batch_id>/results")
+    def batch_results(batch_id: str):
+        if batch_id not in batches:
+            return _error(404, "not_found_error", "No such batch")
+
+        def generate() -> Iterator[str]:
+            for item in batches[batch_id]["requests"]:
+                params = item["params"]
+                output_tokens = max(1, min(config.output_tokens, int(params.get("max_tokens", config.output_tokens))))
+                words = [random.choice(FILLER_WORDS) for _ in range(output_tokens)]
+                message = _mock_message(f"msg_mock_{uuid.uuid4().hex[:24]}", params.get("model", "mock-model"),
+                                        words, _mock_usage(params, output_tokens))
+                yield json.dumps({"custom_id": item["custom_id"],
+                                  "result": {"type": "succeeded", "message": message}}) + "\n"
+
+        return Response(generate(), mimetype="application/x-jsonl")
+
+    @app.get("/mock/stats")
+    def mock_stats():
+        with stats_lock:
+            return jsonify(dict(stats))
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local stand-in for the Anthropic Messages API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-dist", choices=["fixed", "uniform", "exponential", "lognormal"], default="lognormal")
+    parser.add_argument("--latency-ms", type=float, default=800.0, help="median/mean time to first token")
+    parser.add_argument("--latency-spread", type=float, default=0.5, help="lognormal sigma or uniform +/- fraction")
+    parser.add_argument("--tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--output-tokens", type=int, default=250)
+    parser.add_argument("--error-401", type=float, default=0.0, help="probability of an injected 401")
+    parser.add_argument("--error-429", type=float, default=0.0, help="probability of an injected 429")
+    parser.add_argument("--error-500", type=float, default=0.0, help="probability of an injected 500")
+    parser.add_argument("--error-529", type=float, default=0.0, help="probability of an injected 529 overload")
+    parser.add_argument("--retry-after", type=float, default=2.0, help="retry-after seconds on 429/529 (negative to omit)")
+    parser.add_argument("--require-key", action="store_true", help="reject requests without x-api-key")
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency_dist=args.latency_dist,
+        latency_ms=args.latency_ms,
+        latency_spread=args.latency_spread,
+        tokens_per_second=args.tokens_per_second,
+        output_tokens=args.output_tokens,
+        error_401=args.error_401,
+        error_429=args.error_429,
+        error_500=args.error_500,
+        error_529=args.error_529,
+        retry_after=args.retry_after if args.retry_after >= 0 else None,
+        require_key=args.require_key
+    )
+    create_app(config).run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
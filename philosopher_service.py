@@ -0,0 +1,478 @@
+"""
+Philosopher answers for every student session, without Streamlit.
+Covers the whole path from a student's question to an answer: the exact,
+prepared and paraphrase caches, per-student token budgets, single-flight
+coalescing of identical questions, the fair scheduler with retries and
+backoff, the circuit breaker and request metrics. The app keeps one service
+per process, and load_test.py drives the same object.
+"""
+
+import os
+import threading
+import time
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+
+import requests
+
+from anthropic_client import AnthropicClient, DEFAULT_BASE_URL, UsageTotals, iter_sse_events
+from circuit_breaker import CLOSED, CircuitBreaker
+from content_store import ContentStore
+from metrics import Family, Histogram, MetricsRegistry, gauges
+from pregenerate import load_pregenerated
+from prompts import (DEFAULT_MAX_TOKENS, DEFAULT_MODEL, PROMPT_CONTENT_FILES, SystemPrompt, build_message_payload,
+                     build_system_prompt_table, compose_offline_answer)
+from request_scheduler import FairScheduler, QueueTimeout, backoff_delay, parse_retry_after
+from response_cache import CacheKey, ResponseCache, make_cache_key
+from semantic_cache import SimilarityIndex
+from singleflight import SingleFlight
+from token_budget import TokenBudget, TokenLedger, estimate_tokens
+
+# Claude request settings
+CLAUDE_MODEL = DEFAULT_MODEL
+MAX_RESPONSE_TOKENS = DEFAULT_MAX_TOKENS
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504, 529}
+
+SERVER_NOT_CONFIGURED_MESSAGE = """🚫 **Server Configuration Issue**
+
+The instructor needs to set up the Anthropic API key on the server.
+Students don't need to worry about this - just let your instructor know!
+
+*This message only appears when the server isn't properly configured.*"""
+
+
+def env_setting(name: str, default=None):
+    """Read an optional setting from the environment"""
+    return os.environ.get(name, default)
+
+
+def estimate_input_tokens(data: Dict) -> int:
+    """Local estimate of a request's input tokens, system prompt included"""
+    return sum(estimate_tokens(block["text"]) for block in data["system"]) + \
+        sum(estimate_tokens(message["content"]) for message in data["messages"])
+
+
+def estimate_request_tokens(data: Dict) -> int:
+    """Rough input + output token count used to reserve tokens-per-minute capacity"""
+    return estimate_input_tokens(data) + data["max_tokens"]
+
+
+def breaker_failure(outcome: str) -> Optional[bool]:
+    """Whether an outcome counts against the API's health; None when it says nothing about it"""
+    if outcome in ("429", "queue_timeout"):
+        return None
+    return outcome in ("timeout", "connection_error", "error") or outcome.startswith("5")
+
+
+def error_outcome(error: Exception) -> str:
+    """Metrics label for a failed API call"""
+    if isinstance(error, QueueTimeout):
+        return "queue_timeout"
+    elif isinstance(error, requests.exceptions.Timeout):
+        return "timeout"
+    elif isinstance(error, requests.exceptions.RequestException):
+        return "connection_error"
+    return "error"
+
+
+def status_error_reply(status_code: int) -> Dict:
+    """Friendly reply for a non-200 API status"""
+    if status_code == 401:
+        return {'text': "🔑 **API Key Issue** - Please contact your instructor to fix the server configuration.", 'source': 'error'}
+    elif status_code == 429:
+        return {'text': "⏰ **Rate Limited** - Too many students are using the system. Please wait a moment and try again.", 'source': 'error'}
+    return {'text': f"🚫 **Server Error** - Status {status_code}. Please try again or contact your instructor.", 'source': 'error'}
+
+
+def exception_error_reply(error: Exception) -> Dict:
+    """Friendly reply for a failed API call"""
+    if isinstance(error, QueueTimeout):
+        return {'text': "🚦 **Very Busy** - Lots of students are asking questions right now. Please try again in a minute.", 'source': 'error'}
+    elif isinstance(error, requests.exceptions.Timeout):
+        return {'text': "⏰ **Timeout** - Claude is taking too long to respond. Please try again.", 'source': 'error'}
+    elif isinstance(error, requests.exceptions.RequestException):
+        return {'text': "🌐 **Connection Error** - Please check your internet connection and try again.", 'source': 'error'}
+    return {'text': "❌ **Unexpected Error** - Something went wrong. Please try again or contact your instructor.", 'source': 'error'}
+
+
+class PhilosopherService:
+    """Caches, budgets, scheduler, breaker and pooled client behind every philosopher answer"""
+
+    def __init__(self, content: ContentStore, setting: Callable[[str, Any], Any] = env_setting):
+        self.content = content
+        self.client = AnthropicClient(
+            base_url=setting("ANTHROPIC_BASE_URL", DEFAULT_BASE_URL),
+            pool_size=int(setting("ANTHROPIC_POOL_SIZE", 20)),
+            connect_timeout=float(setting("ANTHROPIC_CONNECT_TIMEOUT", 5)),
+            read_timeout=float(setting("ANTHROPIC_READ_TIMEOUT", 30))
+        )
+        self.scheduler = FairScheduler(
+            requests_per_minute=float(setting("ANTHROPIC_REQUESTS_PER_MINUTE", 50)),
+            tokens_per_minute=float(setting("ANTHROPIC_TOKENS_PER_MINUTE", 50000)),
+            max_wait=float(setting("SCHEDULER_MAX_WAIT", 120))
+        )
+        self.usage_totals = UsageTotals()
+        self.ledger = TokenLedger(window_seconds=float(setting("TOKEN_BUDGET_WINDOW_SECONDS", 86400)))
+        self.budget = TokenBudget(
+            self.ledger,
+            student_tokens=int(setting("TOKEN_BUDGET_PER_STUDENT", 60000)),
+            class_tokens=int(setting("TOKEN_BUDGET_CLASS", 0)),
+            min_output_tokens=int(setting("TOKEN_BUDGET_MIN_OUTPUT", 120))
+        )
+        self.breaker = CircuitBreaker(
+            window_seconds=float(setting("CIRCUIT_WINDOW_SECONDS", 60)),
+            min_requests=int(setting("CIRCUIT_MIN_REQUESTS", 5)),
+            failure_ratio=float(setting("CIRCUIT_FAILURE_RATIO", 0.5)),
+            slow_call_seconds=float(setting("CIRCUIT_SLOW_CALL_SECONDS", 15)),
+            open_seconds=float(setting("CIRCUIT_OPEN_SECONDS", 30))
+        )
+        self.singleflight = SingleFlight()
+        self.response_cache = ResponseCache(
+            max_entries=int(setting("RESPONSE_CACHE_SIZE", 1000)),
+            ttl_seconds=float(setting("RESPONSE_CACHE_TTL_HOURS", 24)) * 3600,
+            disk_path=setting("RESPONSE_CACHE_PATH", None) or None
+        )
+        self.similarity_index = SimilarityIndex(threshold=float(setting("SEMANTIC_CACHE_THRESHOLD", 0.85)))
+        self.metrics = MetricsRegistry()
+        self.metrics.add_collector(self._collect_metrics)
+
+        self.max_retries = int(setting("ANTHROPIC_MAX_RETRIES", 3))
+        self.request_seconds = float(setting("ANTHROPIC_REQUEST_DEADLINE", 30))
+        self.prepared_path = setting("PREGENERATED_ANSWERS_PATH", "pregenerated_answers.jsonl")
+        # name -> (prompt version, value) for things rebuilt when the profiles or concepts change
+        self._versioned: Dict[str, Tuple[str, Any]] = {}
+        self._versioned_lock = threading.Lock()
+
+    def _collect_metrics(self) -> List[Family]:
+        """Cache, queue and token stats read from their owners at scrape time"""
+        usage = self.usage_totals.snapshot()
+        families = [("philosopher_api_tokens_total", "counter", "Tokens reported by the Messages API",
+                     [("", {'kind': kind}, count) for kind, count in usage.items()])]
+        families += gauges("philosopher_response_cache", "Exact-match response cache", self.response_cache.stats())
+        families += gauges("philosopher_similarity_cache", "Paraphrase response cache", self.similarity_index.stats())
+        families += gauges("philosopher_scheduler", "Fair API request scheduler", self.scheduler.stats())
+        families += gauges("philosopher_singleflight", "Coalesced identical requests", self.singleflight.stats())
+        families += gauges("philosopher_token_budget", "Token usage in the current budget window", self.ledger.stats())
+        families += gauges("philosopher_circuit", "API circuit breaker",
+                           dict(self.breaker.stats(), open=int(self.breaker.state() != CLOSED)))
+        return families
+
+    def request_latency(self) -> Histogram:
+        return self.metrics.histogram("philosopher_request_seconds",
+                                      "Philosopher API request latency including queueing and retries")
+
+    def observe_api_request(self, outcome: str, started: float, mode: str, timing: Dict) -> Tuple[Optional[bool], float]:
+        """Record one philosopher API request's end-to-end latency and outcome; returns the breaker verdict"""
+        self.request_latency().observe(time.monotonic() - started, outcome=outcome, mode=mode)
+        self.metrics.counter("philosopher_requests_total", "Philosopher API requests by outcome") \
+            .inc(outcome=outcome, mode=mode)
+        # The breaker judges the API alone: local queueing and retry sleeps are not its slowness
+        upstream_started = timing.get('upstream_started')
+        if upstream_started is None:
+            return None, 0.0
+        return breaker_failure(outcome), timing.get('upstream_latency', time.monotonic() - upstream_started)
+
+    def prompt_version(self) -> str:
+        """Digest of the content files the prompts are built from; keys every cached answer"""
+        return self.content.version(PROMPT_CONTENT_FILES)
+
+    def _for_version(self, name: str, build: Callable[[str], Any]) -> Any:
+        """``build(prompt_version)``, rebuilt only when the prompt version changes"""
+        version = self.prompt_version()
+        with self._versioned_lock:
+            entry = self._versioned.get(name)
+            if entry is None or entry[0] != version:
+                entry = self._versioned[name] = (version, build(version))
+            return entry[1]
+
+    def system_prompts(self) -> Mapping[Tuple[str, str], SystemPrompt]:
+        """All 15 (philosopher, question_type) system prompts, rebuilt only when the profiles or concepts change"""
+        return self._for_version("system_prompts", lambda version: build_system_prompt_table(
+            self.content.get("philosophers.json"), self.content.get("concepts.json")))
+
+    def prepared_answers(self) -> Mapping[CacheKey, str]:
+        """Answers written by pregenerate.py for the current prompts, also indexed for paraphrase matching"""
+        return self._for_version("prepared_answers", self._load_prepared_answers)
+
+    def _load_prepared_answers(self, prompt_version: str) -> Mapping[CacheKey, str]:
+        answers = {}
+        for record in load_pregenerated(self.prepared_path, CLAUDE_MODEL, MAX_RESPONSE_TOKENS, prompt_version):
+            philosopher, question_type, question = record["philosopher"], record["question_type"], record["question"]
+            answers[make_cache_key(philosopher, question_type, question, CLAUDE_MODEL, MAX_RESPONSE_TOKENS,
+                                   prompt_version)] = record["response"]
+            self.similarity_index.add(philosopher, question_type, question, record["response"], prompt_version)
+        return MappingProxyType(answers)
+
+    def lookup_cached_reply(self, philosopher_name: str, question: str, question_type: str) -> Optional[Dict]:
+        """Return a reply from the exact or paraphrase cache, or None"""
+        prompt_version = self.prompt_version()
+        cache_key = make_cache_key(philosopher_name, question_type, question, CLAUDE_MODEL, MAX_RESPONSE_TOKENS,
+                                   prompt_version)
+        cached_response = self.response_cache.get(cache_key)
+        if cached_response is not None:
+            return {'text': cached_response, 'source': 'cache'}
+
+        prepared_response = self.prepared_answers().get(cache_key)
+        if prepared_response is not None:
+            return {'text': prepared_response, 'source': 'prepared'}
+
+        similar = self.similarity_index.lookup(philosopher_name, question_type, question, prompt_version)
+        if similar is not None:
+            return {
+                'text': similar['response'],
+                'source': 'similar',
+                'similarity': similar['similarity'],
+                'matched_question': similar['matched_question']
+            }
+        return None
+
+    def store_reply(self, cache_key: CacheKey, question: str, response_text: str) -> None:
+        """Save a fresh full-length API answer to the shared caches, under the prompt version in its key"""
+        philosopher_name, question_type, prompt_version = cache_key[0], cache_key[1], cache_key[-1]
+        self.response_cache.put(cache_key, response_text)
+        self.similarity_index.add(philosopher_name, question_type, question, response_text, prompt_version)
+
+    def build_request(self, philosopher_name: str, question: str, question_type: str,
+                      messages: Optional[List[Dict]] = None) -> Dict:
+        """Build the Messages API payload for one student question, or for a conversation ending in it"""
+        system_prompt = self.system_prompts()[(philosopher_name, question_type)]
+        profile = self.content.get("philosophers.json")[philosopher_name]
+        return build_message_payload(system_prompt, profile, question_type, question,
+                                     CLAUDE_MODEL, MAX_RESPONSE_TOKENS, messages=messages)
+
+    def budgeted_request(self, philosopher_name: str, question: str, question_type: str, session_id: str,
+                         messages: Optional[List[Dict]] = None) -> Optional[Dict]:
+        """The asker's Messages API payload, with ``max_tokens`` fitted to their budget; None when it's used up"""
+        data = self.build_request(philosopher_name, question, question_type, messages)
+        max_tokens = self.budget.max_tokens_for(session_id, data["max_tokens"], estimate_input_tokens(data))
+        data["max_tokens"] = max_tokens
+        return data if max_tokens > 0 else None
+
+    def shared_request_key(self, philosopher_name: str, question: str, question_type: str, data: Dict,
+                           messages: Optional[List[Dict]]) -> Optional[CacheKey]:
+        """Key for sharing a request with classmates through single-flight and the caches, or None if it is the asker's own"""
+        # Follow-ups depend on the thread and shortened answers on the asker's budget
+        if messages is not None or data["max_tokens"] < MAX_RESPONSE_TOKENS:
+            return None
+        return make_cache_key(philosopher_name, question_type, question, CLAUDE_MODEL, data["max_tokens"],
+                              self.prompt_version())
+
+    def record_usage(self, requester: str, philosopher_name: str, question_type: str, usage: Dict) -> None:
+        """Add a response's reported usage to the process totals and the budget ledger"""
+        self.usage_totals.record(usage)
+        self.ledger.record(requester, philosopher_name, question_type, usage)
+
+    def send_to_api(self, api_key: str, data: Dict, session_id: str, on_queue=None, stream: bool = False,
+                    timing: Optional[Dict] = None) -> requests.Response:
+        """Wait for a fair scheduler slot, then call the API, retrying rate limits and overloads with jittered backoff"""
+        # ``timing`` gets when the last attempt left the queue and how long the API took to answer it
+        for attempt in range(self.max_retries + 1):
+            queued = time.monotonic()
+            self.scheduler.acquire(session_id, estimate_request_tokens(data), on_wait=on_queue)
+            self.metrics.histogram("philosopher_queue_wait_seconds", "Time spent waiting for a scheduler slot") \
+                .observe(time.monotonic() - queued)
+            deadline = time.monotonic() + self.request_seconds
+            upstream_started = time.monotonic()
+            if timing is not None:
+                timing.pop('upstream_latency', None)
+                timing['upstream_started'] = upstream_started
+            if stream:
+                response = self.client.open_stream(api_key, data, deadline=deadline)
+            else:
+                response = self.client.create_message(api_key, data, deadline=deadline)
+            if timing is not None:
+                timing['upstream_latency'] = time.monotonic() - upstream_started
+            self.metrics.counter("philosopher_api_attempts_total", "Upstream Messages API calls by HTTP status") \
+                .inc(status=str(response.status_code))
+
+            if response.status_code not in RETRYABLE_STATUS_CODES or attempt == self.max_retries:
+                return response
+
+            retry_after = parse_retry_after(response.headers.get("retry-after"))
+            response.close()
+            if response.status_code == 429:
+                self.scheduler.pause_for(retry_after if retry_after is not None else backoff_delay(attempt))
+            time.sleep(backoff_delay(attempt, retry_after=retry_after))
+        return response
+
+    def offline_reply(self, philosopher_name: str, question: str, question_type: str) -> Dict:
+        """Instant in-character answer composed from the philosopher's profile while the circuit is open"""
+        self.metrics.counter("philosopher_offline_replies_total",
+                             "Answers composed locally while the API circuit was open").inc()
+        profile = self.content.get("philosophers.json")[philosopher_name]
+        return {'text': compose_offline_answer(profile, question_type, question), 'source': 'offline'}
+
+    def budget_reply(self, philosopher_name: str, question: str, question_type: str) -> Dict:
+        """In-character answer from the profile once the token budget can't fit an API answer"""
+        self.metrics.counter("philosopher_budget_replies_total",
+                             "Answers composed locally because a token budget ran out").inc()
+        profile = self.content.get("philosophers.json")[philosopher_name]
+        return {'text': compose_offline_answer(profile, question_type, question), 'source': 'offline',
+                'budget_exhausted': True}
+
+    def fetch_reply(self, philosopher_name: str, question: str, question_type: str, data: Dict, api_key: str,
+                    session_id: str, on_queue=None, shared_key: Optional[CacheKey] = None) -> Dict:
+        """Ask the Messages API for a fresh answer; one with a ``shared_key`` is stored in the caches"""
+        admission = self.breaker.allow()
+        if admission is None:
+            return self.offline_reply(philosopher_name, question, question_type)
+        started = time.monotonic()
+        # Neutral unless an outcome arrives, so an abandoned half-open probe still frees its slot
+        verdict: Tuple[Optional[bool], float] = (None, 0.0)
+        timing = {}
+
+        try:
+            response = self.send_to_api(api_key, data, session_id, on_queue=on_queue, timing=timing)
+            verdict = self.observe_api_request(str(response.status_code), started, mode="json", timing=timing)
+
+            if response.status_code == 200:
+                response_data = response.json()
+                response_text = response_data["content"][0]["text"]
+                usage = response_data.get("usage", {})
+                self.record_usage(session_id, philosopher_name, question_type, usage)
+                if shared_key is not None:
+                    self.store_reply(shared_key, question, response_text)
+                return {'text': response_text, 'source': 'api', 'usage': usage, 'max_tokens': data["max_tokens"]}
+            return status_error_reply(response.status_code)
+
+        except Exception as e:
+            verdict = self.observe_api_request(error_outcome(e), started, mode="json", timing=timing)
+            return exception_error_reply(e)
+        finally:
+            self.breaker.record(admission, *verdict)
+
+    def get_reply(self, philosopher_name: str, question: str, question_type: str, api_key: Optional[str],
+                  session_id: str = "shared", on_queue=None, messages: Optional[List[Dict]] = None) -> Dict:
+        """Answer a student question; 'source' is api, cache (exact repeat), similar (paraphrase) or error"""
+        # Serve repeated and paraphrased questions from the shared caches (not follow-ups, which depend on the thread)
+        if messages is None:
+            cached_reply = self.lookup_cached_reply(philosopher_name, question, question_type)
+            if cached_reply is not None:
+                return cached_reply
+
+        if not api_key:
+            return {'text': SERVER_NOT_CONFIGURED_MESSAGE, 'source': 'error'}
+
+        # Budgets are the asker's own, so they are applied before an answer can be shared
+        data = self.budgeted_request(philosopher_name, question, question_type, session_id, messages)
+        if data is None:
+            return self.budget_reply(philosopher_name, question, question_type)
+        shared_key = self.shared_request_key(philosopher_name, question, question_type, data, messages)
+        if shared_key is None:
+            return self.fetch_reply(philosopher_name, question, question_type, data, api_key, session_id, on_queue)
+
+        # Share the API call with identical questions already in flight
+        reply, coalesced = self.singleflight.do(
+            shared_key,
+            lambda: self.fetch_reply(philosopher_name, question, question_type, data, api_key, session_id,
+                                     on_queue, shared_key)
+        )
+        return dict(reply, coalesced=True) if coalesced else reply
+
+    def stream_api_reply(self, philosopher_name: str, question: str, question_type: str, reply: Dict, data: Dict,
+                         api_key: str, session_id: str, on_queue=None,
+                         shared_key: Optional[CacheKey] = None) -> Iterator[str]:
+        """Stream a fresh answer from the Messages API, filling ``reply`` when done"""
+        admission = self.breaker.allow()
+        if admission is None:
+            reply.update(self.offline_reply(philosopher_name, question, question_type))
+            yield reply['text']
+            return
+        chunks = []
+        started = time.monotonic()
+        # Neutral unless an outcome arrives (e.g. the stream is abandoned by a rerun)
+        verdict: Tuple[Optional[bool], float] = (None, 0.0)
+        timing = {}
+
+        try:
+            response = self.send_to_api(api_key, data, session_id, on_queue=on_queue, stream=True, timing=timing)
+            deadline = time.monotonic() + self.request_seconds
+            if response.status_code != 200:
+                response.close()
+                verdict = self.observe_api_request(str(response.status_code), started, mode="stream", timing=timing)
+                reply.update(status_error_reply(response.status_code))
+                yield reply['text']
+                return
+
+            usage = {}
+            for event, payload in iter_sse_events(response, deadline=deadline):
+                if event == "content_block_delta" and payload["delta"].get("type") == "text_delta":
+                    if not chunks:
+                        self.metrics.histogram("philosopher_first_token_seconds", "Time to the first streamed token") \
+                            .observe(time.monotonic() - started)
+                        # For streams the breaker judges time to first token, not the length of the answer
+                        timing['upstream_latency'] = time.monotonic() - timing['upstream_started']
+                    chunks.append(payload["delta"]["text"])
+                    yield payload["delta"]["text"]
+                elif event == "message_start":
+                    usage.update(payload["message"].get("usage", {}))
+                elif event == "message_delta":
+                    usage.update(payload.get("usage", {}))
+                elif event == "error":
+                    raise requests.exceptions.RequestException(payload.get("error", {}).get("message", "stream error"))
+
+            response_text = "".join(chunks)
+            verdict = self.observe_api_request("200", started, mode="stream", timing=timing)
+            self.record_usage(session_id, philosopher_name, question_type, usage)
+            if shared_key is not None:
+                self.store_reply(shared_key, question, response_text)
+            reply.update({'text': response_text, 'source': 'api', 'usage': usage, 'max_tokens': data["max_tokens"]})
+
+        except Exception as e:
+            verdict = self.observe_api_request(error_outcome(e), started, mode="stream", timing=timing)
+            error_reply = exception_error_reply(e)
+            separator = "\n\n" if chunks else ""
+            reply.update({'text': "".join(chunks) + separator + error_reply['text'], 'source': 'error'})
+            yield separator + error_reply['text']
+        finally:
+            self.breaker.record(admission, *verdict)
+
+    def stream_reply(self, philosopher_name: str, question: str, question_type: str, reply: Dict,
+                     api_key: Optional[str], session_id: str = "shared", on_queue=None,
+                     messages: Optional[List[Dict]] = None) -> Iterator[str]:
+        """Yield the answer as it is generated; fills ``reply`` with the final text and source"""
+        if messages is None:
+            cached_reply = self.lookup_cached_reply(philosopher_name, question, question_type)
+            if cached_reply is not None:
+                reply.update(cached_reply)
+                yield cached_reply['text']
+                return
+
+        if not api_key:
+            reply.update({'text': SERVER_NOT_CONFIGURED_MESSAGE, 'source': 'error'})
+            yield SERVER_NOT_CONFIGURED_MESSAGE
+            return
+
+        # Budgets are the asker's own, so they are applied before an answer can be shared
+        data = self.budgeted_request(philosopher_name, question, question_type, session_id, messages)
+        if data is None:
+            reply.update(self.budget_reply(philosopher_name, question, question_type))
+            yield reply['text']
+            return
+
+        # Follow-ups and shortened answers are this student's alone, so there is nothing to share
+        shared_key = self.shared_request_key(philosopher_name, question, question_type, data, messages)
+        if shared_key is None:
+            try:
+                yield from self.stream_api_reply(philosopher_name, question, question_type, reply, data, api_key,
+                                                 session_id, on_queue)
+            finally:
+                if 'source' not in reply:
+                    reply.update(exception_error_reply(RuntimeError("stream ended early")))
+            return
+
+        # Wait on an identical in-flight request instead of sending another one
+        future, leader = self.singleflight.join(shared_key)
+        if not leader:
+            reply.update(future.result(), coalesced=True)
+            yield reply['text']
+            return
+
+        try:
+            yield from self.stream_api_reply(philosopher_name, question, question_type, reply, data, api_key,
+                                             session_id, on_queue, shared_key)
+        finally:
+            if 'source' not in reply:
+                reply.update(exception_error_reply(RuntimeError("stream ended early")))
+            self.singleflight.complete(shared_key, future, result=dict(reply))
@@ -0,0 +1,274 @@
+"""
+Offline pre-generation of philosopher answers.
+Builds a set of canonical questions for every (philosopher, question_type)
+from the profiles and concepts in content/, answers them ahead of class and
+appends each answer to a JSONL file as soon as it arrives. Re-running skips
+everything already answered, so an interrupted job resumes where it stopped.
+The app loads the file at startup and serves matching questions locally.
+
+Run against the mock server:
+    python mock_anthropic.py --latency-ms 200 &
+    python pregenerate.py --base-url http://127.0.0.1:8765 --api-key mock-key
+    python pregenerate.py --batch --base-url http://127.0.0.1:8765 --api-key mock-key
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Mapping, Set, Tuple
+
+import requests
+
+from anthropic_client import AnthropicClient, DEFAULT_BASE_URL
+from content_store import ContentStore
+from prompts import (DEFAULT_MAX_TOKENS, DEFAULT_MODEL, PROMPT_CONTENT_FILES, build_message_payload,
+                     build_system_prompt_table)
+from request_scheduler import FairScheduler, backoff_delay, parse_retry_after
+from response_cache import normalize_question
+
+DEFAULT_OUTPUT = "pregenerated_answers.jsonl"
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504, 529}
+
+# Questions students tend to ask about any thinker, per question type
+GENERAL_TEMPLATES = (
+    "What do you mean by {question_type}?",
+    "How do you think about {question_type} when studying religion?",
+    "How does {question_type} apply to your definition of religion?",
+)
+
+# Questions about one of the philosopher's key ideas, per question type
+IDEA_TEMPLATES = {
+    "premise": "What premises support your idea that {idea}?",
+    "contradiction": "Is there a contradiction in your idea that {idea}?",
+    "logic": "Is your idea that {idea} based on deductive or inductive logic?",
+    "fallacy": "Does your idea that {idea} commit a fallacy?",
+    "absurdity": "Does your idea that {idea} lead to any absurd conclusions?",
+}
+
+Question = Tuple[str, str, str]  # (philosopher, question_type, question)
+
+
+def canonical_questions(profile: Mapping, question_type: str) -> List[str]:
+    """Likely student questions for one philosopher and question type"""
+    questions = [template.format(question_type=question_type) for template in GENERAL_TEMPLATES]
+    template = IDEA_TEMPLATES.get(question_type)
+    if template:
+        for idea in profile.get("key_ideas", ()):
+            idea = idea.strip().rstrip(".")
+            questions.append(template.format(idea=idea[0].lower() + idea[1:]))
+    return questions
+
+
+def plan_questions(profiles: Mapping, concepts: Mapping) -> List[Question]:
+    """Every canonical (philosopher, question_type, question), without normalized duplicates"""
+    plan, seen = [], set()
+    for philosopher, profile in profiles.items():
+        for question_type in concepts:
+            for question in canonical_questions(profile, question_type):
+                key = (philosopher, question_type, normalize_question(question))
+                if key not in seen:
+                    seen.add(key)
+                    plan.append((philosopher, question_type, question))
+    return plan
+
+
+def answer_key(philosopher: str, question_type: str, question: str, model: str, max_tokens: int,
+               prompt_version: str) -> str:
+    """Stable identity of one answer, also usable as a batch custom_id"""
+    raw = "\x1f".join((philosopher, question_type, normalize_question(question), model, str(max_tokens), prompt_version))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def read_answers(path: str) -> Iterator[Dict]:
+    """Records in an answers file, skipping a torn final line from an interrupted run"""
+    if not os.path.exists(path):
+        return
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def load_pregenerated(path: str, model: str, max_tokens: int, prompt_version: str) -> List[Dict]:
+    """Answers generated for this model, answer length and version of the prompts"""
+    return [
+        record for record in read_answers(path)
+        if record.get("model") == model and record.get("max_tokens") == max_tokens
+        and record.get("prompt_version") == prompt_version
+    ]
+
+
+class AnswerWriter:
+    """Thread-safe appender that makes every answer durable as soon as it arrives"""
+
+    def __init__(self, path: str):
+        self._handle = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def write(self, record: Dict) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._handle.write(line)
+            self._handle.flush()
+
+    def close(self) -> None:
+        self._handle.close()
+
+
+class Pregenerator:
+    """Answers a question plan with bounded concurrency or as one Message Batches job"""
+
+    def __init__(self, args, client: AnthropicClient, prompts: Mapping, profiles: Mapping, prompt_version: str):
+        self.args = args
+        self.client = client
+        self.prompts = prompts
+        self.profiles = profiles
+        self.prompt_version = prompt_version
+
+    def key(self, item: Question) -> str:
+        return answer_key(*item, self.args.model, self.args.max_tokens, self.prompt_version)
+
+    def payload(self, item: Question) -> Dict:
+        philosopher, question_type, question = item
+        return build_message_payload(self.prompts[(philosopher, question_type)], self.profiles[philosopher],
+                                     question_type, question, self.args.model, self.args.max_tokens)
+
+    def record(self, item: Question, message: Dict) -> Dict:
+        philosopher, question_type, question = item
+        return {
+            "key": self.key(item),
+            "philosopher": philosopher,
+            "question_type": question_type,
+            "question": question,
+            "response": message["content"][0]["text"],
+            "model": self.args.model,
+            "max_tokens": self.args.max_tokens,
+            "prompt_version": self.prompt_version,
+            "usage": message.get("usage", {}),
+            "created_at": time.time()
+        }
+
+    def answer_one(self, item: Question, scheduler: FairScheduler) -> Dict:
+        """One question with rate limiting and retries; raises on a final failure"""
+        payload = self.payload(item)
+        estimate = len(json.dumps(payload)) // 4 + self.args.max_tokens
+        for attempt in range(self.args.max_retries + 1):
+            scheduler.acquire("pregenerate", estimate)
+            response = self.client.create_message(self.args.api_key, payload, deadline=time.monotonic() + 120)
+            if response.status_code == 200:
+                return self.record(item, response.json())
+            if response.status_code not in RETRYABLE_STATUS_CODES or attempt == self.args.max_retries:
+                raise RuntimeError(f"status {response.status_code}: {response.text[:200]}")
+            retry_after = parse_retry_after(response.headers.get("retry-after"))
+            if response.status_code == 429:
+                scheduler.pause_for(retry_after if retry_after is not None else backoff_delay(attempt))
+            time.sleep(backoff_delay(attempt, retry_after=retry_after))
+        raise RuntimeError("retries exhausted")
+
+    def run_concurrent(self, pending: List[Question], writer: AnswerWriter) -> int:
+        scheduler = FairScheduler(requests_per_minute=self.args.rpm, tokens_per_minute=self.args.tpm, max_wait=600)
+        done = 0
+        with ThreadPoolExecutor(max_workers=self.args.concurrency) as executor:
+            futures = {executor.submit(self.answer_one, item, scheduler): item for item in pending}
+            for future in as_completed(futures):
+                item = futures[future]
+                try:
+                    writer.write(future.result())
+                    done += 1
+                    print(f"[{done}/{len(pending)}] {item[0]} / {item[1]}: {item[2]}")
+                except (RuntimeError, requests.exceptions.RequestException) as error:
+                    print(f"FAILED {item[0]} / {item[1]}: {item[2]} ({error}) - will retry on the next run")
+        return done
+
+    def run_batch(self, pending: List[Question], writer: AnswerWriter, state_path: str) -> int:
+        """Submit (or resume) one Message Batches job and collect its results"""
+        by_key = {self.key(item): item for item in pending}
+        state = json.load(open(state_path)) if os.path.exists(state_path) else None
+        if state is None:
+            response = self.client.create_batch(self.args.api_key, [
+                {"custom_id": key, "params": self.payload(item)} for key, item in by_key.items()
+            ])
+            response.raise_for_status()
+            state = {"batch_id": response.json()["id"]}
+            with open(state_path, "w") as handle:
+                json.dump(state, handle)
+            print(f"Submitted batch {state['batch_id']} with {len(by_key)} questions")
+        else:
+            print(f"Resuming batch {state['batch_id']}")
+
+        while True:
+            response = self.client.get_batch(self.args.api_key, state["batch_id"])
+            response.raise_for_status()
+            batch = response.json()
+            if batch["processing_status"] == "ended":
+                break
+            print(f"Batch {batch['processing_status']}: {batch.get('request_counts', {})}")
+            time.sleep(self.args.poll_interval)
+
+        done = 0
+        for result in self.client.iter_batch_results(self.args.api_key, batch["results_url"]):
+            item = by_key.get(result["custom_id"])
+            if item is None:
+                continue  # answered by an earlier run
+            if result["result"]["type"] == "succeeded":
+                writer.write(self.record(item, result["result"]["message"]))
+                done += 1
+            else:
+                print(f"FAILED {item[0]} / {item[1]}: {item[2]} ({result['result']['type']})")
+        os.remove(state_path)
+        return done
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Answer canonical Assignment 1 questions before class")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="answers file, appended to and resumed from")
+    parser.add_argument("--base-url", default=os.environ.get("ANTHROPIC_BASE_URL", DEFAULT_BASE_URL))
+    parser.add_argument("--api-key", default=os.environ.get("ANTHROPIC_API_KEY"))
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="must match the app's model to be used")
+    parser.add_argument("--max-tokens", type=int, default=DEFAULT_MAX_TOKENS, help="must match the app's answer length")
+    parser.add_argument("--concurrency", type=int, default=4, help="requests in flight at once")
+    parser.add_argument("--rpm", type=float, default=50, help="requests-per-minute limit")
+    parser.add_argument("--tpm", type=float, default=50000, help="tokens-per-minute limit")
+    parser.add_argument("--max-retries", type=int, default=3)
+    parser.add_argument("--batch", action="store_true", help="submit one Message Batches job instead of live requests")
+    parser.add_argument("--poll-interval", type=float, default=30.0, help="seconds between batch status checks")
+    parser.add_argument("--dry-run", action="store_true", help="list the questions that still need answers")
+    args = parser.parse_args()
+
+    content = ContentStore()
+    profiles, concepts = content.get("philosophers.json"), content.get("concepts.json")
+    prompt_version = content.version(PROMPT_CONTENT_FILES)
+    plan = plan_questions(profiles, concepts)
+
+    answered: Set[str] = {record.get("key") for record in read_answers(args.output)}
+    pregenerator = Pregenerator(args, None, build_system_prompt_table(profiles, concepts), profiles, prompt_version)
+    pending = [item for item in plan if pregenerator.key(item) not in answered]
+    print(f"{len(plan)} canonical questions, {len(plan) - len(pending)} already answered, {len(pending)} to go")
+    if args.dry_run or not pending:
+        for item in pending if args.dry_run else ():
+            print(" / ".join(item))
+        return
+    if not args.api_key:
+        parser.error("an API key is required (--api-key or ANTHROPIC_API_KEY)")
+
+    pregenerator.client = AnthropicClient(base_url=args.base_url, pool_size=args.concurrency)
+    writer = AnswerWriter(args.output)
+    try:
+        if args.batch:
+            done = pregenerator.run_batch(pending, writer, args.output + ".batch.json")
+        else:
+            done = pregenerator.run_concurrent(pending, writer)
+    finally:
+        writer.close()
+        pregenerator.client.close()
+    print(f"Answered {done} of {len(pending)}; {len(pending) - done} left for the next run")
+
+
+if __name__ == "__main__":
+    main()
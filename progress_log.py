@@ -0,0 +1,136 @@
+"""
+Compact append-only log of a student's Assignment 1 work.
+Each question/answer pair is stored once as a slotted record with small
+integer codes for philosopher, question type and source and an integer
+timestamp. Counts, per-philosopher views and the export document are derived
+from the log on demand.
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+class CodeTable:
+    """Process-wide interning of short labels to small integer codes"""
+
+    def __init__(self, labels: Sequence[str]):
+        self.labels: List[str] = []
+        self._codes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        for label in labels:
+            self.code(label)
+
+    def code(self, label: str) -> int:
+        code = self._codes.get(label)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(label)
+                if code is None:
+                    code = len(self.labels)
+                    self.labels.append(label)
+                    self._codes[label] = code
+        return code
+
+    def label(self, code: int) -> str:
+        return self.labels[code]
+
+
+PHILOSOPHER_CODES = CodeTable(("Durkheim", "Tylor", "Tillich"))
+QUESTION_TYPE_CODES = CodeTable(("premise", "contradiction", "logic", "fallacy", "absurdity"))
+SOURCE_CODES = CodeTable(("api", "cache", "similar", "error", "prepared", "offline"))
+
+
+class Exchange:
+    """One question and its answer"""
+    __slots__ = ("philosopher", "question_type", "source", "timestamp", "question", "response")
+
+    def __init__(self, philosopher: int, question_type: int, source: int, timestamp: int, question: str, response: str):
+        self.philosopher = philosopher
+        self.question_type = question_type
+        self.source = source
+        self.timestamp = timestamp
+        self.question = question
+        self.response = response
+
+    def to_dict(self) -> Dict:
+        return {
+            'type': QUESTION_TYPE_CODES.label(self.question_type),
+            'question': self.question,
+            'response': self.response,
+            'source': SOURCE_CODES.label(self.source),
+            'timestamp': datetime.fromtimestamp(self.timestamp).isoformat()
+        }
+
+
+class ProgressLog:
+    """A student's Assignment 1 exchanges, notes, essays and completions"""
+    __slots__ = ("exchanges", "notes", "essays", "completed")
+
+    def __init__(self):
+        self.exchanges: List[Exchange] = []
+        self.notes: Dict[str, str] = {}
+        self.essays: Dict[str, str] = {}
+        self.completed = 0  # bitmask of philosopher codes with a submitted essay
+
+    def append(self, philosopher: str, question_type: str, question: str, response: str,
+               source: str, timestamp: Optional[float] = None) -> Exchange:
+        exchange = Exchange(
+            PHILOSOPHER_CODES.code(philosopher),
+            QUESTION_TYPE_CODES.code(question_type),
+            SOURCE_CODES.code(source),
+            int(timestamp if timestamp is not None else time.time()),
+            question,
+            response
+        )
+        self.exchanges.append(exchange)
+        return exchange
+
+    def __iter__(self) -> Iterator[Tuple[str, Exchange]]:
+        """(philosopher name, exchange) pairs in the order they were asked"""
+        for exchange in self.exchanges:
+            yield PHILOSOPHER_CODES.label(exchange.philosopher), exchange
+
+    def count(self, philosopher: str) -> int:
+        code = PHILOSOPHER_CODES.code(philosopher)
+        return sum(1 for exchange in self.exchanges if exchange.philosopher == code)
+
+    def thread(self, philosopher: str) -> List[Exchange]:
+        """Answered exchanges with one philosopher, oldest first (failed requests left out)"""
+        code, error = PHILOSOPHER_CODES.code(philosopher), SOURCE_CODES.code("error")
+        return [exchange for exchange in self.exchanges if exchange.philosopher == code and exchange.source != error]
+
+    def total_questions(self) -> int:
+        return len(self.exchanges)
+
+    def responses_by_philosopher(self, philosophers: Sequence[str]) -> Dict[str, List[Dict]]:
+        """Export-shaped question/response lists keyed by philosopher"""
+        grouped: Dict[str, List[Dict]] = {name: [] for name in philosophers}
+        for name, exchange in self:
+            grouped.setdefault(name, []).append(exchange.to_dict())
+        return grouped
+
+    def mark_completed(self, philosopher: str) -> None:
+        self.completed |= 1 << PHILOSOPHER_CODES.code(philosopher)
+
+    def completed_philosophers(self) -> List[str]:
+        return [label for code, label in enumerate(PHILOSOPHER_CODES.labels) if self.completed & (1 << code)]
+
+    def completed_count(self) -> int:
+        return bin(self.completed).count("1")
+
+    def to_export(self, philosophers: Sequence[str]) -> Dict:
+        """The Assignment 1 export document"""
+        return {
+            'assignment': 'Assignment 1: Philosopher Conversations',
+            'completion_date': datetime.now().isoformat(),
+            'questions_and_responses': self.responses_by_philosopher(philosophers),
+            'notes': {name: self.notes.get(name, '') for name in philosophers},
+            'essays': {name: self.essays.get(name, '') for name in philosophers},
+            'statistics': {
+                'total_questions': self.total_questions(),
+                'total_essays': self.completed_count(),
+                'completed_philosophers': self.completed_philosophers()
+            }
+        }
@@ -0,0 +1,289 @@
+"""
+Durable SQLite store for student work.
+Assignment 1 exchanges, notes, essays, quiz attempts and discussion responses
+are keyed by student identity, which is claimed with a PIN the first time it
+is used. Writes are queued and committed in batches by a background thread;
+the database runs in WAL mode so readers in other sessions never block on
+the writer.
+"""
+
+import hashlib
+import hmac
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from progress_log import ProgressLog
+
+logger = logging.getLogger(__name__)
+
+PHILOSOPHERS = ("Durkheim", "Tylor", "Tillich")
+PIN_HASH_ITERATIONS = 100_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS students (
+    student_id TEXT PRIMARY KEY,
+    pin_salt BLOB NOT NULL,
+    pin_hash BLOB NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS exchanges (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    student_id TEXT NOT NULL,
+    philosopher TEXT NOT NULL,
+    question_type TEXT NOT NULL,
+    question TEXT NOT NULL,
+    response TEXT NOT NULL,
+    source TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS exchanges_by_student ON exchanges (student_id, id);
+CREATE TABLE IF NOT EXISTS notes (
+    student_id TEXT NOT NULL,
+    philosopher TEXT NOT NULL,
+    text TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (student_id, philosopher)
+);
+CREATE TABLE IF NOT EXISTS essays (
+    student_id TEXT NOT NULL,
+    philosopher TEXT NOT NULL,
+    text TEXT NOT NULL,
+    submitted_at REAL NOT NULL,
+    PRIMARY KEY (student_id, philosopher)
+);
+CREATE TABLE IF NOT EXISTS quiz_attempts (
+    student_id TEXT NOT NULL,
+    quiz_id TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    PRIMARY KEY (student_id, quiz_id)
+);
+CREATE TABLE IF NOT EXISTS quiz_submissions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    student_id TEXT NOT NULL,
+    quiz_id TEXT NOT NULL,
+    quiz_version TEXT NOT NULL,
+    answers BLOB NOT NULL,
+    submitted_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS quiz_submissions_by_quiz ON quiz_submissions (quiz_id, quiz_version, id);
+CREATE TABLE IF NOT EXISTS discussion_responses (
+    student_id TEXT NOT NULL,
+    response_key TEXT NOT NULL,
+    text TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (student_id, response_key)
+);
+"""
+
+
+def _hash_pin(pin: str, salt: bytes) -> bytes:
+    return hashlib.pbkdf2_hmac("sha256", pin.encode("utf-8"), salt, PIN_HASH_ITERATIONS)
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+class ProgressStore:
+    """Batched, asynchronous writer plus per-thread readers over one SQLite file"""
+
+    def __init__(self, path: str, batch_size: int = 200, flush_interval: float = 0.25):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._writes: "queue.Queue[Optional[Tuple[str, tuple]]]" = queue.Queue()
+        self._readers = threading.local()
+
+        setup = _connect(path)
+        setup.executescript(SCHEMA)
+        setup.commit()
+        setup.close()
+
+        self._writer = threading.Thread(target=self._write_loop, name="progress-store-writer", daemon=True)
+        self._writer.start()
+
+    def _write_loop(self) -> None:
+        connection = _connect(self.path)
+        while True:
+            item = self._writes.get()
+            if item is None:
+                self._writes.task_done()
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._writes.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._writes.put(None)
+                    self._writes.task_done()
+                    break
+                batch.append(item)
+            try:
+                self._commit(connection, batch)
+            finally:
+                for _ in batch:
+                    self._writes.task_done()
+        connection.close()
+
+    def _commit(self, connection: sqlite3.Connection, batch: List[Tuple[str, tuple]]) -> None:
+        """Write a batch in one transaction, falling back to one statement at a time if it fails"""
+        # One bad write must not roll back everyone else's, nor kill the writer thread
+        try:
+            with connection:
+                for sql, params in batch:
+                    connection.execute(sql, params)
+            return
+        except Exception:
+            logger.exception("Batch of %d writes failed; retrying them one at a time", len(batch))
+        for sql, params in batch:
+            try:
+                with connection:
+                    connection.execute(sql, params)
+            except Exception:
+                logger.exception("Dropped a write that failed on its own: %s", sql.split("(", 1)[0].strip())
+
+    def _enqueue(self, sql: str, params: tuple) -> None:
+        self._writes.put((sql, params))
+
+    def check_pin(self, student_id: str, pin: str) -> bool:
+        """Whether ``pin`` unlocks ``student_id``; the first PIN given for a new identity claims it"""
+        # Written straight away rather than queued, so two sessions racing for one name can't both claim it
+        connection = self._reader()
+        salt = os.urandom(16)
+        with connection:
+            connection.execute("INSERT OR IGNORE INTO students VALUES (?, ?, ?, ?)",
+                               (student_id, salt, _hash_pin(pin, salt), time.time()))
+        salt, expected = connection.execute(
+            "SELECT pin_salt, pin_hash FROM students WHERE student_id = ?", (student_id,)
+        ).fetchone()
+        return hmac.compare_digest(_hash_pin(pin, bytes(salt)), bytes(expected))
+
+    def record_exchange(self, student_id: str, philosopher: str, question_type: str, question: str,
+                        response: str, source: str, created_at: float) -> None:
+        self._enqueue(
+            "INSERT INTO exchanges (student_id, philosopher, question_type, question, response, source, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (student_id, philosopher, question_type, question, response, source, created_at)
+        )
+
+    def save_notes(self, student_id: str, philosopher: str, text: str) -> None:
+        self._enqueue("INSERT OR REPLACE INTO notes VALUES (?, ?, ?, ?)", (student_id, philosopher, text, time.time()))
+
+    def save_essay(self, student_id: str, philosopher: str, text: str) -> None:
+        self._enqueue("INSERT OR REPLACE INTO essays VALUES (?, ?, ?, ?)", (student_id, philosopher, text, time.time()))
+
+    def save_quiz_attempts(self, student_id: str, quiz_id: str, attempts: int) -> None:
+        self._enqueue("INSERT OR REPLACE INTO quiz_attempts VALUES (?, ?, ?)", (student_id, quiz_id, attempts))
+
+    def save_quiz_submission(self, student_id: str, quiz_id: str, quiz_version: str, answers: bytes) -> None:
+        """One graded submission as its raw int8 answer row"""
+        self._enqueue(
+            "INSERT INTO quiz_submissions (student_id, quiz_id, quiz_version, answers, submitted_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (student_id, quiz_id, quiz_version, answers, time.time())
+        )
+
+    def save_discussion_response(self, student_id: str, response_key: str, text: str) -> None:
+        self._enqueue(
+            "INSERT OR REPLACE INTO discussion_responses VALUES (?, ?, ?, ?)",
+            (student_id, response_key, text, time.time())
+        )
+
+    def flush(self) -> None:
+        """Block until every queued write is committed"""
+        self._writes.join()
+
+    def close(self) -> None:
+        self._writes.put(None)
+        self._writer.join()
+
+    def _reader(self) -> sqlite3.Connection:
+        connection = getattr(self._readers, "connection", None)
+        if connection is None:
+            connection = _connect(self.path)
+            self._readers.connection = connection
+        return connection
+
+    def load_exchanges(self, student_id: str) -> List[Tuple[str, str, str, str, str, float]]:
+        """(philosopher, question_type, question, response, source, created_at) rows in order"""
+        return self._reader().execute(
+            "SELECT philosopher, question_type, question, response, source, created_at "
+            "FROM exchanges WHERE student_id = ? ORDER BY id",
+            (student_id,)
+        ).fetchall()
+
+    def load_assignment1(self, student_id: str) -> ProgressLog:
+        """A student's Assignment 1 progress rebuilt as an event log"""
+        reader = self._reader()
+        progress = ProgressLog()
+        for philosopher, question_type, question, response, source, created_at in self.load_exchanges(student_id):
+            progress.append(philosopher, question_type, question, response, source, created_at)
+        for philosopher, text in reader.execute("SELECT philosopher, text FROM notes WHERE student_id = ?", (student_id,)):
+            progress.notes[philosopher] = text
+        for philosopher, text in reader.execute("SELECT philosopher, text FROM essays WHERE student_id = ?", (student_id,)):
+            progress.essays[philosopher] = text
+            progress.mark_completed(philosopher)
+        return progress
+
+    def load_quiz_attempts(self, student_id: str) -> Dict[str, int]:
+        rows = self._reader().execute("SELECT quiz_id, attempts FROM quiz_attempts WHERE student_id = ?", (student_id,))
+        return dict(rows.fetchall())
+
+    def load_quiz_submissions(self, quiz_id: str, quiz_version: str) -> List[Tuple[str, bytes]]:
+        """(student_id, answer row) of each student's first attempt at one version of a quiz, oldest first"""
+        rows = self._reader().execute(
+            "SELECT student_id, answers FROM quiz_submissions WHERE id IN ("
+            "  SELECT MIN(id) FROM quiz_submissions WHERE quiz_id = ? AND quiz_version = ? GROUP BY student_id"
+            ") ORDER BY id",
+            (quiz_id, quiz_version)
+        )
+        return [(student_id, bytes(answers)) for student_id, answers in rows]
+
+    def load_discussion_responses(self, student_id: str) -> Dict[str, str]:
+        rows = self._reader().execute(
+            "SELECT response_key, text FROM discussion_responses WHERE student_id = ?", (student_id,)
+        )
+        return dict(rows.fetchall())
+
+    def load_prompt_responses(self, response_key: str) -> List[Tuple[str, str]]:
+        """(student_id, text) for every student's answer to one discussion prompt"""
+        return self._reader().execute(
+            "SELECT student_id, text FROM discussion_responses WHERE response_key = ?", (response_key,)
+        ).fetchall()
+
+    def load_all_essays(self) -> List[Tuple[str, str, str]]:
+        """(student_id, philosopher, text) for every submitted essay"""
+        return self._reader().execute("SELECT student_id, philosopher, text FROM essays").fetchall()
+
+    def load_distinct_responses(self) -> List[Tuple[str, str]]:
+        """(philosopher, response) for every distinct philosopher answer given to any student"""
+        return self._reader().execute(
+            "SELECT philosopher, response FROM exchanges WHERE source != 'error' GROUP BY philosopher, response"
+        ).fetchall()
+
+    def student_ids_after(self, cursor: str = "", limit: int = 200) -> List[str]:
+        """One page of student IDs with any Assignment 1 work, in ID order after ``cursor``"""
+        rows = self._reader().execute(
+            "SELECT student_id FROM exchanges WHERE student_id > ? "
+            "UNION SELECT student_id FROM notes WHERE student_id > ? "
+            "UNION SELECT student_id FROM essays WHERE student_id > ? "
+            "ORDER BY student_id LIMIT ?",
+            (cursor, cursor, cursor, limit)
+        )
+        return [student_id for (student_id,) in rows]
+
+    def export_assignment1(self, student_id: str) -> Dict:
+        """Assignment 1 export document read straight from the store"""
+        self.flush()
+        return dict(self.load_assignment1(student_id).to_export(PHILOSOPHERS), student=student_id)
@@ -0,0 +1,97 @@
+"""
+Precompiled philosopher prompts.
+The (philosopher x question_type) system prompts are built once into an
+immutable table; each is split into a static persona block, which is marked
+for Anthropic prompt caching, and a short topic block.
+"""
+
+from types import MappingProxyType
+from typing import Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+from semantic_cache import tokenize
+
+DEFAULT_MODEL = "claude-3-haiku-20240307"
+DEFAULT_MAX_TOKENS = 400
+
+# Content files the prompts are built from; their combined digest versions prompts and prepared answers
+PROMPT_CONTENT_FILES = ("philosophers.json", "concepts.json")
+
+
+class SystemPrompt(NamedTuple):
+    """System prompt split at the prompt-caching breakpoint"""
+    persona: str
+    topic: str
+
+    def to_blocks(self) -> List[Dict]:
+        """Messages API system blocks with the persona block cached"""
+        return [
+            {"type": "text", "text": self.persona, "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": self.topic}
+        ]
+
+    @property
+    def text(self) -> str:
+        return self.persona + "\n\n" + self.topic
+
+
+def build_persona_prompt(profile: Mapping) -> str:
+    """Everything about the philosopher that does not depend on the question"""
+    return f"""You are {profile['name']} ({profile['years']}), responding to a philosophy student's question.
+
+Background: {profile['background']}
+
+Your key ideas:
+{chr(10).join(f"- {idea}" for idea in profile['key_ideas'])}
+
+Your personality: {profile['personality']}"""
+
+
+def build_topic_prompt(profile: Mapping, question_type: str, concept: Mapping) -> str:
+    """Instructions specific to one argument-structure concept"""
+    return f"""The student is asking about '{question_type}' which is defined as: {concept.get('definition', 'a concept in argument structure')}
+
+Your specific view on {question_type}: {profile.get(f'on_{question_type}', 'This concept requires careful consideration')}
+
+Respond in character as {profile['name']}, drawing on your specific view of religion and your approach to {question_type}. Be educational but maintain your historical perspective and personality. Keep your response to 2-3 paragraphs and address their specific question about {question_type}."""
+
+
+def build_system_prompt_table(profiles: Mapping, concepts: Mapping) -> Mapping[Tuple[str, str], SystemPrompt]:
+    """Read-only table of every (philosopher, question_type) system prompt"""
+    table = {}
+    for philosopher, profile in profiles.items():
+        persona = build_persona_prompt(profile)
+        for question_type, concept in concepts.items():
+            table[(philosopher, question_type)] = SystemPrompt(persona, build_topic_prompt(profile, question_type, concept))
+    return MappingProxyType(table)
+
+
+def build_user_message(profile: Mapping, question_type: str, question: str) -> str:
+    """The student's question as sent to the philosopher"""
+    return f"Professor {profile['name']}, I'm studying argument structure and have a question about {question_type}: {question}"
+
+
+def build_message_payload(system_prompt: SystemPrompt, profile: Mapping, question_type: str, question: str,
+                          model: str, max_tokens: int, messages: Optional[List[Dict]] = None) -> Dict:
+    """Messages API request body for one student question; ``messages`` replaces it with a whole conversation"""
+    return {
+        "model": model,
+        "max_tokens": max_tokens,
+        "system": system_prompt.to_blocks(),
+        "messages": messages or [
+            {"role": "user", "content": build_user_message(profile, question_type, question)}
+        ]
+    }
+
+
+def compose_offline_answer(profile: Mapping, question_type: str, question: str) -> str:
+    """An in-character answer assembled from the profile alone, for when the API is unavailable"""
+    question_words = set(tokenize(question))
+    # The key idea sharing the most words with the question, else the first one
+    key_idea = max(profile['key_ideas'], key=lambda idea: len(question_words & set(tokenize(idea))))
+    trait = profile['personality'].split(",")[0].strip()
+    view = profile.get(f'on_{question_type}', 'This concept requires careful consideration.')
+    return f"""*{profile['name']}, {trait}, considers your question about {question_type}.*
+
+{view}
+
+Your question - "{question.strip()}" - brings me back to one of my central ideas: {key_idea[0].lower() + key_idea[1:].rstrip('.')}. Ask yourself how that idea shapes the way I would treat {question_type} here, and whether you accept it as a starting point."""
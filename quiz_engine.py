@@ -0,0 +1,151 @@
+"""
+Vectorized quiz grading and item analysis.
+Submissions for one quiz are kept as rows of a compact int8 answer matrix and
+graded in bulk against a precomputed answer-key vector. Item statistics
+(difficulty, discrimination, distractor counts) are maintained from running
+sums, so each new submission costs a handful of array additions rather than
+a pass over the whole class. Only a student's first attempt is recorded, so
+the statistics describe students rather than retakes.
+"""
+
+import threading
+from typing import Dict, List, Mapping, Optional, Sequence, Set
+
+import numpy as np
+
+UNANSWERED = -1
+
+
+class QuizGradebook:
+    """Answer matrix, answer key and running item statistics for one quiz"""
+
+    def __init__(self, quiz: Mapping, capacity: int = 256):
+        questions = quiz["questions"]
+        self.items = len(questions)
+        self.key = np.array([q["correct"] for q in questions], dtype=np.int8)
+        self.option_counts = np.array([len(q["options"]) for q in questions], dtype=np.int8)
+        self.width = int(self.option_counts.max()) + 1  # column 0 counts unanswered items
+
+        self._answers = np.full((capacity, self.items), UNANSWERED, dtype=np.int8)
+        self._size = 0
+        self._students: Set[str] = set()
+        self._lock = threading.Lock()
+
+        # Running sums behind the item statistics
+        self._choices = np.zeros((self.items, self.width), dtype=np.int64)
+        self._correct = np.zeros(self.items, dtype=np.int64)
+        self._score_x_correct = np.zeros(self.items, dtype=np.int64)
+        self._score_sum = 0
+        self._score_sq_sum = 0
+
+    def _validate(self, answers) -> np.ndarray:
+        matrix = np.atleast_2d(np.asarray(answers, dtype=np.int8))
+        if matrix.shape[1] != self.items:
+            raise ValueError(f"expected {self.items} answers per submission, got {matrix.shape[1]}")
+        if ((matrix < UNANSWERED) | (matrix >= self.option_counts)).any():
+            raise ValueError("answer index out of range")
+        return matrix
+
+    def submit_many(self, answers, students: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Grade a batch of submissions and record each student's first; returns the correctness of all of them"""
+        graded = self._validate(answers)
+        all_correct = graded == self.key
+        matrix, correct = graded, all_correct
+        if students is not None:
+            with self._lock:
+                first = []
+                for student in students:
+                    first.append(student not in self._students)
+                    self._students.add(student)
+            matrix, correct = graded[first], all_correct[first]
+            if not len(matrix):
+                return all_correct
+        scores = correct.sum(axis=1, dtype=np.int64)
+        cells = (np.arange(self.items) * self.width + matrix.astype(np.int64) + 1).ravel()
+        choices = np.bincount(cells, minlength=self.items * self.width).reshape(self.items, self.width)
+
+        with self._lock:
+            end = self._size + len(matrix)
+            if end > len(self._answers):
+                grown = np.full((max(end, 2 * len(self._answers)), self.items), UNANSWERED, dtype=np.int8)
+                grown[:self._size] = self._answers[:self._size]
+                self._answers = grown
+            self._answers[self._size:end] = matrix
+            self._size = end
+
+            self._choices += choices
+            self._correct += correct.sum(axis=0)
+            self._score_x_correct += scores @ correct
+            self._score_sum += int(scores.sum())
+            self._score_sq_sum += int((scores * scores).sum())
+        return all_correct
+
+    def submit(self, answers: Sequence[int], student: Optional[str] = None) -> np.ndarray:
+        """Grade one submission, recording it unless ``student`` already has one; returns its per-question correctness"""
+        return self.submit_many([answers], None if student is None else [student])[0]
+
+    def submit_packed(self, rows: Sequence[bytes], students: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Grade and record stored submissions (see ``pack``) in one batch"""
+        if not rows:
+            return np.zeros((0, self.items), dtype=bool)
+        matrix = np.frombuffer(b"".join(rows), dtype=np.int8).reshape(len(rows), self.items)
+        return self.submit_many(matrix, students)
+
+    def pack(self, answers: Sequence[int]) -> bytes:
+        """One submission as a raw int8 row for storage"""
+        return self._validate(answers)[0].tobytes()
+
+    def answers(self) -> np.ndarray:
+        """Copy of the recorded answer matrix"""
+        with self._lock:
+            return self._answers[:self._size].copy()
+
+    def scores(self) -> np.ndarray:
+        """Total score of every recorded submission, graded in one pass"""
+        return (self.answers() == self.key).sum(axis=1)
+
+    def item_analysis(self) -> List[Dict]:
+        """Per-question difficulty, corrected point-biserial discrimination and choice counts"""
+        with self._lock:
+            n = self._size
+            choices = self._choices.copy()
+            correct = self._correct.astype(float)
+            score_x_correct = self._score_x_correct.astype(float)
+            score_sum = float(self._score_sum)
+            score_sq_sum = float(self._score_sq_sum)
+
+        results = []
+        for item in range(self.items):
+            difficulty: Optional[float] = None
+            discrimination: Optional[float] = None
+            if n:
+                p = correct[item] / n
+                difficulty = p
+                # Correlate the item with the rest of the test (total minus this item)
+                rest_mean = (score_sum - correct[item]) / n
+                rest_sq_mean = (score_sq_sum - 2 * score_x_correct[item] + correct[item]) / n
+                rest_x_item_mean = (score_x_correct[item] - correct[item]) / n
+                rest_var = rest_sq_mean - rest_mean ** 2
+                item_var = p * (1 - p)
+                if rest_var > 1e-12 and item_var > 1e-12:
+                    discrimination = (rest_x_item_mean - rest_mean * p) / np.sqrt(rest_var * item_var)
+            results.append({
+                'question': item,
+                'difficulty': difficulty,
+                'discrimination': None if discrimination is None else float(discrimination),
+                'choices': choices[item, 1:int(self.option_counts[item]) + 1].tolist(),
+                'unanswered': int(choices[item, 0]),
+                'correct': int(self.key[item])
+            })
+        return results
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            n = self._size
+            mean = self._score_sum / n if n else 0.0
+        return {'submissions': n, 'mean_score': mean, 'items': self.items}
+
+
+def build_gradebooks(quizzes: Mapping[str, Mapping]) -> Dict[str, QuizGradebook]:
+    """One empty gradebook per quiz"""
+    return {quiz_id: QuizGradebook(quiz) for quiz_id, quiz in quizzes.items()}
@@ -0,0 +1,156 @@
+"""
+Process-wide fair scheduler for Messages API calls.
+Token buckets sized to the account's requests-per-minute and tokens-per-minute
+limits, a round-robin queue per student session so nobody is starved, and
+jittered backoff that honours retry-after.
+"""
+
+import itertools
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Optional
+
+
+class QueueTimeout(Exception):
+    """Raised when a request waited in the queue longer than allowed"""
+
+
+class TokenBucket:
+    """Continuously refilling bucket; capacity is one minute of allowance"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.available = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount can be taken (0 if available now)"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.available -= min(amount, self.capacity)
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0, retry_after: Optional[float] = None) -> float:
+    """Full-jitter exponential backoff that never undercuts retry-after"""
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, retry_after) + random.uniform(0, base)
+    return delay
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a retry-after header, if it holds a number"""
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+class FairScheduler:
+    """Grants API slots round-robin across sessions within RPM/TPM limits"""
+
+    def __init__(self, requests_per_minute: float = 50, tokens_per_minute: float = 50000, max_wait: float = 120.0):
+        self.max_wait = max_wait
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._paused_until = 0.0
+        self._ticket_ids = itertools.count()
+        self._stats = {'granted': 0, 'queued': 0, 'timeouts': 0, 'rate_limited': 0}
+
+    def _position(self, session_id: str, ticket: int) -> int:
+        """1-based place in line under round-robin order (caller holds the lock)"""
+        index = self._queues[session_id].index(ticket)
+        position = 1
+        seen_own = False
+        for other_id, queue in self._queues.items():
+            if other_id == session_id:
+                seen_own = True
+                continue
+            position += min(len(queue), index if seen_own else index + 1)
+        return position + index
+
+    def _remove(self, session_id: str, ticket: int) -> None:
+        queue = self._queues[session_id]
+        queue.remove(ticket)
+        if not queue:
+            del self._queues[session_id]
+
+    def acquire(self, session_id: str, tokens: float, on_wait: Optional[Callable[[int], None]] = None) -> None:
+        """Block until this session's request may be sent; on_wait gets the queue position"""
+        started = time.monotonic()
+        ticket = next(self._ticket_ids)
+        with self._cond:
+            self._queues.setdefault(session_id, deque()).append(ticket)
+
+        last_position = None
+        try:
+            while True:
+                with self._cond:
+                    now = time.monotonic()
+                    head_session = next(iter(self._queues))
+                    if head_session == session_id and self._queues[session_id][0] == ticket:
+                        wait = max(
+                            self._paused_until - now,
+                            self._requests.wait_time(1, now),
+                            self._tokens.wait_time(tokens, now)
+                        )
+                        if wait <= 0:
+                            self._requests.take(1)
+                            self._tokens.take(tokens)
+                            self._queues[session_id].popleft()
+                            # Rotate this session to the back so others get the next slot
+                            if self._queues[session_id]:
+                                self._queues.move_to_end(session_id)
+                            else:
+                                del self._queues[session_id]
+                            self._stats['granted'] += 1
+                            self._cond.notify_all()
+                            return
+                    else:
+                        wait = 0.5
+
+                    if now - started > self.max_wait:
+                        self._stats['timeouts'] += 1
+                        raise QueueTimeout(f"Waited more than {self.max_wait:.0f}s for an API slot")
+
+                    position = self._position(session_id, ticket)
+                    if last_position is None:
+                        self._stats['queued'] += 1
+
+                if on_wait is not None and position != last_position:
+                    on_wait(position)
+                last_position = position
+                with self._cond:
+                    self._cond.wait(timeout=min(max(wait, 0.05), 1.0))
+        except BaseException:
+            # Timeouts, and anything on_wait raises (Streamlit's rerun/stop exceptions included),
+            # must not leave the ticket at the head of the queue blocking everyone behind it
+            with self._cond:
+                self._remove(session_id, ticket)
+                self._cond.notify_all()
+            raise
+
+    def pause_for(self, seconds: float) -> None:
+        """Hold every queued request after the API reports a rate limit"""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._stats['rate_limited'] += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Grant/queue counters plus the number of requests currently waiting"""
+        with self._cond:
+            return dict(self._stats, waiting=sum(len(q) for q in self._queues.values()))
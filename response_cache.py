@@ -0,0 +1,119 @@
+"""
+Shared response cache for philosopher conversations.
+Process-wide LRU + TTL cache with an optional SQLite backing file so answers
+survive Streamlit restarts. Keys carry the prompt version, so editing the
+philosopher profiles or concepts stops serving answers built from the old ones.
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+# (philosopher, question_type, normalized question, model, max_tokens, prompt version)
+CacheKey = Tuple[str, str, str, str, int, str]
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation"""
+    text = re.sub(r"\s+", " ", question.strip().lower())
+    return text.rstrip(" ?!.")
+
+
+def make_cache_key(philosopher: str, question_type: str, question: str, model: str, max_tokens: int,
+                   prompt_version: str) -> CacheKey:
+    """Build the cache key for one philosopher question under one version of the prompts"""
+    return (philosopher, question_type, normalize_question(question), model, int(max_tokens), prompt_version)
+
+
+class ResponseCache:
+    """Bounded LRU cache with TTL expiry and optional on-disk persistence"""
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 24 * 3600, disk_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[CacheKey, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'disk_hits': 0, 'evictions': 0}
+        self._db = None
+        if disk_path:
+            self._open_disk(disk_path)
+
+    def _open_disk(self, disk_path: str) -> None:
+        self._db = sqlite3.connect(disk_path, check_same_thread=False)
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(response_cache)")]
+        if columns and "prompt_version" not in columns:
+            # Written before answers were versioned: nothing says which prompts they came from
+            self._db.execute("DROP TABLE response_cache")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS response_cache (
+                philosopher TEXT NOT NULL,
+                question_type TEXT NOT NULL,
+                question TEXT NOT NULL,
+                model TEXT NOT NULL,
+                max_tokens INTEGER NOT NULL,
+                prompt_version TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (philosopher, question_type, question, model, max_tokens, prompt_version)
+            )
+        """)
+        self._db.execute("DELETE FROM response_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        self._db.commit()
+
+    def _is_fresh(self, created_at: float) -> bool:
+        return time.time() - created_at < self.ttl_seconds
+
+    def _remember(self, key: CacheKey, response: str, created_at: float) -> None:
+        # Caller holds the lock
+        self._entries[key] = (response, created_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def get(self, key: CacheKey) -> Optional[str]:
+        """Return the cached response for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._is_fresh(entry[1]):
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return entry[0]
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT response, created_at FROM response_cache "
+                    "WHERE philosopher = ? AND question_type = ? AND question = ? AND model = ? AND max_tokens = ? "
+                    "AND prompt_version = ?",
+                    key
+                ).fetchone()
+                if row and self._is_fresh(row[1]):
+                    self._remember(key, row[0], row[1])
+                    self._stats['hits'] += 1
+                    self._stats['disk_hits'] += 1
+                    return row[0]
+
+            self._stats['misses'] += 1
+            return None
+
+    def put(self, key: CacheKey, response: str) -> None:
+        """Store a successful response"""
+        created_at = time.time()
+        with self._lock:
+            self._remember(key, response, created_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO response_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    key + (response, created_at)
+                )
+                self._db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters plus current size"""
+        with self._lock:
+            return dict(self._stats, size=len(self._entries))
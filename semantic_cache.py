@@ -0,0 +1,152 @@
+"""
+Near-duplicate question lookup for philosopher conversations.
+A small CPU-only TF-IDF index over hashed word and character n-grams, with
+one bucket per (philosopher, question_type) and prompt version, so paraphrased
+questions can be answered from earlier responses without calling the API.
+"""
+
+import math
+import re
+import threading
+import zlib
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+# Words that carry no meaning for matching a student's question
+STOPWORDS = frozenset("""
+a an and are as at be by can could do does did for from how i in is it its me my of on or
+please professor so that the their them this to understand us was we what whats when where which
+who why will with would you your yours define definition describe explain mean meaning means
+think thoughts tell view views about say consider regard see
+""".split())
+
+HASH_BUCKETS = 1 << 20
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase content words with a light plural/suffix strip"""
+    tokens = []
+    for word in re.findall(r"[a-z]+", text.lower()):
+        if word in STOPWORDS:
+            continue
+        for suffix in ("ies", "es", "s"):
+            if len(word) > 4 and word.endswith(suffix) and not word.endswith("ss"):
+                word = word[:-len(suffix)] + ("y" if suffix == "ies" else "")
+                break
+        tokens.append(word)
+    return tokens
+
+
+def _hash(feature: str) -> int:
+    return zlib.crc32(feature.encode("utf-8")) % HASH_BUCKETS
+
+
+def extract_features(text: str) -> Dict[int, float]:
+    """Hashed unigram, bigram and character trigram counts with sublinear tf"""
+    tokens = tokenize(text)
+    counts: Counter = Counter()
+    for token in tokens:
+        counts["w:" + token] += 1
+        padded = f" {token} "
+        for i in range(len(padded) - 2):
+            counts["c:" + padded[i:i + 3]] += 0.5
+    for first, second in zip(tokens, tokens[1:]):
+        counts[f"b:{first} {second}"] += 1
+    features: Dict[int, float] = {}
+    for feature, count in counts.items():
+        key = _hash(feature)
+        features[key] = features.get(key, 0.0) + count
+    return {key: 1.0 + math.log(count) if count >= 1 else count for key, count in features.items()}
+
+
+class _Bucket:
+    """Documents and document frequencies for one (philosopher, question_type, prompt version)"""
+
+    def __init__(self):
+        self.docs: "OrderedDict[int, Tuple[str, str, Dict[int, float]]]" = OrderedDict()
+        self.postings: Dict[int, set] = {}
+        self.doc_freq: Counter = Counter()
+        self.next_id = 0
+
+    def idf(self, feature: int) -> float:
+        return math.log((1 + len(self.docs)) / (1 + self.doc_freq.get(feature, 0))) + 1.0
+
+
+class SimilarityIndex:
+    """Per-bucket cosine similarity index over stored question/answer pairs"""
+
+    def __init__(self, threshold: float = 0.85, max_per_bucket: int = 500):
+        self.threshold = threshold
+        self.max_per_bucket = max_per_bucket
+        self._buckets: Dict[Tuple[str, str, str], _Bucket] = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0}
+
+    def add(self, philosopher: str, question_type: str, question: str, response: str, prompt_version: str) -> None:
+        """Index an answered question"""
+        features = extract_features(question)
+        if not features:
+            return
+        with self._lock:
+            bucket = self._buckets.get((philosopher, question_type, prompt_version))
+            if bucket is None:
+                # Answers to earlier versions of the prompts are never served again
+                for key in [key for key in self._buckets if key[:2] == (philosopher, question_type)]:
+                    del self._buckets[key]
+                bucket = self._buckets[(philosopher, question_type, prompt_version)] = _Bucket()
+            doc_id = bucket.next_id
+            bucket.next_id += 1
+            bucket.docs[doc_id] = (question, response, features)
+            for feature in features:
+                bucket.postings.setdefault(feature, set()).add(doc_id)
+                bucket.doc_freq[feature] += 1
+            while len(bucket.docs) > self.max_per_bucket:
+                old_id, (_, _, old_features) = bucket.docs.popitem(last=False)
+                for feature in old_features:
+                    bucket.postings[feature].discard(old_id)
+                    bucket.doc_freq[feature] -= 1
+                    if bucket.doc_freq[feature] <= 0:
+                        del bucket.doc_freq[feature]
+                        del bucket.postings[feature]
+
+    def lookup(self, philosopher: str, question_type: str, question: str, prompt_version: str) -> Optional[Dict]:
+        """Return the closest stored answer for this prompt version above the threshold, or None"""
+        features = extract_features(question)
+        with self._lock:
+            bucket = self._buckets.get((philosopher, question_type, prompt_version))
+            if not features or bucket is None or not bucket.docs:
+                self._stats['misses'] += 1
+                return None
+
+            query = {feature: weight * bucket.idf(feature) for feature, weight in features.items()}
+            query_norm = math.sqrt(sum(w * w for w in query.values()))
+            candidates = set()
+            for feature in query:
+                candidates.update(bucket.postings.get(feature, ()))
+
+            best_score, best_id = 0.0, None
+            for doc_id in candidates:
+                doc_features = bucket.docs[doc_id][2]
+                dot = 0.0
+                doc_norm_sq = 0.0
+                for feature, weight in doc_features.items():
+                    weighted = weight * bucket.idf(feature)
+                    doc_norm_sq += weighted * weighted
+                    if feature in query:
+                        dot += weighted * query[feature]
+                score = dot / (query_norm * math.sqrt(doc_norm_sq)) if doc_norm_sq else 0.0
+                if score > best_score:
+                    best_score, best_id = score, doc_id
+
+            if best_id is None or best_score < self.threshold:
+                self._stats['misses'] += 1
+                return None
+
+            self._stats['hits'] += 1
+            matched_question, response, _ = bucket.docs[best_id]
+            return {'response': response, 'similarity': best_score, 'matched_question': matched_question}
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters plus number of indexed questions"""
+        with self._lock:
+            return dict(self._stats, size=sum(len(b.docs) for b in self._buckets.values()))
@@ -0,0 +1,164 @@
+"""
+Small HTTP server that runs beside Streamlit in the same process.
+Streamlit can only hand the browser fully built downloads, so anything that
+should stream (whole-class exports), be scraped (Prometheus /metrics) or be
+cached by the browser (the lecture deck) is served from here instead. It runs
+on a daemon thread and shares the app's process-wide objects.
+"""
+
+import gzip
+import hashlib
+import hmac
+import logging
+import mimetypes
+import threading
+import time
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+from flask import Flask, Response, abort, request
+from werkzeug.serving import make_server
+
+from class_export import iter_ndjson, iter_zip
+from content_store import ContentStore
+from progress_store import ProgressStore
+
+logger = logging.getLogger(__name__)
+
+# Content files the browser may fetch directly; everything else in content/ stays server-side
+STATIC_CONTENT = ("professor_lecture.html",)
+# Below this size compression isn't worth a second variant
+GZIP_MIN_BYTES = 1024
+
+
+def make_export_token(secret: str, ttl_seconds: int = 3600) -> str:
+    """Short-lived signed token so export links never carry the password itself"""
+    expires = int(time.time()) + ttl_seconds
+    signature = hmac.new(secret.encode("utf-8"), str(expires).encode("ascii"), hashlib.sha256).hexdigest()
+    return f"{expires}.{signature}"
+
+
+def verify_export_token(secret: Optional[str], token: str) -> bool:
+    if not secret or "." not in token:
+        return False
+    expires, signature = token.split(".", 1)
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    expected = hmac.new(secret.encode("utf-8"), expires.encode("ascii"), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(signature, expected)
+
+
+class StaticAsset(NamedTuple):
+    """One content file ready to serve, with its precompressed variant"""
+    body: bytes
+    gzipped: Optional[bytes]
+    etag: str
+    content_type: str
+
+
+class StaticAssets:
+    """Static content files encoded once per content version"""
+
+    def __init__(self, content: ContentStore):
+        self.content = content
+        # name -> (content digest, asset)
+        self._assets: Dict[str, Tuple[str, StaticAsset]] = {}
+        self._lock = threading.Lock()
+
+    def version(self, name: str) -> str:
+        """Short content digest, used to build cache-busting URLs"""
+        return self.content.digest(name)[:16]
+
+    def get(self, name: str) -> StaticAsset:
+        digest = self.content.digest(name)
+        entry = self._assets.get(name)
+        if entry is not None and entry[0] == digest:
+            return entry[1]
+        body = self.content.get(name).encode("utf-8")
+        # mtime=0 keeps the compressed bytes identical across restarts
+        gzipped = gzip.compress(body, compresslevel=9, mtime=0) if len(body) >= GZIP_MIN_BYTES else None
+        content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        asset = StaticAsset(body, gzipped, digest[:16], f"{content_type}; charset=utf-8")
+        with self._lock:
+            self._assets[name] = (digest, asset)
+        return asset
+
+
+def create_app(progress_store: Callable[[], ProgressStore], instructor_secret: Optional[str],
+               metrics_text: Optional[Callable[[], str]] = None, assets: Optional[StaticAssets] = None) -> Flask:
+    app = Flask(__name__)
+
+    def require_instructor() -> None:
+        if not verify_export_token(instructor_secret, request.args.get("token", "")):
+            abort(403)
+
+    @app.get("/export/assignment1.ndjson")
+    def export_ndjson():
+        require_instructor()
+        chunks = iter_ndjson(progress_store(), request.args.get("after", ""))
+        return Response(chunks, mimetype="application/x-ndjson", headers={
+            "Content-Disposition": "attachment; filename=assignment1_class.ndjson",
+            "Cache-Control": "no-store"
+        })
+
+    @app.get("/export/assignment1.zip")
+    def export_zip():
+        require_instructor()
+        chunks = iter_zip(progress_store(), request.args.get("after", ""))
+        return Response(chunks, mimetype="application/zip", headers={
+            "Content-Disposition": "attachment; filename=assignment1_class.zip",
+            "Cache-Control": "no-store"
+        })
+
+    @app.get("/metrics")
+    def metrics():
+        if metrics_text is None:
+            abort(404)
+        return Response(metrics_text(), mimetype="text/plain; version=0.0.4")
+
+    @app.get("/content/<name>")
+    def static_content(name: str):
+        if assets is None or name not in STATIC_CONTENT:
+            abort(404)
+        asset = assets.get(name)
+        use_gzip = asset.gzipped is not None and request.accept_encodings["gzip"] > 0
+        # Each encoding is its own representation, so each gets its own ETag
+        etag = f"{asset.etag}-gzip" if use_gzip else asset.etag
+        if request.args.get("v") == asset.etag:
+            # Versioned URLs change whenever the content does
+            cache_control = "public, max-age=31536000, immutable"
+        else:
+            cache_control = "no-cache"
+        headers = {"ETag": f'"{etag}"', "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        if request.if_none_match.contains(etag):
+            return Response(status=304, headers=headers)
+        if use_gzip:
+            headers["Content-Encoding"] = "gzip"
+        return Response(asset.gzipped if use_gzip else asset.body, content_type=asset.content_type, headers=headers)
+
+    @app.get("/healthz")
+    def healthz():
+        return {"status": "ok"}
+
+    return app
+
+
+class SideServer:
+    """Threaded WSGI server for ``create_app`` on a daemon thread"""
+
+    def __init__(self, app: Flask, host: str, port: int):
+        self._server = make_server(host, port, app, threaded=True)
+        self.port = self._server.server_port
+        self._thread = threading.Thread(target=self._server.serve_forever, name="side-server", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self._server.shutdown()
+
+
+def start_side_server(app: Flask, host: str, port: int) -> Optional[SideServer]:
+    """Start the side server, or return None if the port can't be bound"""
+    try:
+        return SideServer(app, host, port)
+    except OSError as error:
+        logger.warning("Side server not started on %s:%s: %s", host, port, error)
+        return None
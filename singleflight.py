@@ -0,0 +1,58 @@
+"""
+Single-flight request coalescing.
+The first caller for a key does the work; every concurrent caller with the
+same key waits on that caller's future instead of issuing its own request.
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {'leaders': 0, 'coalesced': 0}
+
+    def join(self, key: Hashable) -> Tuple[Future, bool]:
+        """Return (future, is_leader); the leader must call complete() when done"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self._stats['coalesced'] += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self._stats['leaders'] += 1
+            return future, True
+
+    def complete(self, key: Hashable, future: Future, result: Any = None, error: BaseException = None) -> None:
+        """Publish the leader's outcome to every waiter and forget the key"""
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run fn once per in-flight key; returns (result, was_coalesced)"""
+        future, leader = self.join(key)
+        if not leader:
+            return future.result(), True
+        try:
+            result = fn()
+        except BaseException as e:
+            self.complete(key, future, error=e)
+            raise
+        self.complete(key, future, result=result)
+        return result, False
+
+    def stats(self) -> Dict[str, int]:
+        """Leader/coalesced counters plus calls currently in flight"""
+        with self._lock:
+            return dict(self._stats, in_flight=len(self._calls))
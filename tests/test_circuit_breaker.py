@@ -0,0 +1,113 @@
+import time
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def tripped_breaker(**settings) -> CircuitBreaker:
+    """A breaker opened by three failures in a row, with no cool-down unless one is given"""
+    breaker = CircuitBreaker(**dict({'open_seconds': 0}, **settings))
+    for _ in range(3):
+        breaker.record(breaker.allow(), True, 0.1)
+    return breaker
+
+
+def test_consecutive_failures_open_the_circuit():
+    breaker = CircuitBreaker(consecutive_failures=3, open_seconds=60)
+    for _ in range(2):
+        breaker.record(breaker.allow(), True, 0.1)
+    assert breaker.state() == CLOSED
+    breaker.record(breaker.allow(), True, 0.1)
+    assert breaker.state() == OPEN
+    assert breaker.allow() is None
+    assert breaker.stats()['short_circuited'] == 1
+
+
+def test_failure_ratio_needs_min_requests():
+    breaker = CircuitBreaker(min_requests=4, failure_ratio=0.5, consecutive_failures=10, open_seconds=60)
+    for failed in (True, False, True):
+        breaker.record(breaker.allow(), failed, 0.1)
+    assert breaker.state() == CLOSED
+    breaker.record(breaker.allow(), False, 0.1)
+    assert breaker.state() == OPEN
+
+
+def test_mostly_slow_calls_open_the_circuit():
+    breaker = CircuitBreaker(min_requests=3, slow_call_seconds=1, slow_ratio=0.8, open_seconds=60)
+    for _ in range(3):
+        breaker.record(breaker.allow(), False, 2.0)
+    assert breaker.state() == OPEN
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = tripped_breaker(open_seconds=0.05)
+    assert breaker.allow() is None
+    time.sleep(0.06)
+    assert breaker.state() == HALF_OPEN
+    probe = breaker.allow()
+    assert probe is not None and probe.probe
+    assert breaker.allow() is None
+
+
+def test_successful_probe_closes_the_circuit():
+    breaker = tripped_breaker()
+    breaker.record(breaker.allow(), False, 0.1)
+    assert breaker.state() == CLOSED
+    assert breaker.stats()['window'] == 0
+    # The failure streak starts over too
+    breaker.record(breaker.allow(), True, 0.1)
+    assert breaker.state() == CLOSED
+
+
+def test_failed_or_slow_probe_reopens_the_circuit():
+    breaker = tripped_breaker(open_seconds=60)
+    breaker._opened_at -= 60
+    breaker.record(breaker.allow(), True, 0.1)
+    assert breaker.state() == OPEN
+
+    breaker = tripped_breaker(open_seconds=60, slow_call_seconds=1)
+    breaker._opened_at -= 60
+    breaker.record(breaker.allow(), False, 5.0)
+    assert breaker.state() == OPEN
+    assert breaker.stats()['opened'] == 2
+
+
+def test_late_result_from_before_the_trip_does_not_move_half_open():
+    breaker = CircuitBreaker(open_seconds=0)
+    straggler = breaker.allow()
+    for _ in range(3):
+        breaker.record(breaker.allow(), True, 0.1)
+    probe = breaker.allow()
+    assert probe.probe
+
+    # A request admitted while closed finishes late, after the circuit opened
+    breaker.record(straggler, False, 0.1)
+    assert breaker.state() == HALF_OPEN
+    assert breaker.allow() is None
+    breaker.record(probe, False, 0.1)
+    assert breaker.state() == CLOSED
+
+
+def test_stale_probe_is_ignored_after_the_circuit_closes():
+    breaker = tripped_breaker(half_open_probes=2)
+    first, second = breaker.allow(), breaker.allow()
+    breaker.record(first, False, 0.1)
+    assert breaker.state() == CLOSED
+    breaker.record(second, True, 0.1)
+    assert breaker.state() == CLOSED
+    assert breaker.stats()['window'] == 0
+
+
+def test_neutral_outcomes_are_not_counted():
+    breaker = CircuitBreaker(min_requests=2, consecutive_failures=2, open_seconds=60)
+    for _ in range(5):
+        breaker.record(breaker.allow(), None, 0.0)
+    assert breaker.state() == CLOSED
+    assert breaker.stats()['window'] == 0
+
+
+def test_neutral_probe_frees_its_slot():
+    breaker = tripped_breaker()
+    breaker.record(breaker.allow(), None, 0.0)
+    assert breaker.state() == HALF_OPEN
+    probe = breaker.allow()
+    assert probe is not None and probe.probe
@@ -0,0 +1,52 @@
+from conversation import SUMMARY_HEADER, ConversationMemory, Turn, first_sentence, summarize_turn
+from token_budget import estimate_tokens
+
+
+def turns(count: int, answer_words: int = 20):
+    return [Turn(f"Question {i}?", "premise", f"Question {i}?", f"Answer {i}. " + "more " * answer_words)
+            for i in range(count)]
+
+
+def test_first_sentence_strips_markdown_and_shortens():
+    assert first_sentence("**Society** is sacred. Everything else follows.") == "Society is sacred."
+    assert first_sentence("word " * 100, limit=20).endswith("…")
+
+
+def test_first_question_is_sent_alone():
+    assert ConversationMemory().messages([], "Hello?", 1000) == [{"role": "user", "content": "Hello?"}]
+
+
+def test_recent_turns_verbatim_and_older_ones_summarized():
+    history = turns(5)
+    messages = ConversationMemory(recent_turns=3).messages(history, "Next?", 5000)
+    assert [m["role"] for m in messages] == ["user", "assistant"] * 3 + ["user"]
+    assert messages[0]["content"].startswith(SUMMARY_HEADER)
+    assert summarize_turn(history[0]) in messages[0]["content"]
+    assert messages[0]["content"].endswith("Question 2?")
+    assert messages[-1] == {"role": "user", "content": "Next?"}
+
+
+def test_history_stays_within_the_input_budget():
+    memory = ConversationMemory(recent_turns=3, summary_tokens=60)
+    for count in (5, 20, 80):
+        messages = memory.messages(turns(count, answer_words=80), "Next?", 300)
+        assert sum(estimate_tokens(m["content"]) for m in messages) <= 300
+        assert messages[-1]["content"] == "Next?" or messages[-1]["content"].endswith("Next?")
+
+
+def test_each_turn_is_summarized_once():
+    memory = ConversationMemory(recent_turns=2)
+    history = turns(4)
+    memory.messages(history, "Next?", 5000)
+    assert memory.summarized == 2
+    memory.messages(history + turns(1), "Again?", 5000)
+    assert memory.summarized == 3
+    assert len(memory._lines) == 3
+
+
+def test_replaced_thread_starts_over():
+    memory = ConversationMemory(recent_turns=1)
+    memory.messages(turns(5), "Next?", 5000)
+    memory.messages(turns(2), "Next?", 5000)
+    assert memory.summarized == 1
+    assert list(memory._lines) == [summarize_turn(turns(2)[0])]
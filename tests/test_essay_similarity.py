@@ -0,0 +1,58 @@
+import pytest
+
+from essay_similarity import EssayIndex, shingles
+
+ESSAY = ("Durkheim taught me that religion is a social fact. The sacred binds a community together and rituals "
+         "renew the collective conscience. His premises start from society rather than from belief in spirits, "
+         "and he treats contradictions as signs that a definition leaves out how groups actually live together.")
+OTHER = ("Tillich defines religion as ultimate concern. Faith is the state of being grasped by what concerns us "
+         "unconditionally, so even a secular commitment can be religious when it demands everything from a person "
+         "and promises fulfilment in return, which is why he warns about idolatry of finite things.")
+
+
+def test_shingles_ignore_case_and_punctuation():
+    assert shingles("The Sacred, binds us all together!") == shingles("the sacred binds us all together")
+    assert len(shingles("too short")) == 1
+    assert shingles("") == set()
+
+
+def test_num_perm_must_split_into_bands():
+    with pytest.raises(ValueError):
+        EssayIndex(num_perm=100, bands=32)
+
+
+def test_copied_essay_is_flagged():
+    index = EssayIndex()
+    assert index.add_essay("ada", "Durkheim", ESSAY) == []
+    assert index.add_essay("bob", "Tillich", OTHER) == []
+    found = index.add_essay("cat", "Durkheim", ESSAY.replace("taught me", "showed me"))
+    assert [pair.second.owner for pair in found] == ["ada"]
+    assert found[0].similarity > 0.7
+    assert index.stats()['flagged'] == 1
+
+
+def test_essay_copying_a_response_is_flagged():
+    index = EssayIndex()
+    index.add_response("Durkheim", ESSAY)
+    assert index.add_response("Durkheim", ESSAY) == []
+    found = index.add_essay("ada", "Durkheim", ESSAY)
+    assert [(pair.second.kind, pair.second.owner) for pair in found] == [("response", "Durkheim")]
+
+
+def test_unrelated_pairs_are_not_reported():
+    index = EssayIndex()
+    index.add_response("Durkheim", ESSAY)
+    index.add_response("Tylor", ESSAY)
+    index.add_essay("ada", "Durkheim", OTHER)
+    index.add_essay("ada", "Tillich", OTHER)
+    assert index.flagged() == []
+
+
+def test_rewritten_essay_replaces_its_pairs():
+    index = EssayIndex()
+    index.add_essay("ada", "Durkheim", ESSAY)
+    index.add_essay("bob", "Durkheim", ESSAY)
+    assert len(index.flagged()) == 1
+    index.add_essay("bob", "Durkheim", OTHER)
+    assert index.flagged() == []
+    assert index.stats()['essays'] == 2
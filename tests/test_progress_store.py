@@ -0,0 +1,20 @@
+from progress_store import ProgressStore
+
+
+def test_first_pin_claims_the_name(tmp_path):
+    store = ProgressStore(str(tmp_path / "progress.db"))
+    assert store.check_pin("ada", "1234")
+    assert store.check_pin("ada", "1234")
+    assert not store.check_pin("ada", "4321")
+    assert store.check_pin("bob", "4321")
+    store.close()
+
+
+def test_pins_are_not_stored_in_the_clear(tmp_path):
+    store = ProgressStore(str(tmp_path / "progress.db"))
+    store.check_pin("ada", "1234")
+    store.check_pin("bob", "1234")
+    rows = store._reader().execute("SELECT pin_salt, pin_hash FROM students").fetchall()
+    assert all(b"1234" not in bytes(pin_hash) for _, pin_hash in rows)
+    assert rows[0] != rows[1]
+    store.close()
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from quiz_engine import UNANSWERED, QuizGradebook, build_gradebooks
+
+QUIZ = {"questions": [
+    {"options": ["a", "b", "c", "d"], "correct": 1},
+    {"options": ["a", "b"], "correct": 0},
+    {"options": ["a", "b", "c"], "correct": 2},
+]}
+
+
+def test_grades_against_the_key():
+    gradebook = QuizGradebook(QUIZ)
+    assert gradebook.submit([1, 1, 2]).tolist() == [True, False, True]
+    assert gradebook.submit([UNANSWERED, 0, 0]).tolist() == [False, True, False]
+    assert gradebook.scores().tolist() == [2, 1]
+
+
+def test_rejects_malformed_submissions():
+    gradebook = QuizGradebook(QUIZ)
+    with pytest.raises(ValueError):
+        gradebook.submit([1, 1])
+    with pytest.raises(ValueError):
+        gradebook.submit([1, 2, 2])
+    assert gradebook.stats()['submissions'] == 0
+
+
+def test_only_first_attempt_is_recorded():
+    gradebook = QuizGradebook(QUIZ)
+    gradebook.submit([0, 1, 0], student="ada")
+    assert gradebook.submit([1, 0, 2], student="ada").all()
+    gradebook.submit_many([[1, 0, 2], [1, 0, 2]], students=["bob", "bob"])
+    assert gradebook.stats() == {'submissions': 2, 'mean_score': 1.5, 'items': 3}
+
+
+def test_matrix_grows_past_its_capacity():
+    gradebook = QuizGradebook(QUIZ, capacity=2)
+    for _ in range(5):
+        gradebook.submit([1, 0, 2])
+    assert gradebook.answers().shape == (5, 3)
+
+
+def test_packed_rows_round_trip():
+    gradebook = QuizGradebook(QUIZ)
+    rows = [gradebook.pack([1, 0, 2]), gradebook.pack([0, UNANSWERED, 2])]
+    assert gradebook.submit_packed(rows, ["ada", "bob"]).tolist() == [[True, True, True], [False, False, True]]
+    assert gradebook.answers().tolist() == [[1, 0, 2], [0, UNANSWERED, 2]]
+    assert gradebook.submit_packed([]).shape == (0, 3)
+
+
+def test_item_analysis_matches_a_full_recount():
+    gradebook = QuizGradebook(QUIZ)
+    rng = np.random.default_rng(0)
+    answers = np.stack([rng.integers(UNANSWERED, len(q["options"]), 50) for q in QUIZ["questions"]], axis=1)
+    for start in range(0, 50, 7):
+        gradebook.submit_many(answers[start:start + 7])
+
+    correct = answers == gradebook.key
+    for item, row in enumerate(gradebook.item_analysis()):
+        assert row['difficulty'] == pytest.approx(correct[:, item].mean())
+        rest = correct.sum(axis=1) - correct[:, item]
+        assert row['discrimination'] == pytest.approx(np.corrcoef(correct[:, item], rest)[0, 1])
+        assert row['unanswered'] == int((answers[:, item] == UNANSWERED).sum())
+        assert row['choices'] == [int((answers[:, item] == option).sum())
+                                  for option in range(len(QUIZ["questions"][item]["options"]))]
+
+
+def test_empty_gradebook_has_no_statistics():
+    gradebooks = build_gradebooks({"day1": QUIZ})
+    analysis = gradebooks["day1"].item_analysis()
+    assert [row['difficulty'] for row in analysis] == [None, None, None]
+    assert gradebooks["day1"].stats()['mean_score'] == 0.0
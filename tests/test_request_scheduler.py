@@ -0,0 +1,36 @@
+import time
+
+import pytest
+
+from request_scheduler import FairScheduler, QueueTimeout
+
+
+class Rerun(BaseException):
+    """Stands in for Streamlit's rerun/stop exceptions, which aren't Exceptions"""
+
+
+def test_abandoned_wait_releases_its_ticket():
+    scheduler = FairScheduler(requests_per_minute=600, tokens_per_minute=100000, max_wait=2)
+    scheduler.pause_for(0.2)
+
+    def rerun(position: int) -> None:
+        raise Rerun()
+
+    with pytest.raises(Rerun):
+        scheduler.acquire("abandoned", 10, on_wait=rerun)
+    assert scheduler.stats()['waiting'] == 0
+
+    # The next session must not be stuck behind the abandoned ticket
+    started = time.monotonic()
+    scheduler.acquire("next", 10)
+    assert time.monotonic() - started < 1
+    assert scheduler.stats()['timeouts'] == 0
+
+
+def test_queue_timeout_releases_its_ticket():
+    scheduler = FairScheduler(requests_per_minute=600, tokens_per_minute=100000, max_wait=0.1)
+    scheduler.pause_for(5)
+    with pytest.raises(QueueTimeout):
+        scheduler.acquire("slow", 10)
+    assert scheduler.stats()['waiting'] == 0
+    assert scheduler.stats()['timeouts'] == 1
@@ -0,0 +1,64 @@
+import sqlite3
+import time
+
+from response_cache import ResponseCache, make_cache_key, normalize_question
+
+
+def key(question: str = "What is religion?", version: str = "v1"):
+    return make_cache_key("Durkheim", "premise", question, "model", 400, version)
+
+
+def test_questions_are_normalized():
+    assert normalize_question("  What IS\n religion?? ") == "what is religion"
+    assert key("what is religion") == key("What is   religion?")
+
+
+def test_hit_miss_and_lru_eviction():
+    cache = ResponseCache(max_entries=2)
+    assert cache.get(key("a")) is None
+    cache.put(key("a"), "A")
+    cache.put(key("b"), "B")
+    assert cache.get(key("a")) == "A"
+    cache.put(key("c"), "C")
+    assert cache.get(key("b")) is None
+    assert cache.get(key("a")) == "A"
+    assert cache.stats() == {'hits': 2, 'misses': 2, 'disk_hits': 0, 'evictions': 1, 'size': 2}
+
+
+def test_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    cache = ResponseCache(ttl_seconds=60)
+    cache.put(key(), "answer")
+    now[0] += 61
+    assert cache.get(key()) is None
+    assert cache.stats()['size'] == 0
+
+
+def test_prompt_version_is_part_of_the_key():
+    cache = ResponseCache()
+    cache.put(key(version="v1"), "old answer")
+    assert cache.get(key(version="v2")) is None
+
+
+def test_answers_survive_a_restart(tmp_path):
+    path = str(tmp_path / "cache.db")
+    ResponseCache(disk_path=path).put(key(), "answer")
+    cache = ResponseCache(disk_path=path)
+    assert cache.get(key()) == "answer"
+    assert cache.stats()['disk_hits'] == 1
+
+
+def test_unversioned_table_is_dropped(tmp_path):
+    path = str(tmp_path / "cache.db")
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE response_cache (philosopher TEXT, question_type TEXT, question TEXT, model TEXT, "
+               "max_tokens INTEGER, response TEXT, created_at REAL)")
+    db.execute("INSERT INTO response_cache VALUES ('Durkheim', 'premise', 'what is religion', 'model', 400, "
+               "'stale', ?)", (time.time(),))
+    db.commit()
+    db.close()
+    cache = ResponseCache(disk_path=path)
+    assert cache.get(key()) is None
+    cache.put(key(), "fresh")
+    assert ResponseCache(disk_path=path).get(key()) == "fresh"
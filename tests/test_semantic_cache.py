@@ -0,0 +1,52 @@
+from semantic_cache import SimilarityIndex, extract_features, tokenize
+
+QUESTION = "How do you define religion as a social fact?"
+
+
+def test_tokenize_drops_stopwords_and_plurals():
+    assert tokenize("What are the Societies and rituals you explain?") == ["society", "ritual"]
+    assert extract_features("what is the") == {}
+
+
+def test_paraphrase_finds_the_earlier_answer():
+    index = SimilarityIndex(threshold=0.6)
+    index.add("Durkheim", "premise", QUESTION, "Religion is a social fact.", "v1")
+    index.add("Durkheim", "premise", "Why do totems matter to clans?", "Totems stand for the clan.", "v1")
+    match = index.lookup("Durkheim", "premise", "Could you explain religion as a social fact", "v1")
+    assert match['response'] == "Religion is a social fact."
+    assert match['matched_question'] == QUESTION
+    assert match['similarity'] >= 0.6
+
+
+def test_unrelated_question_misses():
+    index = SimilarityIndex()
+    index.add("Durkheim", "premise", QUESTION, "Religion is a social fact.", "v1")
+    assert index.lookup("Durkheim", "premise", "Are fallacies common in theology?", "v1") is None
+    assert index.stats() == {'hits': 0, 'misses': 1, 'size': 1}
+
+
+def test_buckets_are_per_philosopher_and_question_type():
+    index = SimilarityIndex()
+    index.add("Durkheim", "premise", QUESTION, "Religion is a social fact.", "v1")
+    assert index.lookup("Tylor", "premise", QUESTION, "v1") is None
+    assert index.lookup("Durkheim", "logic", QUESTION, "v1") is None
+    assert index.lookup("Durkheim", "premise", QUESTION, "v1") is not None
+
+
+def test_new_prompt_version_drops_older_answers():
+    index = SimilarityIndex()
+    index.add("Durkheim", "premise", QUESTION, "Old answer.", "v1")
+    assert index.lookup("Durkheim", "premise", QUESTION, "v2") is None
+    index.add("Durkheim", "premise", "Why do totems matter to clans?", "New answer.", "v2")
+    assert index.lookup("Durkheim", "premise", QUESTION, "v1") is None
+    assert index.stats()['size'] == 1
+
+
+def test_oldest_answers_are_evicted():
+    index = SimilarityIndex(max_per_bucket=2)
+    index.add("Durkheim", "premise", QUESTION, "First.", "v1")
+    index.add("Durkheim", "premise", "Why do totems matter to clans?", "Second.", "v1")
+    index.add("Durkheim", "premise", "Is the sacred set apart from the profane?", "Third.", "v1")
+    assert index.stats()['size'] == 2
+    assert index.lookup("Durkheim", "premise", QUESTION, "v1") is None
+    assert index.lookup("Durkheim", "premise", "Is the sacred set apart from the profane?", "v1")['response'] == "Third."
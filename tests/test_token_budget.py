@@ -0,0 +1,80 @@
+import time
+
+from token_budget import TokenBudget, TokenLedger, estimate_tokens, truncate_to_tokens, usage_tokens
+
+
+def test_estimate_counts_words_and_punctuation():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("What is religion?") > estimate_tokens("What is religion")
+
+
+def test_truncate_cuts_at_a_word_boundary():
+    text = " ".join(f"word{i}" for i in range(200))
+    short, cut = truncate_to_tokens(text, 50)
+    assert cut and short.endswith(" …")
+    assert estimate_tokens(short) <= 50
+    assert text.startswith(short[:-2])
+    assert truncate_to_tokens("A short question?", 50) == ("A short question?", False)
+
+
+def test_prompt_cache_tokens_count_as_input():
+    usage = {"input_tokens": 10, "cache_creation_input_tokens": 100, "cache_read_input_tokens": 1000,
+             "output_tokens": 5}
+    assert usage_tokens(usage) == (1110, 5)
+    assert usage_tokens({"input_tokens": 3, "cache_read_input_tokens": None}) == (3, 0)
+
+
+def test_ledger_tallies_each_dimension():
+    ledger = TokenLedger()
+    ledger.record("ada", "Durkheim", "premise", {"input_tokens": 100, "output_tokens": 50})
+    ledger.record("ada", "Tylor", "premise", {"input_tokens": 10, "output_tokens": 5})
+    ledger.record("bob", "Tylor", "logic", {"input_tokens": 1, "output_tokens": 1})
+    assert ledger.used("ada") == 165
+    assert ledger.used("nobody") == 0
+    assert ledger.used() == 167
+    assert [row['philosopher'] for row in ledger.table("philosopher")] == ["Durkheim", "Tylor"]
+    assert ledger.table("question_type")[0] == {'question_type': "premise", 'input_tokens': 110,
+                                                'output_tokens': 55, 'requests': 2}
+    assert ledger.stats() == {'input_tokens': 111, 'output_tokens': 56, 'requests': 3, 'students': 2}
+
+
+def test_ledger_starts_over_each_window(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    ledger = TokenLedger(window_seconds=60)
+    ledger.record("ada", "Durkheim", "premise", {"input_tokens": 100, "output_tokens": 50})
+    now[0] += 60
+    assert ledger.used("ada") == 0
+    assert ledger.stats()['students'] == 0
+
+
+def spent(ledger: TokenLedger, student: str, tokens: int) -> None:
+    ledger.record(student, "Durkheim", "premise", {"input_tokens": tokens, "output_tokens": 0})
+
+
+def test_budget_tapers_then_stops():
+    ledger = TokenLedger()
+    budget = TokenBudget(ledger, student_tokens=1000)
+    assert budget.max_tokens_for("ada", 400, 50) == 400
+    spent(ledger, "ada", 800)
+    # 200 left: inside the last quarter, so tapered, and capped by what's left after the input
+    assert budget.remaining("ada") == 200
+    assert budget.max_tokens_for("ada", 400, 50) == 150
+    spent(ledger, "ada", 50)
+    assert budget.max_tokens_for("ada", 400, 50) == 0
+    # Other students are unaffected
+    assert budget.max_tokens_for("bob", 400, 50) == 400
+
+
+def test_class_cap_applies_to_everyone():
+    ledger = TokenLedger()
+    budget = TokenBudget(ledger, student_tokens=10000, class_tokens=1000)
+    spent(ledger, "ada", 900)
+    assert budget.remaining("bob") == 100
+    assert budget.max_tokens_for("bob", 400, 50) == 0
+
+
+def test_uncapped_budget():
+    budget = TokenBudget(TokenLedger())
+    assert budget.remaining("ada") is None
+    assert budget.max_tokens_for("ada", 400, 10 ** 6) == 400
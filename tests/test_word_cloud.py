@@ -0,0 +1,49 @@
+import re
+
+from word_cloud import WordCloud, WordCloudBoard, cloud_terms
+
+
+def shown(cloud: WordCloud) -> dict:
+    """Words in the cloud HTML and their counts"""
+    return {term: int(count) for count, term in re.findall(r'title="(\d+)"[^>]*>([^<]+)<', cloud.html())}
+
+
+def test_terms_skip_stopwords_and_repeats():
+    assert cloud_terms("Ritual, ritual and the SACRED community!") == {"ritual", "sacred", "community"}
+
+
+def test_each_student_counts_once_per_word():
+    cloud = WordCloud()
+    assert cloud.contribute("ada", "ritual ritual sacred")
+    assert cloud.contribute("bob", "ritual community")
+    assert shown(cloud) == {"ritual": 2, "sacred": 1, "community": 1}
+
+
+def test_rewritten_answer_replaces_the_old_one():
+    cloud = WordCloud()
+    cloud.contribute("ada", "ritual sacred")
+    assert not cloud.contribute("ada", "sacred ritual")
+    assert cloud.contribute("ada", "community")
+    assert shown(cloud) == {"community": 1}
+    assert cloud.contribute("ada", "")
+    assert shown(cloud) == {}
+    assert cloud.stats() == {'contributors': 0, 'terms': 0, 'version': 3}
+
+
+def test_changes_below_the_top_words_leave_the_cloud_alone():
+    cloud = WordCloud(top_k=2)
+    for student in ("ada", "bob", "cat"):
+        cloud.contribute(student, "ritual sacred")
+    html = cloud.html()
+    assert not cloud.contribute("dan", "community")
+    assert cloud.html() is html
+    assert set(shown(cloud)) == {"ritual", "sacred"}
+
+
+def test_board_keeps_one_cloud_per_prompt():
+    board = WordCloudBoard(top_k=5)
+    board.contribute("response_1", "ada", "ritual")
+    board.contribute("response_2", "ada", "spirits")
+    assert shown(board.cloud("response_1")) == {"ritual": 1}
+    assert board.cloud("response_2") is board.cloud("response_2")
+    assert board.cloud("response_2").top_k == 5
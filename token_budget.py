@@ -0,0 +1,148 @@
+"""
+Token estimation, accounting and budgets for the Messages API.
+Requests are sized locally before they are sent, so oversized questions can
+be cut down and the scheduler can reserve tokens-per-minute capacity. The
+usage the API reports back is tallied per student, philosopher and question
+type over a fixed budget window. As a student or the whole class nears its
+cap, answers get a smaller ``max_tokens`` rather than stopping outright.
+"""
+
+import re
+import threading
+import time
+from typing import Dict, List, Mapping, Optional, Tuple
+
+# Word runs and single punctuation marks, roughly what a BPE tokenizer splits on
+TOKEN_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+DIMENSIONS = ("student", "philosopher", "question_type")
+
+
+def estimate_tokens(text: str) -> int:
+    """Local token estimate: about four characters or three-quarters of a word per token, whichever is more"""
+    if not text:
+        return 0
+    return max(len(text) // 4, len(TOKEN_PIECE_RE.findall(text)) * 4 // 3) + 1
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> Tuple[str, bool]:
+    """Cut ``text`` at a word boundary to fit ``max_tokens``; also reports whether it was cut"""
+    if estimate_tokens(text) <= max_tokens:
+        return text, False
+    words = text.split()
+    low, high = 0, len(words)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(" ".join(words[:middle]) + " …") <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return " ".join(words[:low]) + " …", True
+
+
+def usage_tokens(usage: Mapping) -> Tuple[int, int]:
+    """(input, output) tokens from a Messages API usage block, counting prompt-cache reads and writes as input"""
+    input_tokens = sum(usage.get(field) or 0 for field in
+                       ("input_tokens", "cache_creation_input_tokens", "cache_read_input_tokens"))
+    return input_tokens, usage.get("output_tokens") or 0
+
+
+class TokenLedger:
+    """Input/output tokens and request counts by student, philosopher and question type, per budget window"""
+
+    def __init__(self, window_seconds: float = 86400):
+        self.window_seconds = window_seconds
+        self._window = self._current_window()
+        # dimension -> key -> [input tokens, output tokens, requests]
+        self._tallies: Dict[str, Dict[str, List[int]]] = {dimension: {} for dimension in DIMENSIONS}
+        self._total = [0, 0, 0]
+        self._lock = threading.Lock()
+
+    def _current_window(self) -> int:
+        return int(time.time() // self.window_seconds)
+
+    def _roll(self) -> None:
+        window = self._current_window()
+        if window != self._window:
+            self._window = window
+            self._tallies = {dimension: {} for dimension in DIMENSIONS}
+            self._total = [0, 0, 0]
+
+    def record(self, student: str, philosopher: str, question_type: str, usage: Mapping) -> Tuple[int, int]:
+        """Add one response's usage; returns its (input, output) tokens"""
+        input_tokens, output_tokens = usage_tokens(usage)
+        with self._lock:
+            self._roll()
+            for dimension, key in zip(DIMENSIONS, (student, philosopher, question_type)):
+                tally = self._tallies[dimension].setdefault(key, [0, 0, 0])
+                tally[0] += input_tokens
+                tally[1] += output_tokens
+                tally[2] += 1
+            self._total[0] += input_tokens
+            self._total[1] += output_tokens
+            self._total[2] += 1
+        return input_tokens, output_tokens
+
+    def used(self, student: Optional[str] = None) -> int:
+        """Tokens used this window by one student, or by the whole class"""
+        with self._lock:
+            self._roll()
+            tally = self._total if student is None else self._tallies["student"].get(student, (0, 0, 0))
+            return tally[0] + tally[1]
+
+    def table(self, dimension: str) -> List[Dict]:
+        """Rows for one dimension, heaviest first"""
+        with self._lock:
+            self._roll()
+            rows = [
+                {dimension: key, 'input_tokens': tally[0], 'output_tokens': tally[1], 'requests': tally[2]}
+                for key, tally in self._tallies[dimension].items()
+            ]
+        return sorted(rows, key=lambda row: row['input_tokens'] + row['output_tokens'], reverse=True)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            self._roll()
+            return {
+                'input_tokens': self._total[0],
+                'output_tokens': self._total[1],
+                'requests': self._total[2],
+                'students': len(self._tallies["student"])
+            }
+
+
+class TokenBudget:
+    """Per-student and class-wide token caps that taper ``max_tokens`` as they fill; 0 means no cap"""
+
+    def __init__(self, ledger: TokenLedger, student_tokens: int = 0, class_tokens: int = 0,
+                 taper: float = 0.25, min_output_tokens: int = 120):
+        self.ledger = ledger
+        self.student_tokens = student_tokens
+        self.class_tokens = class_tokens
+        self.taper = taper
+        self.min_output_tokens = min_output_tokens
+
+    def remaining(self, student: str) -> Optional[int]:
+        """Tokens left under the tightest cap, or None when uncapped"""
+        caps = self._caps(student)
+        return min(cap - used for cap, used in caps) if caps else None
+
+    def _caps(self, student: str) -> List[Tuple[int, int]]:
+        caps = []
+        if self.student_tokens:
+            caps.append((self.student_tokens, self.ledger.used(student)))
+        if self.class_tokens:
+            caps.append((self.class_tokens, self.ledger.used()))
+        return caps
+
+    def max_tokens_for(self, student: str, requested: int, input_estimate: int) -> int:
+        """Answer length to ask for; 0 when a cap can't fit even a short answer"""
+        floor = min(self.min_output_tokens, requested)
+        allowed = requested
+        for cap, used in self._caps(student):
+            remaining = cap - used
+            # Full-length answers until the last ``taper`` share of the cap, then shrinking in proportion
+            if remaining < self.taper * cap:
+                allowed = min(allowed, max(floor, int(requested * remaining / (self.taper * cap))))
+            allowed = min(allowed, remaining - input_estimate)
+        return allowed if allowed >= floor else 0
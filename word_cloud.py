@@ -0,0 +1,129 @@
+"""
+Class-wide word clouds for discussion prompts.
+Each response is tokenized once when it arrives and only the terms it adds or
+removes are counted, so term frequencies are never recomputed from scratch.
+The top terms are re-selected (with a heap) only when a change can reach the
+current ranking, and the cloud HTML is rebuilt only when that ranking differs.
+"""
+
+import heapq
+import html
+import re
+import threading
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from semantic_cache import STOPWORDS
+
+CLOUD_STOPWORDS = STOPWORDS | frozenset("""
+all also am any been being but has have if into just like more most much not one our out really
+same some such than then there these they things thing those too very way ways because being
+""".split())
+
+PALETTE = ("#667eea", "#764ba2", "#2b6cb0", "#805ad5", "#d53f8c", "#dd6b20", "#38a169")
+
+
+def cloud_terms(text: str) -> FrozenSet[str]:
+    """Distinct content words in one response; each student counts once per word"""
+    return frozenset(
+        word for word in re.findall(r"[a-z][a-z'-]*[a-z]", text.lower())
+        if len(word) > 2 and word not in CLOUD_STOPWORDS
+    )
+
+
+def render_cloud_html(ranking: List[Tuple[str, int]]) -> str:
+    """Inline HTML cloud with font sizes scaled by count"""
+    if not ranking:
+        return ""
+    top = ranking[0][1]
+    low = ranking[-1][1]
+    spread = max(1, top - low)
+    words = []
+    # Alphabetical layout keeps words from jumping around as counts change
+    for index, (term, count) in enumerate(sorted(ranking)):
+        size = 0.9 + 1.8 * (count - low) / spread
+        colour = PALETTE[index % len(PALETTE)]
+        words.append(
+            f'<span title="{count}" style="font-size:{size:.2f}em;color:{colour};'
+            f'margin:0 0.35em;font-weight:600;white-space:nowrap">{html.escape(term)}</span>'
+        )
+    return '<div style="line-height:2.2em;text-align:center">' + " ".join(words) + "</div>"
+
+
+class WordCloud:
+    """Streaming term-frequency counter for one prompt, with a cached top-K ranking"""
+
+    def __init__(self, top_k: int = 40):
+        self.top_k = top_k
+        self.version = 0
+        self._counts: Dict[str, int] = {}
+        self._contributions: Dict[str, FrozenSet[str]] = {}
+        self._ranking: List[Tuple[str, int]] = []
+        self._ranked: FrozenSet[str] = frozenset()
+        self._html: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def contribute(self, contributor: str, text: str) -> bool:
+        """Replace one contributor's response; returns True when the ranking changed"""
+        terms = cloud_terms(text)
+        with self._lock:
+            previous = self._contributions.get(contributor, frozenset())
+            if terms == previous:
+                return False
+            if terms:
+                self._contributions[contributor] = terms
+            else:
+                self._contributions.pop(contributor, None)
+
+            for term in previous - terms:
+                remaining = self._counts[term] - 1
+                if remaining:
+                    self._counts[term] = remaining
+                else:
+                    del self._counts[term]
+            for term in terms - previous:
+                self._counts[term] = self._counts.get(term, 0) + 1
+
+            return self._rerank(previous ^ terms)
+
+    def _rerank(self, changed: Iterable[str]) -> bool:
+        floor = self._ranking[-1][1] if len(self._ranking) >= self.top_k else 0
+        if not any(term in self._ranked or self._counts.get(term, 0) >= floor for term in changed):
+            return False
+        ranking = heapq.nlargest(self.top_k, self._counts.items(), key=lambda item: (item[1], item[0]))
+        if ranking == self._ranking:
+            return False
+        self._ranking = ranking
+        self._ranked = frozenset(term for term, _ in ranking)
+        self._html = None
+        self.version += 1
+        return True
+
+    def html(self) -> str:
+        """Cloud HTML, rebuilt only after the ranking changes"""
+        with self._lock:
+            if self._html is None:
+                self._html = render_cloud_html(self._ranking)
+            return self._html
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'contributors': len(self._contributions), 'terms': len(self._counts), 'version': self.version}
+
+
+class WordCloudBoard:
+    """One word cloud per discussion prompt"""
+
+    def __init__(self, top_k: int = 40):
+        self.top_k = top_k
+        self._clouds: Dict[str, WordCloud] = {}
+        self._lock = threading.Lock()
+
+    def cloud(self, prompt_key: str) -> WordCloud:
+        with self._lock:
+            cloud = self._clouds.get(prompt_key)
+            if cloud is None:
+                cloud = self._clouds[prompt_key] = WordCloud(self.top_k)
+            return cloud
+
+    def contribute(self, prompt_key: str, contributor: str, text: str) -> bool:
+        return self.cloud(prompt_key).contribute(contributor, text)